@@ -0,0 +1,185 @@
+"""
+Address canonicalization and fuzzy de-duplication for Phase 2 geocoding.
+
+Phase 2 used to send one ArcGIS request per distinct `Address` string, so
+"123 Main Road, Ste 200, Ashburn, VA 20147, USA" and "123 main rd, Ashburn, VA
+20147" were two lookups. Here every address is reduced to a canonical form
+(upper case, no punctuation, no suite/unit, USPS street abbreviations, no
+country suffix) and grouped:
+
+  1. exact canonical matches collapse immediately;
+  2. the rest are blocked by ZIP (or state + city when there is no ZIP) and,
+     inside a block, merged when the street numbers and directionals agree
+     and the canonical strings are near-identical (difflib ratio >= threshold).
+
+Only one representative per group is geocoded; its result is fanned back out
+to every member address.
+"""
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+# USPS Publication 28 suffix / directional abbreviations (most common subset)
+ABBREVIATIONS = {
+    'ROAD': 'RD', 'STREET': 'ST', 'AVENUE': 'AVE', 'AV': 'AVE', 'DRIVE': 'DR',
+    'BOULEVARD': 'BLVD', 'PARKWAY': 'PKWY', 'HIGHWAY': 'HWY', 'LANE': 'LN',
+    'COURT': 'CT', 'PLACE': 'PL', 'CIRCLE': 'CIR', 'TERRACE': 'TER', 'TRAIL': 'TRL',
+    'EXPRESSWAY': 'EXPY', 'FREEWAY': 'FWY', 'TURNPIKE': 'TPKE', 'SQUARE': 'SQ',
+    'CENTER': 'CTR', 'CENTRE': 'CTR', 'PLAZA': 'PLZ', 'POINT': 'PT', 'WAY': 'WAY',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+    'MOUNT': 'MT', 'SAINT': 'ST', 'FORT': 'FT',
+}
+
+STATE_NAMES = {
+    'ALABAMA': 'AL', 'ALASKA': 'AK', 'ARIZONA': 'AZ', 'ARKANSAS': 'AR', 'CALIFORNIA': 'CA',
+    'COLORADO': 'CO', 'CONNECTICUT': 'CT', 'DELAWARE': 'DE', 'FLORIDA': 'FL', 'GEORGIA': 'GA',
+    'HAWAII': 'HI', 'IDAHO': 'ID', 'ILLINOIS': 'IL', 'INDIANA': 'IN', 'IOWA': 'IA',
+    'KANSAS': 'KS', 'KENTUCKY': 'KY', 'LOUISIANA': 'LA', 'MAINE': 'ME', 'MARYLAND': 'MD',
+    'MASSACHUSETTS': 'MA', 'MICHIGAN': 'MI', 'MINNESOTA': 'MN', 'MISSISSIPPI': 'MS', 'MISSOURI': 'MO',
+    'MONTANA': 'MT', 'NEBRASKA': 'NE', 'NEVADA': 'NV', 'NEW HAMPSHIRE': 'NH', 'NEW JERSEY': 'NJ',
+    'NEW MEXICO': 'NM', 'NEW YORK': 'NY', 'NORTH CAROLINA': 'NC', 'NORTH DAKOTA': 'ND', 'OHIO': 'OH',
+    'OKLAHOMA': 'OK', 'OREGON': 'OR', 'PENNSYLVANIA': 'PA', 'RHODE ISLAND': 'RI', 'SOUTH CAROLINA': 'SC',
+    'SOUTH DAKOTA': 'SD', 'TENNESSEE': 'TN', 'TEXAS': 'TX', 'UTAH': 'UT', 'VERMONT': 'VT',
+    'VIRGINIA': 'VA', 'WASHINGTON': 'WA', 'WEST VIRGINIA': 'WV', 'WISCONSIN': 'WI', 'WYOMING': 'WY',
+    'DISTRICT OF COLUMBIA': 'DC',
+}
+DIRECTIONALS = {'N', 'S', 'E', 'W', 'NE', 'NW', 'SE', 'SW'}
+
+_COUNTRY_RE = re.compile(r',?\s*(USA|U\.S\.A\.?|U\.S\.?|UNITED STATES( OF AMERICA)?|US|EE\.?\s*UU\.?)\s*$')
+_STATE_PART_RE = re.compile(r'^(' + '|'.join(sorted(STATE_NAMES, key=len, reverse=True)) + r')(\s+\d{5}.*)?$')
+# A unit designator only counts as one when it is a whole word followed by a unit
+# number ("STE 200", "BLDG C", "APT 4B"), so street names such as "Apt Rd" or
+# "Florida Palm Dr" survive. "FL" alone is the Florida state code; as a floor it
+# needs a short floor number, never a 5-digit ZIP.
+_UNIT_RE = re.compile(r'\b(?:(?:SUITE|STE|UNIT|APT|BLDG|BUILDING|FLOOR|RM|ROOM)\b\.?\s*#?\s*(?:\d[\w-]*|[A-Z](?:-[\w-]+)?)\b'
+                      r'|FL\b\.?\s*#?\s*\d{1,3}[A-Z]?\b)|#\s*[\w-]+')
+_PUNCT_RE = re.compile(r'[^\w\s,]')
+_ZIP_RE = re.compile(r'.*\b(\d{5})(?:-\d{4})?\b')
+_STATE_RE = re.compile(r',\s*([A-Z]{2})\b(?:\s+\d{5})?[^,]*$')
+
+
+def canonicalize(addr):
+    """Canonical comparison form of an address (not meant to be sent to the geocoder)."""
+    s = str(addr).upper().strip()
+    s = _COUNTRY_RE.sub('', s)
+    parts = []
+    raw_parts = s.split(',')
+    for i, part in enumerate(raw_parts):
+        # The last part holds the state (+ ZIP); units are only stripped before it
+        if i < len(raw_parts) - 1 or i == 0:
+            part = _UNIT_RE.sub('', part)
+        part = ' '.join(_PUNCT_RE.sub(' ', part).split())
+        # Full state name in the last part ("Oregon 97818" -> "OR 97818")
+        m = _STATE_PART_RE.match(part) if 0 < i == len(raw_parts) - 1 else None
+        if m:
+            words = [STATE_NAMES[m.group(1)]] + (m.group(2) or '').split()
+        else:
+            words = [ABBREVIATIONS.get(w, w) for w in part.split()]
+        if words:
+            parts.append(' '.join(words))
+    return ', '.join(parts)
+
+
+def block_key(canon):
+    """Blocking key: ZIP if present, otherwise STATE|CITY."""
+    m = _ZIP_RE.match(canon)
+    if m:
+        return m.group(1)
+    parts = [p.strip() for p in canon.split(',')]
+    state = None
+    m = _STATE_RE.search(canon)
+    if m:
+        state = m.group(1)
+    city = parts[-2] if len(parts) >= 2 else ''
+    if state is None and parts:
+        state = parts[-1][:2]
+    return f"{state}|{city}"
+
+
+def _street_signature(canon):
+    """Numeric tokens and directionals of the street part; these must agree for a fuzzy merge."""
+    words = canon.split(',')[0].split()
+    numbers = tuple(w for w in words if any(ch.isdigit() for ch in w))
+    directions = frozenset(w for w in words if w in DIRECTIONALS)
+    return numbers, directions
+
+
+def _compatible(sig_a, sig_b):
+    if sig_a[0] != sig_b[0]:
+        return False  # 8TH vs 9TH, different house numbers
+    if sig_a[1] and sig_b[1] and sig_a[1] != sig_b[1]:
+        return False  # N GRAND AVE vs S GRAND AVE (a missing directional is fine)
+    return True
+
+
+def dedupe_addresses(addresses, threshold=0.92):
+    """
+    Group near-duplicate addresses.
+
+    Returns (groups, stats): groups maps a representative address (the first
+    member seen, in its original form) to the list of original addresses it
+    stands for.
+    """
+    # 1. Exact canonical matches
+    by_canon = {}
+    for addr in addresses:
+        c = canonicalize(addr)
+        by_canon.setdefault(c, []).append(addr)
+
+    # 2. Fuzzy matches inside each block
+    blocks = defaultdict(list)
+    for c in by_canon:
+        blocks[block_key(c)].append(c)
+
+    groups = {}
+    fuzzy_merges = 0
+    for canons in blocks.values():
+        reps = []  # (canon, street signature, representative address)
+        for c in canons:
+            sig = _street_signature(c)
+            target = None
+            for rc, rsig, raddr in reps:
+                if not _compatible(sig, rsig):
+                    continue
+                if SequenceMatcher(None, c, rc).ratio() >= threshold:
+                    target = raddr
+                    break
+            if target is None:
+                rep = by_canon[c][0]
+                reps.append((c, sig, rep))
+                groups[rep] = list(by_canon[c])
+            else:
+                groups[target].extend(by_canon[c])
+                fuzzy_merges += 1
+
+    n = len(addresses)
+    stats = {
+        'addresses': n,
+        'canonical': len(by_canon),
+        'lookups': len(groups),
+        'fuzzy_merges': fuzzy_merges,
+        'saved': n - len(groups),
+    }
+    return groups, stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Report how many Phase 2 lookups address de-duplication saves.")
+    parser.add_argument('csv', nargs='?', default='datacenters_final_structure(Sheet1).csv')
+    parser.add_argument('--threshold', type=float, default=0.92)
+    args = parser.parse_args()
+
+    try:
+        df = pd.read_csv(args.csv, encoding='utf-8')
+    except UnicodeDecodeError:
+        df = pd.read_csv(args.csv, encoding='latin-1')
+    unique = df['Address'].dropna().unique()
+    groups, stats = dedupe_addresses(unique, threshold=args.threshold)
+    print(f"Unique address strings : {stats['addresses']}")
+    print(f"After canonicalization : {stats['canonical']}")
+    print(f"After fuzzy matching   : {stats['lookups']}  ({stats['fuzzy_merges']} fuzzy merges)")
+    print(f"Lookups saved          : {stats['saved']}")
@@ -0,0 +1,478 @@
+"""
+Benchmark suite for the ingest -> geocode -> aggregate -> render -> simulate pipeline.
+
+Synthetic inputs are generated at multiples of today's data (2,290 data centers,
+~10k EIA-860 plants) and each stage is timed and memory-profiled:
+
+  ingest_cold   load_plant_locations() from the xlsx workbooks (Parquet cache cleared)
+  ingest_warm   load_plant_locations() served from the eia_cache Parquet files
+  geocode       ZIP extraction + offline index lookup, then de-duplication and the
+                concurrent engine against SimulatedGeocoder for the rest
+  aggregate     load_plant_capacity() over every generator (full fuel-category map)
+  payload       category masks + columnar layer encoding + gzip payload (map_payload.py)
+  map_html      map_visualization_interactive.build_map() end to end (warm cache)
+  sweep         simulation.iter_sweep() over 100k scenarios x scale
+
+Every stage runs in a fresh interpreter (like `plant_data.py --memory`), so
+peak RSS is per stage. Timing is the best of --repeat runs; a separate pass
+under tracemalloc gives the peak Python/NumPy allocation. Results are appended
+to benchmark_history.jsonl with the git commit, one JSON object per stage and
+scale, so runs can be compared across commits:
+
+    python benchmark.py --scales 1 10 --repeat 3
+    python benchmark.py --scales 100 --stages geocode aggregate payload sweep
+    python benchmark.py --compare            # latest run vs the previous commit
+
+Generated data is kept in .bench/<scale>x/ and reused. Above the xlsx sheet
+row limit (100x) the stages that read workbooks are recorded as skipped.
+"""
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(HERE, 'benchmark_history.jsonl')
+WORK_DIR = os.path.join(HERE, '.bench')
+DATA_VERSION = 1
+
+BASE_DATA_CENTERS = 2290
+BASE_PLANTS = 10000
+SWEEP_SCENARIOS = 100_000
+XLSX_MAX_ROWS = 1_048_575  # data rows per sheet under the title + header rows
+
+STAGES = ['ingest_cold', 'ingest_warm', 'geocode', 'aggregate', 'payload', 'map_html', 'sweep']
+XLSX_STAGES = {'ingest_cold', 'ingest_warm', 'map_html'}
+
+# Generator fuel mix (Energy Source 1 code, share of generator rows)
+FUEL_MIX = {'NG': 0.34, 'SUN': 0.2, 'WND': 0.08, 'MWH': 0.07, 'WAT': 0.08, 'DFO': 0.07, 'SUB': 0.03,
+            'BIT': 0.03, 'NUC': 0.01, 'LFG': 0.04, 'WDS': 0.02, 'GEO': 0.01, 'OG': 0.02}
+PROVIDERS = ['Equinix', 'Digital Realty', 'Amazon AWS', 'Microsoft Azure', 'Google Cloud', 'QTS',
+             'CyrusOne', 'Flexential', 'Switch', 'Iron Mountain', 'Aligned', 'Vantage']
+ZIP_INDEX_COVERAGE = 0.4   # share of the 100k ZIP codes that have a centroid
+UNKNOWN_ZIP_SHARE = 0.15   # addresses whose ZIP is missing from the index -> Phase 2
+DUPLICATE_SHARE = 0.1      # addresses repeated with a cosmetic variation (campuses)
+
+
+# ---------------------------------------------------------------- data generators
+
+def synthetic_zip_index(seed=0):
+    """Dense (100000, 2) centroid array like zip_index.load_zip_index(), NaN for unused codes."""
+    from zip_index import N_ZIPS
+
+    rng = np.random.default_rng(seed)
+    index = np.full((N_ZIPS, 2), np.nan)
+    used = rng.random(N_ZIPS) < ZIP_INDEX_COVERAGE
+    index[used, 0] = rng.uniform(25.0, 49.0, used.sum())
+    index[used, 1] = rng.uniform(-124.0, -67.0, used.sum())
+    return index
+
+
+def synthetic_data_centers(n, zip_index, seed=0):
+    """`n` data centers with the columns of datacenters_with_coords.csv."""
+    from plant_data import STATE_ABBREV
+
+    rng = np.random.default_rng(seed)
+    states = np.array(sorted(set(STATE_ABBREV.values())))
+    known = np.flatnonzero(np.isfinite(zip_index[:, 0]))
+    unknown = np.flatnonzero(~np.isfinite(zip_index[:, 0]))
+    zips = np.where(rng.random(n) < UNKNOWN_ZIP_SHARE, rng.choice(unknown, n), rng.choice(known, n))
+    state = rng.choice(states, n)
+    address = np.array([f"{100 + i % 9900} Data Center Way, City {i % 997}, {s} {z:05d}, USA"
+                        for i, (s, z) in enumerate(zip(state, zips))], dtype=object)
+    # Campuses: the same street address again, spelled slightly differently
+    dup = np.flatnonzero(rng.random(n) < DUPLICATE_SHARE)
+    dup = dup[dup > 0]
+    src = rng.integers(0, dup, len(dup)) if len(dup) else dup
+    address[dup] = [a.replace('Data Center Way', 'Data Center Wy') for a in address[src]]
+    lat = np.where(np.isfinite(zip_index[zips, 0]), zip_index[zips, 0], rng.uniform(25.0, 49.0, n))
+    lon = np.where(np.isfinite(zip_index[zips, 1]), zip_index[zips, 1], rng.uniform(-124.0, -67.0, n))
+    return pd.DataFrame({
+        'Provider': rng.choice(PROVIDERS, n),
+        'Data Center Name': [f"DC-{i:07d}" for i in range(n)],
+        'Address': address,
+        'Latitude': lat.round(6),
+        'Longitude': lon.round(6),
+    })
+
+
+def synthetic_eia_sheets(n_plants, seed=0):
+    """{sheet prefix: frame} with the EIA-860 columns plant_data.py reads (plus a few it skips)."""
+    from plant_data import STATE_ABBREV
+
+    rng = np.random.default_rng(seed)
+    codes = np.arange(1, n_plants + 1)
+    states = np.array(sorted(set(STATE_ABBREV.values())))
+    plant = pd.DataFrame({
+        'Utility ID': rng.integers(1, 5000, n_plants),
+        'Utility Name': 'Utility',
+        'Plant Code': codes,
+        'Plant Name': [f"Plant {c}" for c in codes],
+        'Street Address': 'Main St',
+        'City': [f"City {c % 3000}" for c in codes],
+        'State': rng.choice(states, n_plants),
+        'Zip': rng.integers(1000, 99999, n_plants),
+        'County': 'County',
+        'Latitude': rng.uniform(25.0, 49.0, n_plants).round(4),
+        'Longitude': rng.uniform(-124.0, -67.0, n_plants).round(4),
+    })
+    n_gen = int(2.3 * n_plants)
+    fuels, share = zip(*FUEL_MIX.items())
+    generator = pd.DataFrame({
+        'Utility ID': 1,
+        'Plant Code': rng.choice(codes, n_gen),
+        'Generator ID': np.arange(n_gen).astype(str),
+        'Status': 'OP',
+        'Nameplate Capacity (MW)': rng.lognormal(3.0, 1.5, n_gen).round(1),
+        'Energy Source 1': rng.choice(np.array(fuels), n_gen, p=np.array(share) / sum(share)),
+    })
+    sheets = {'2___Plant': plant, '3_1_Generator': generator}
+    for prefix, fuel in [('3_2_Wind', 'WND'), ('3_3_Solar', 'SUN')]:
+        rows = generator[generator['Energy Source 1'] == fuel]
+        sheets[prefix] = rows[['Utility ID', 'Plant Code', 'Generator ID', 'Status', 'Nameplate Capacity (MW)']]
+    return sheets
+
+
+def _write_sheet(df, path):
+    # EIA layout: a title row, then the header (read with header=1)
+    with pd.ExcelWriter(path) as xw:
+        pd.DataFrame([['Synthetic EIA-860 benchmark data']]).to_excel(xw, index=False, header=False)
+        df.to_excel(xw, index=False, startrow=1)
+
+
+def generate(scale, work_dir=WORK_DIR, seed=0):
+    """Write (or reuse) the synthetic inputs for `scale`; returns the directory."""
+    path = os.path.join(work_dir, f"{scale:g}x")
+    meta_path = os.path.join(path, 'meta.json')
+    meta = {'version': DATA_VERSION, 'scale': scale, 'seed': seed}
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return path
+    shutil.rmtree(path, ignore_errors=True)
+    eia_dir = os.path.join(path, 'eia8602024')
+    os.makedirs(eia_dir)
+
+    zip_index = synthetic_zip_index(seed)
+    np.save(os.path.join(path, 'zip_index.npy'), zip_index)
+    synthetic_data_centers(round(BASE_DATA_CENTERS * scale), zip_index, seed).to_csv(
+        os.path.join(path, 'datacenters_with_coords.csv'), index=False)
+
+    sheets = synthetic_eia_sheets(round(BASE_PLANTS * scale), seed)
+    xlsx = max(len(df) for df in sheets.values()) <= XLSX_MAX_ROWS
+    for prefix, df in sheets.items():
+        # Parquet copies feed the stages that don't measure the workbook read
+        df.to_parquet(os.path.join(path, f"{prefix}.parquet"), index=False)
+        if xlsx:
+            _write_sheet(df, os.path.join(eia_dir, f"{prefix}_Y2024.xlsx"))
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return path
+
+
+# ---------------------------------------------------------------- stages
+# Each returns (setup, run): setup() does the untimed preparation and returns
+# the argument for run(arg), which is what gets timed; run returns a row count.
+
+def _has_xlsx(data_dir):
+    return os.path.exists(os.path.join(data_dir, 'eia8602024', '2___Plant_Y2024.xlsx'))
+
+
+def _stage_ingest(data_dir, cold):
+    from plant_data import load_plant_locations
+
+    eia_dir = os.path.join(data_dir, 'eia8602024')
+
+    def setup():
+        if cold:
+            shutil.rmtree(os.path.join(eia_dir, '.cache'), ignore_errors=True)
+        else:
+            load_plant_locations(eia_dir, verbose=False)
+        return eia_dir
+
+    return setup, lambda d: len(load_plant_locations(d, verbose=False))
+
+
+def _stage_geocode(data_dir):
+    from address_dedup import dedupe_addresses
+    from geocode_engine import SimulatedGeocoder, geocode_addresses
+    from zip_index import extract_zips, lookup_zips
+
+    def setup():
+        df = pd.read_csv(os.path.join(data_dir, 'datacenters_with_coords.csv'), usecols=['Address'])
+        return df, np.load(os.path.join(data_dir, 'zip_index.npy'), mmap_mode='r')
+
+    def run(arg):
+        df, index = arg
+        # Phase 1: offline ZIP index
+        lat, _ = lookup_zips(extract_zips(df['Address']), index)
+        missing = df['Address'][np.isnan(lat)].dropna().unique()
+        # Phase 2: grouped, concurrent lookups against the local stand-in
+        groups, _ = dedupe_addresses(missing)
+        geocoder = SimulatedGeocoder(latency=(0.0005, 0.002))
+        geocode_addresses(list(groups), geocoder, max_in_flight=16, rate=1e6, timeout=1.0)
+        return len(df)
+
+    return setup, run
+
+
+def _stage_aggregate(data_dir):
+    from plant_data import FUEL_CATEGORIES, load_plant_capacity
+
+    def setup():
+        gen = pd.read_parquet(os.path.join(data_dir, '3_1_Generator.parquet'))
+        gen['Energy Source 1'] = gen['Energy Source 1'].astype('category')
+        return gen
+
+    def run(gen):
+        load_plant_capacity(fuel_categories=FUEL_CATEGORIES, generators=gen)
+        return len(gen)
+
+    return setup, run
+
+
+def _plant_locations(data_dir):
+    """load_plant_locations() equivalent from the Parquet copies (any scale)."""
+    from plant_data import CAPACITY_COLUMNS, MAP_FUEL_CATEGORIES, load_plant_capacity
+
+    def read(prefix):
+        return pd.read_parquet(os.path.join(data_dir, f"{prefix}.parquet"))
+
+    plants = read('2___Plant')[['Plant Code', 'Plant Name', 'State', 'City', 'Latitude', 'Longitude']]
+    capacity = [load_plant_capacity(fuel_categories=MAP_FUEL_CATEGORIES, generators=read('3_1_Generator'))]
+    for prefix, col in [('3_2_Wind', 'wind_capacity_mw'), ('3_3_Solar', 'solar_capacity_mw')]:
+        df = read(prefix)
+        capacity.append(df.groupby('Plant Code')['Nameplate Capacity (MW)'].sum().rename(col).reset_index())
+    for cap in capacity:
+        plants = plants.merge(cap, on='Plant Code', how='left')
+    plants = plants.reindex(columns=[*plants.columns[:6], *CAPACITY_COLUMNS.values()])
+    plants[list(CAPACITY_COLUMNS.values())] = plants[list(CAPACITY_COLUMNS.values())].fillna(0)
+    return plants
+
+
+def _stage_payload(data_dir):
+    from map_payload import build_payload, encode_dc_layer, encode_plant_layer
+    from plant_data import CAPACITY_COLUMNS, category_masks
+
+    def setup():
+        dcs = pd.read_csv(os.path.join(data_dir, 'datacenters_with_coords.csv'))
+        return _plant_locations(data_dir), dcs
+
+    def run(arg):
+        plants, dcs = arg
+        masks = category_masks(plants)
+        layers = {cat: encode_plant_layer(plants[masks[cat]], col) for cat, col in CAPACITY_COLUMNS.items()}
+        layers['dc'] = encode_dc_layer(dcs)
+        payload, _ = build_payload(layers, compress=True)
+        return len(plants) + len(dcs)
+
+    return setup, run
+
+
+def _stage_map_html(data_dir):
+    from map_visualization_interactive import build_map
+
+    def setup():
+        from plant_data import load_plant_locations
+        plants = load_plant_locations(os.path.join(data_dir, 'eia8602024'), verbose=False)  # warms the cache
+        dcs = pd.read_csv(os.path.join(data_dir, 'datacenters_with_coords.csv'), usecols=['Address'])
+        return len(plants) + len(dcs)
+
+    def run(rows):
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            build_map(os.path.join(data_dir, 'datacenters_with_coords.csv'), os.path.join(data_dir, 'eia8602024'),
+                      output_file=os.path.join(data_dir, 'data_centers_map_interactive.html'), site_pue_path=None)
+        return rows
+
+    return setup, run
+
+
+def _stage_sweep(data_dir, scale):
+    from simulation import iter_sweep
+
+    n = max(int(SWEEP_SCENARIOS * scale), 1)
+    side = max(int(round(n ** 0.25)), 2)
+    axes = {'dt_air': np.linspace(8, 25, side), 'dt_water': np.linspace(5, 20, side),
+            'dp_air': np.linspace(400, 800, side), 'dp_water': np.linspace(250, 500, side)}
+
+    def run(axes):
+        rows, best = 0, np.inf
+        for chunk in iter_sweep(axes):
+            rows += len(chunk)
+            best = min(best, float(chunk['pue'].min()))
+        return rows
+
+    return lambda: axes, run
+
+
+def stage_functions(stage, data_dir, scale):
+    if stage == 'ingest_cold':
+        return _stage_ingest(data_dir, cold=True)
+    if stage == 'ingest_warm':
+        return _stage_ingest(data_dir, cold=False)
+    if stage == 'geocode':
+        return _stage_geocode(data_dir)
+    if stage == 'aggregate':
+        return _stage_aggregate(data_dir)
+    if stage == 'payload':
+        return _stage_payload(data_dir)
+    if stage == 'map_html':
+        return _stage_map_html(data_dir)
+    if stage == 'sweep':
+        return _stage_sweep(data_dir, scale)
+    raise ValueError(f"unknown stage {stage!r}; choose from {STAGES}")
+
+
+def measure_stage(stage, data_dir, scale, repeat=3, trace=True):
+    """Run one stage in this process: best-of-`repeat` time, then one tracemalloc pass."""
+    from instrumentation import peak_rss_mb
+
+    setup, run = stage_functions(stage, data_dir, scale)
+    baseline_rss = peak_rss_mb()
+    times, rows = [], 0
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        rows = run(arg)
+        times.append(time.perf_counter() - start)
+    peak_alloc = None
+    if trace:
+        arg = setup()
+        tracemalloc.start()
+        try:
+            run(arg)
+            peak_alloc = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return {
+        'rows': int(rows),
+        'seconds': min(times),
+        'seconds_all': [round(t, 6) for t in times],
+        'peak_alloc_mb': peak_alloc,
+        'peak_rss_mb': peak_rss_mb(),
+        'baseline_rss_mb': baseline_rss,
+    }
+
+
+# ---------------------------------------------------------------- history
+
+def git_commit():
+    """(short commit, dirty) of the working tree, or (None, None) outside git."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=HERE,
+                                check=True, capture_output=True, text=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def load_history(path=HISTORY_FILE):
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with open(path) as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare(history, base=None, head=None, threshold=1.2):
+    """
+    Best seconds per (stage, scale) of run `head` (default: latest) vs `base`
+    (default: the latest run at a different commit); ratio > threshold is flagged.
+    """
+    ok = history[history['status'] == 'ok']
+    runs = ok.drop_duplicates('run_id', keep='last')[['run_id', 'commit']]
+    head = head or runs['run_id'].iloc[-1]
+    head_commit = runs.loc[runs['run_id'] == head, 'commit'].iloc[0]
+    if base is None:
+        older = runs[runs['commit'] != head_commit]
+        if older.empty:
+            raise ValueError("no run at another commit to compare against")
+        base = older['run_id'].iloc[-1]
+    elif base not in set(runs['run_id']):
+        base = runs.loc[runs['commit'] == base, 'run_id'].iloc[-1]   # a commit was given
+
+    def best(run_id):
+        return ok[ok['run_id'] == run_id].groupby(['stage', 'scale'])['seconds'].min()
+
+    table = pd.concat({'base_s': best(base), 'head_s': best(head)}, axis=1).dropna()
+    table['ratio'] = table['head_s'] / table['base_s']
+    table['flag'] = np.where(table['ratio'] > threshold, 'SLOWER', np.where(table['ratio'] < 1 / threshold, 'faster', ''))
+    return table.reset_index(), base, head
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time and memory-profile each pipeline stage on synthetic data.")
+    parser.add_argument('--scales', nargs='+', type=float, default=[1, 10], help="multiples of today's data")
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-trace', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--work-dir', default=WORK_DIR)
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--no-history', action='store_true', help="print results without appending them")
+    parser.add_argument('--compare', nargs='*', metavar='RUN_OR_COMMIT',
+                        help="compare runs in the history: [BASE [HEAD]] (default: latest vs previous commit)")
+    parser.add_argument('--child', nargs=3, metavar=('STAGE', 'DATA_DIR', 'SCALE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        stage, data_dir, scale = args.child
+        print(json.dumps(measure_stage(stage, data_dir, float(scale), args.repeat, not args.no_trace)))
+        sys.exit(0)
+
+    if args.compare is not None:
+        table, base, head = compare(load_history(args.history), *args.compare[:2])
+        print(f"base run {base}  ->  head run {head}")
+        print(table.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+        sys.exit(0)
+
+    commit, dirty = git_commit()
+    run_id = time.strftime('%Y%m%dT%H%M%S')
+    env = {'commit': commit, 'dirty': dirty, 'python': platform.python_version(),
+           'numpy': np.__version__, 'pandas': pd.__version__, 'machine': platform.machine(),
+           'cpus': os.cpu_count()}
+    print(f"Benchmark run {run_id} at {commit}{' (dirty)' if dirty else ''}")
+    print(f"{'scale':>6} {'stage':<12}{'rows':>12}{'best s':>10}{'alloc MB':>10}{'RSS MB':>9}")
+
+    records = []
+    for scale in args.scales:
+        start = time.perf_counter()
+        data_dir = generate(scale, args.work_dir)
+        gen_s = time.perf_counter() - start
+        if gen_s > 1:
+            print(f"{scale:>5g}x  (generated inputs in {gen_s:.1f}s)")
+        for stage in args.stages:
+            record = {'run_id': run_id, 'timestamp': time.time(), **env, 'scale': scale, 'stage': stage}
+            if stage in XLSX_STAGES and not _has_xlsx(data_dir):
+                record.update(status='skipped', reason='sheet exceeds the xlsx row limit')
+                print(f"{scale:>5g}x {stage:<12}{'skipped (xlsx row limit)':>41}")
+            else:
+                cmd = [sys.executable, os.path.abspath(__file__), '--child', stage, data_dir, str(scale),
+                       '--repeat', str(args.repeat)] + (['--no-trace'] if args.no_trace else [])
+                proc = subprocess.run(cmd, capture_output=True, text=True, cwd=HERE)
+                if proc.returncode != 0:
+                    record.update(status='error', reason=proc.stderr.strip().splitlines()[-1] if proc.stderr else '')
+                    print(f"{scale:>5g}x {stage:<12} ERROR {record['reason']}")
+                else:
+                    result = json.loads(proc.stdout.strip().splitlines()[-1])
+                    record.update(status='ok', **result)
+                    alloc = '-' if result['peak_alloc_mb'] is None else f"{result['peak_alloc_mb']:.1f}"
+                    print(f"{scale:>5g}x {stage:<12}{result['rows']:>12,}{result['seconds']:>10.3f}"
+                          f"{alloc:>10}{result['peak_rss_mb']:>9.0f}")
+            records.append(record)
+
+    if not args.no_history:
+        with open(args.history, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        print(f"Appended {len(records)} results to {args.history}")
@@ -0,0 +1,327 @@
+"""
+Incremental, content-addressed build of the interactive map.
+
+The map build is a small graph:
+
+    datacenters_with_coords.csv -> data_centers -> dc_frame (+ site_pue.csv) -> layer_dc --+
+    EIA-860 xlsx (4 sheets)     -> plant_locations -> layer_nuc/gas/gen/wind/solar --------+-> payload --+
+                                   data_centers -> state_summary -> choropleth -------------------------+-> page -> HTML
+
+Every node's output is cached in `.build/` (DataFrames as Parquet, everything
+else as JSON) under a key made of
+
+  - the source of the node's function (and of the code it names in `code=`),
+  - its parameters,
+  - the content hashes of its inputs (raw files are sha256'ed; the hash is
+    memoized on size + mtime, like eia_cache.py).
+
+A node whose key is unchanged is not run and its output is not even loaded
+unless a stale node downstream needs it. When a node re-runs but produces the
+same output (same content hash), its dependents stay valid ("early cutoff"):
+adding a blank line to the CSV reloads data_centers and stops there. Editing
+the filter UI in page_html() re-runs only `page`, which takes about a second
+instead of a full ingest + encode.
+
+    python build_graph.py                        # build / refresh data_centers_map_interactive.html
+    python build_graph.py --eia-dir eia8602023 --out map_2023.html
+    python build_graph.py --force                # ignore the cache
+"""
+import hashlib
+import inspect
+import json
+import os
+import time
+
+from eia_cache import _file_sha256
+from instrumentation import count, stage
+
+BUILD_DIR = '.build'
+BUILD_VERSION = 1
+MANIFEST = 'manifest.json'
+
+# EIA-860 sheets read by plant_data.load_plant_locations()
+EIA_SHEETS = ['2___Plant', '3_1_Generator', '3_2_Wind', '3_3_Solar']
+
+
+def _code_digest(items):
+    h = hashlib.sha256()
+    for item in items:
+        if inspect.ismodule(item) or callable(item):
+            h.update(inspect.getsource(item).encode('utf-8'))
+        else:
+            h.update(repr(item).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _value_digest(value):
+    """Content hash of a node output (also decides how it is stored)."""
+    import pandas as pd
+
+    h = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        h.update(json.dumps([[str(c), str(t)] for c, t in value.dtypes.items()]).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    else:
+        h.update(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+    return h.hexdigest()
+
+
+class _Node:
+    __slots__ = ('name', 'fn', 'deps', 'params', 'watch', 'code', 'path')
+
+    def __init__(self, name, fn=None, deps=(), params=None, watch=(), code=(), path=None):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.params = dict(params or {})
+        self.watch = list(watch)
+        self.code = list(code)
+        self.path = path
+
+
+class BuildGraph:
+    """
+    Nodes are declared in dependency order with source() and node(); run()
+    brings them all up to date. Values are loaded from the cache on demand
+    with value(name).
+    """
+
+    def __init__(self, build_dir=BUILD_DIR, verbose=True):
+        self.build_dir = build_dir
+        self.verbose = verbose
+        self.nodes = {}
+        self.hashes = {}
+        self.values = {}
+        self.status = {}
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        path = os.path.join(self.build_dir, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') == BUILD_VERSION:
+                return manifest
+        return {'version': BUILD_VERSION, 'sources': {}, 'nodes': {}}
+
+    def _save_manifest(self):
+        os.makedirs(self.build_dir, exist_ok=True)
+        path = os.path.join(self.build_dir, MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def source(self, name, path):
+        """A raw input file; its value is the path, its hash the file content."""
+        self.nodes[name] = _Node(name, path=path)
+        return name
+
+    def node(self, name, fn, deps=(), params=None, watch=(), code=()):
+        """
+        fn(*values of deps, **params). `watch` adds inputs to the key without
+        passing them; `code` lists further functions / modules / constants
+        whose source is part of the key (fn's own source always is).
+        """
+        for dep in [*deps, *watch]:
+            if dep not in self.nodes:
+                raise ValueError(f"{name}: unknown input {dep!r} (declare inputs first)")
+        self.nodes[name] = _Node(name, fn, deps, params, watch, [fn, *code])
+        return name
+
+    def _source_digest(self, node):
+        path = os.path.abspath(node.path)
+        st = os.stat(path)
+        memo = self.manifest['sources'].get(path)
+        if memo and memo['size'] == st.st_size and memo['mtime_ns'] == st.st_mtime_ns:
+            return memo['sha256']
+        digest = _file_sha256(path)
+        self.manifest['sources'][path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def _key(self, node):
+        h = hashlib.sha256()
+        h.update(_code_digest(node.code).encode('ascii'))
+        h.update(json.dumps(node.params, sort_keys=True, default=str).encode('utf-8'))
+        for dep in [*node.deps, '|', *node.watch]:
+            h.update(dep.encode('utf-8') + b'=' + self.hashes.get(dep, '').encode('ascii'))
+        return h.hexdigest()
+
+    def _store(self, name, value):
+        import pandas as pd
+
+        os.makedirs(self.build_dir, exist_ok=True)
+        if isinstance(value, pd.DataFrame):
+            file = f"{name}.parquet"
+            tmp = os.path.join(self.build_dir, file + '.tmp')
+            value.to_parquet(tmp)
+        else:
+            file = f"{name}.json"
+            tmp = os.path.join(self.build_dir, file + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(value, f, separators=(',', ':'))
+        os.replace(tmp, os.path.join(self.build_dir, file))
+        return file
+
+    def value(self, name):
+        """Output of `name`, from memory or the cache (run() first)."""
+        import pandas as pd
+
+        if name not in self.values:
+            node = self.nodes[name]
+            if node.fn is None:
+                self.values[name] = node.path
+            else:
+                path = os.path.join(self.build_dir, self.manifest['nodes'][name]['file'])
+                if path.endswith('.parquet'):
+                    self.values[name] = pd.read_parquet(path)
+                else:
+                    with open(path, encoding='utf-8') as f:
+                        self.values[name] = json.load(f)
+        return self.values[name]
+
+    def _cached(self, node, key):
+        entry = self.manifest['nodes'].get(node.name)
+        return (entry is not None and entry['key'] == key
+                and os.path.exists(os.path.join(self.build_dir, entry['file'])))
+
+    def run(self, force=False):
+        """Bring every node up to date; returns {name: 'run' | 'cached' | 'source'}."""
+        try:
+            for node in self.nodes.values():
+                if node.fn is None:
+                    self.hashes[node.name] = self._source_digest(node)
+                    self.status[node.name] = 'source'
+                    continue
+                key = self._key(node)
+                if not force and self._cached(node, key):
+                    self.hashes[node.name] = self.manifest['nodes'][node.name]['hash']
+                    self.status[node.name] = 'cached'
+                    count('build_nodes_cached')
+                    continue
+
+                start = time.perf_counter()
+                with stage(f'build/{node.name}'):
+                    value = node.fn(*[self.value(d) for d in node.deps], **node.params)
+                digest = _value_digest(value)
+                previous = self.manifest['nodes'].get(node.name, {}).get('hash')
+                file = self._store(node.name, value)
+                seconds = time.perf_counter() - start
+                self.manifest['nodes'][node.name] = {'key': key, 'hash': digest, 'file': file, 'seconds': seconds}
+                self.values[node.name] = value
+                self.hashes[node.name] = digest
+                self.status[node.name] = 'run'
+                count('build_nodes_run')
+                if self.verbose:
+                    note = '' if digest != previous else '  (output unchanged)'
+                    print(f"  ran    {node.name:<16} {seconds:7.2f}s{note}")
+        finally:
+            self._save_manifest()
+        return dict(self.status)
+
+
+def _payload(*layers, names, compress):
+    from map_payload import build_payload
+    return list(build_payload(dict(zip(names, layers)), compress=compress))
+
+
+def _page(base_html, payload):
+    from map_visualization_interactive import page_html
+    return page_html(base_html, *payload)
+
+
+def map_graph(data_centers_path, eia_dir, site_pue_path=None, build_dir=BUILD_DIR, verbose=True):
+    """The map build as a BuildGraph; the finished page is node 'page'."""
+    import eia_cache
+    import map_payload
+    import plant_data
+    import region_index
+    import map_visualization_interactive as mvi
+
+    g = BuildGraph(build_dir, verbose=verbose)
+    dc_csv = g.source('data_centers_csv', data_centers_path)
+    sheets = [g.source(f'eia:{prefix}', plant_data._eia_file(eia_dir, prefix)) for prefix in EIA_SHEETS]
+    loaders = [plant_data, eia_cache]
+
+    # State_Code comes from the state polygons when the boundary file exists (region_index.py)
+    boundaries = []
+    if os.path.exists(region_index.STATE_BOUNDARIES_FILE):
+        boundaries.append(g.source('state_boundaries', region_index.STATE_BOUNDARIES_FILE))
+    g.node('data_centers', plant_data.load_data_centers, deps=[dc_csv], watch=boundaries,
+           code=[*loaders, region_index])
+    g.node('plant_locations', plant_data.load_plant_locations, watch=sheets,
+           params={'eia_dir': eia_dir, 'verbose': False}, code=loaders)
+
+    dc_inputs = ['data_centers']
+    if site_pue_path and os.path.exists(site_pue_path):
+        dc_inputs.append(g.source('site_pue_csv', site_pue_path))
+    g.node('dc_frame', mvi.dc_frame, deps=dc_inputs)
+
+    layers = {}
+    for key in mvi.PLANT_LAYERS:
+        layers[key] = g.node(f'layer_{key}', mvi.plant_layer, deps=['plant_locations'], params={'layer': key},
+                             code=[mvi.PLANT_LAYERS, plant_data.CAPACITY_COLUMNS, map_payload])
+    layers['dc'] = g.node('layer_dc', map_payload.encode_dc_layer, deps=['dc_frame'],
+                          params={'pue_col': 'annual_pue'}, code=[map_payload])
+    g.node('payload', _payload, deps=list(layers.values()),
+           params={'names': list(layers), 'compress': mvi.EMBED_GZIP}, code=[map_payload.build_payload])
+
+    g.node('state_summary', mvi.state_summary, deps=['data_centers'])
+    g.node('choropleth', mvi.choropleth_html, deps=['state_summary'],
+           params={'pue_colorbar': len(dc_inputs) > 1})
+    g.node('page', _page, deps=['choropleth', 'payload'], code=[mvi.page_html, map_payload.DECODER_JS])
+    return g
+
+
+def build(data_centers_path=None, eia_dir=None, output_file=None, site_pue_path=None,
+          build_dir=BUILD_DIR, force=False, verbose=True):
+    """Bring `output_file` up to date; returns the BuildGraph (its .status says what ran)."""
+    from plant_data import DATA_CENTERS_FILE, EIA_DIR
+    from map_visualization_interactive import OUTPUT_FILE, SITE_PUE_FILE
+
+    start = time.perf_counter()
+    g = map_graph(data_centers_path or DATA_CENTERS_FILE, eia_dir or EIA_DIR,
+                  SITE_PUE_FILE if site_pue_path is None else site_pue_path, build_dir, verbose)
+    status = g.run(force=force)
+    output_file = output_file or OUTPUT_FILE
+
+    # The page node's hash is over its JSON encoding; compare the file itself
+    written = False
+    html = None
+    if os.path.exists(output_file):
+        with open(output_file, encoding='utf-8') as f:
+            current = f.read()
+        if status['page'] == 'run' or _value_digest(current) != g.hashes['page']:
+            html = g.value('page')
+            written = html != current
+    else:
+        html = g.value('page')
+        written = True
+    if written:
+        with open(output_file + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(output_file + '.tmp', output_file)
+
+    if verbose:
+        ran = [n for n, s in status.items() if s == 'run']
+        steps = sum(s != 'source' for s in status.values())
+        print(f"{len(ran)} of {steps} steps re-run in {time.perf_counter() - start:.2f}s; "
+              f"{output_file} {'written' if written else 'up to date'}")
+    return g
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Incremental map build: re-runs only the steps whose inputs changed.")
+    parser.add_argument('--data-centers', default=None, help="geocoded data-center CSV")
+    parser.add_argument('--eia-dir', default=None, help="EIA-860 year directory")
+    parser.add_argument('--site-pue', default=None, help="site_pue.py output used to color data centers")
+    parser.add_argument('--out', default=None)
+    parser.add_argument('--build-dir', default=BUILD_DIR, help="cache of intermediate outputs")
+    parser.add_argument('--force', action='store_true', help="re-run every step")
+    args = parser.parse_args(argv)
+    build(args.data_centers, args.eia_dir, args.out, args.site_pue, args.build_dir, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Precomputed capacity cube: state x fuel category x capacity bucket x data-center density.
+
+Each EIA-860 plant contributes one cell per fuel category it has capacity in
+(the map's categories, plant_data.CAPACITY_COLUMNS):
+
+  state     the plant's state (EIA-860)
+  fuel      nuclear / gas / other / wind / solar
+  bucket    the plant's MW in that category, split at the map's filter presets
+            (10 / 50 / 100 / 200 / 360 / 500 MW)
+  density   data centers within CLUSTER_KM of the plant (siting_screen.py's
+            cluster feature), binned 0 / 1-4 / 5-19 / 20-49 / 50+
+
+with `plants` and `capacity_mw` per cell. The cube is a dense NumPy array
+(~20k cells), plus a reverse cumulative sum over the bucket axis, so
+"capacity at plants >= 50 MW" is a single lookup and every query is a slice
+and a sum: a few microseconds. Data centers per state (from the geocoded
+frame) are kept alongside for ratio questions.
+
+    cube = CapacityCube.build(plant_locations, data_centers)
+    cube.query(state='VA', fuel='solar', min_mw=50)        # {'plants': ..., 'capacity_mw': ...}
+    cube.rollup('state', fuel='gas')                        # MW of gas per state
+    cube.rollup('state', fuel='nuclear').eval('data_centers / (capacity_mw / 1000)')
+
+    python capacity_cube.py                                 # build capacity_cube.parquet
+    python capacity_cube.py --query state=VA fuel=solar min_mw=50
+    python capacity_cube.py --rollup state --query fuel=nuclear
+"""
+import os
+
+import numpy as np
+
+from plant_data import CAPACITY_COLUMNS
+from plant_proximity import km_to_chord, to_unit_xyz
+from siting_screen import CLUSTER_KM
+
+CUBE_FILE = 'capacity_cube.parquet'
+
+# Lower edges of the capacity buckets: the map's "Quick Presets" (MW)
+CAPACITY_EDGES = [10, 50, 100, 200, 360, 500]
+BUCKET_LABELS = ['<10', '10-50', '50-100', '100-200', '200-360', '360-500', '500+']
+# Lower edges of the density bins: data centers within CLUSTER_KM of the plant
+DENSITY_EDGES = [1, 5, 20, 50]
+DENSITY_LABELS = ['0', '1-4', '5-19', '20-49', '50+']
+
+DIMENSIONS = ['state', 'fuel', 'bucket', 'density']
+MEASURES = ['plants', 'capacity_mw']
+
+
+def plant_capacity_long(plant_locations, categories=CAPACITY_COLUMNS):
+    """One row per (plant, category) with capacity > 0: row (into plant_locations), state, fuel, mw."""
+    import pandas as pd
+
+    frames = []
+    for fuel, col in categories.items():
+        mw = plant_locations[col].to_numpy(dtype=np.float64)
+        rows = np.flatnonzero(mw > 0)
+        frames.append(pd.DataFrame({'row': rows, 'fuel': fuel, 'mw': mw[rows]}))
+    long = pd.concat(frames, ignore_index=True)
+    long['state'] = plant_locations['State'].astype(object).to_numpy()[long['row'].to_numpy()]
+    return long
+
+
+def data_centers_near(plant_locations, data_centers, radius_km=CLUSTER_KM):
+    """Number of data centers within `radius_km` of each plant."""
+    from scipy.spatial import cKDTree
+
+    dcs = data_centers.dropna(subset=['Latitude', 'Longitude'])
+    if dcs.empty:
+        return np.zeros(len(plant_locations), dtype=np.int64)
+    tree = cKDTree(to_unit_xyz(dcs['Latitude'], dcs['Longitude']))
+    plant_xyz = to_unit_xyz(plant_locations['Latitude'], plant_locations['Longitude'])
+    return tree.query_ball_point(plant_xyz, r=float(km_to_chord(radius_km)), return_length=True)
+
+
+class CapacityCube:
+    """Dense (state, fuel, bucket, density, measure) array with label lookups."""
+
+    def __init__(self, values, labels, state_data_centers):
+        self.values = values
+        self.labels = {dim: list(labels[dim]) for dim in DIMENSIONS}
+        self.positions = {dim: {label: i for i, label in enumerate(self.labels[dim])} for dim in DIMENSIONS}
+        # at_least[:, :, b] = sum over buckets >= b, for min_mw queries
+        self.at_least = np.flip(np.cumsum(np.flip(values, axis=2), axis=2), axis=2)
+        self.state_data_centers = np.asarray(state_data_centers, dtype=np.int64)
+
+    @classmethod
+    def build(cls, plant_locations, data_centers, categories=CAPACITY_COLUMNS, radius_km=CLUSTER_KM):
+        """Materialize the cube from the plant and data-center frames (plant_data.py)."""
+        import pandas as pd
+
+        long = plant_capacity_long(plant_locations, categories)
+        long = long[long['state'].notna()]
+        density = np.searchsorted(DENSITY_EDGES, data_centers_near(plant_locations, data_centers, radius_km),
+                                  side='right')
+        dc_states = data_centers['State_Code'].astype(object)
+        states = sorted(set(long['state'].astype(str)) | set(dc_states.dropna().astype(str)))
+
+        labels = {'state': states, 'fuel': list(categories), 'bucket': BUCKET_LABELS, 'density': DENSITY_LABELS}
+        shape = tuple(len(labels[dim]) for dim in DIMENSIONS)
+        flat = np.ravel_multi_index((
+            pd.Categorical(long['state'].astype(str), categories=states).codes,
+            pd.Categorical(long['fuel'], categories=labels['fuel']).codes,
+            np.searchsorted(CAPACITY_EDGES, long['mw'].to_numpy(), side='right'),
+            density[long['row'].to_numpy()],
+        ), shape)
+        size = int(np.prod(shape))
+        values = np.stack([
+            np.bincount(flat, minlength=size),
+            np.bincount(flat, weights=long['mw'].to_numpy(), minlength=size),
+        ], axis=-1).astype(np.float64).reshape(*shape, len(MEASURES))
+
+        state_dcs = dc_states.value_counts().reindex(states, fill_value=0).to_numpy()
+        return cls(values, labels, state_dcs)
+
+    def _select(self, dim, value):
+        if value is None:
+            return np.arange(len(self.labels[dim]))
+        values = [value] if isinstance(value, str) else list(value)
+        try:
+            return np.array([self.positions[dim][v] for v in values], dtype=np.intp)
+        except KeyError as e:
+            raise KeyError(f"unknown {dim} {e.args[0]!r}; one of {self.labels[dim]}") from None
+
+    def _min_bucket(self, min_mw):
+        if min_mw in (None, 0):
+            return 0
+        if min_mw not in CAPACITY_EDGES:
+            raise ValueError(f"min_mw must be one of the bucket edges {CAPACITY_EDGES}, got {min_mw}")
+        return CAPACITY_EDGES.index(min_mw) + 1
+
+    def _slice(self, state, fuel, bucket, density, min_mw):
+        if bucket is not None and min_mw is not None:
+            raise ValueError("give either bucket or min_mw, not both")
+        if min_mw is not None:
+            # One bucket position of the cumulative array covers every bucket >= min_mw
+            sub = self.at_least[:, :, [self._min_bucket(min_mw)]]
+            buckets = np.arange(1)
+        else:
+            sub = self.values
+            buckets = self._select('bucket', bucket)
+        return sub[np.ix_(self._select('state', state), self._select('fuel', fuel), buckets,
+                          self._select('density', density))]
+
+    def query(self, state=None, fuel=None, bucket=None, density=None, min_mw=None):
+        """
+        Totals over the selected cells. Each dimension takes None (all), a label
+        or a list of labels; `min_mw` (a bucket edge) selects plants >= min_mw.
+        """
+        totals = self._slice(state, fuel, bucket, density, min_mw).sum(axis=(0, 1, 2, 3))
+        return {'plants': int(totals[0]), 'capacity_mw': float(totals[1])}
+
+    def rollup(self, by=('state',), state=None, fuel=None, bucket=None, density=None, min_mw=None):
+        """
+        Measures grouped by the dimensions in `by` (the others summed), over the
+        same filters as query(). Grouping by state adds the state's data centers.
+        """
+        import pandas as pd
+
+        by = [by] if isinstance(by, str) else list(by)
+        if min_mw is not None and 'bucket' in by:
+            raise ValueError("can't group by bucket with min_mw")
+        sub = self._slice(state, fuel, bucket, density, min_mw)
+        keep = [DIMENSIONS.index(dim) for dim in by]
+        summed = sub.sum(axis=tuple(i for i in range(4) if i not in keep))
+        # Remaining axes are in DIMENSIONS order; put them in `by` order
+        summed = summed.transpose([sorted(keep).index(i) for i in keep] + [len(keep)])
+        selected = {'state': state, 'fuel': fuel, 'bucket': bucket, 'density': density}
+        index = pd.MultiIndex.from_product(
+            [[self.labels[dim][i] for i in self._select(dim, selected[dim])] for dim in by], names=by)
+        out = pd.DataFrame(summed.reshape(-1, len(MEASURES)), index=index, columns=MEASURES)
+        out['plants'] = out['plants'].astype(np.int64)
+        if 'state' in by:
+            state_dcs = pd.Series(self.state_data_centers, index=self.labels['state'])
+            out['data_centers'] = state_dcs.reindex(out.index.get_level_values('state')).to_numpy()
+        return out
+
+    def to_frame(self):
+        """Non-empty cells as a long table (categorical dimensions), e.g. for BI tools."""
+        import pandas as pd
+
+        cells = np.flatnonzero(self.values[..., 0].ravel())
+        coords = np.unravel_index(cells, self.values.shape[:-1])
+        frame = pd.DataFrame({
+            dim: pd.Categorical.from_codes(coords[i], categories=self.labels[dim])
+            for i, dim in enumerate(DIMENSIONS)
+        })
+        flat = self.values.reshape(-1, len(MEASURES))[cells]
+        frame['plants'] = flat[:, 0].astype(np.int64)
+        frame['capacity_mw'] = flat[:, 1]
+        return frame
+
+    def states_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame({'state': self.labels['state'], 'data_centers': self.state_data_centers})
+
+    def to_parquet(self, path=CUBE_FILE):
+        """Write the cell table to `path` and data centers per state to `<stem>_states.parquet`."""
+        self.to_frame().to_parquet(path, index=False)
+        self.states_frame().to_parquet(_states_path(path), index=False)
+        return path
+
+    @classmethod
+    def from_parquet(cls, path=CUBE_FILE):
+        import pandas as pd
+
+        frame = pd.read_parquet(path)
+        states = pd.read_parquet(_states_path(path))
+        labels = {dim: list(frame[dim].cat.categories) for dim in DIMENSIONS}
+        labels['state'] = states['state'].tolist()
+        shape = tuple(len(labels[dim]) for dim in DIMENSIONS)
+        flat = np.ravel_multi_index(tuple(
+            pd.Categorical(frame[dim].astype(str), categories=labels[dim]).codes for dim in DIMENSIONS), shape)
+        values = np.zeros((int(np.prod(shape)), len(MEASURES)))
+        values[flat] = frame[MEASURES].to_numpy(dtype=np.float64)
+        return cls(values.reshape(*shape, len(MEASURES)), labels, states['data_centers'].to_numpy())
+
+
+def _states_path(path):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_states{ext}"
+
+
+def main(argv=None, prog=None):
+    import argparse
+    import time
+
+    from plant_data import DATA_CENTERS_FILE, EIA_DIR, load_data_centers, load_plant_locations
+
+    parser = argparse.ArgumentParser(prog=prog, description="Build and query the state x fuel x capacity x density cube.")
+    parser.add_argument('--eia-dir', default=EIA_DIR, help="EIA-860 year directory")
+    parser.add_argument('--data-centers', default=DATA_CENTERS_FILE, help="geocoded data-center CSV")
+    parser.add_argument('--cube', default=CUBE_FILE, help="Parquet file to write / query")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild even if the cube file exists")
+    parser.add_argument('--query', nargs='+', default=[], metavar='DIM=VALUE',
+                        help="filters: state=VA fuel=solar,wind min_mw=50 bucket=... density=...")
+    parser.add_argument('--rollup', nargs='+', choices=DIMENSIONS, help="group the filtered cells by these dimensions")
+    args = parser.parse_args(argv)
+
+    filters = {}
+    for item in args.query:
+        dim, _, value = item.partition('=')
+        if dim not in (*DIMENSIONS, 'min_mw') or not value:
+            parser.error(f"--query takes DIM=VALUE with DIM one of {DIMENSIONS + ['min_mw']}, got {item!r}")
+        if dim == 'min_mw':
+            try:
+                filters[dim] = float(value)
+            except ValueError:
+                parser.error(f"min_mw must be a number, got {value!r}")
+        else:
+            filters[dim] = value.split(',') if ',' in value else value
+
+    if args.rebuild or not os.path.exists(args.cube):
+        start = time.perf_counter()
+        cube = CapacityCube.build(load_plant_locations(args.eia_dir, verbose=False),
+                                  load_data_centers(args.data_centers))
+        cube.to_parquet(args.cube)
+        print(f"Built {' x '.join(str(n) for n in cube.values.shape[:-1])} cube "
+              f"in {time.perf_counter() - start:.2f}s -> {args.cube}")
+    else:
+        cube = CapacityCube.from_parquet(args.cube)
+
+    try:
+        if args.rollup:
+            print(cube.rollup(args.rollup, **filters).to_string())
+        elif filters:
+            start = time.perf_counter()
+            result = cube.query(**filters)
+            elapsed = time.perf_counter() - start
+            print(f"{result['plants']} plants, {result['capacity_mw']:,.1f} MW ({elapsed * 1e6:.0f} us)")
+        else:
+            print(cube.rollup('fuel').to_string())
+    except (KeyError, ValueError) as e:
+        # unknown label, min_mw off the bucket edges, bucket together with min_mw
+        parser.error(e.args[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Single entry point for the pipeline.
+
+    python cli.py geocode   [--input CSV] [--output CSV] [--cache-db DB] [--simulated] ...
+    python cli.py build-map [--data-centers CSV] [--eia-dir DIR] [--site-pue CSV] [--out HTML]
+    python cli.py build     [--data-centers CSV] [--eia-dir DIR] [--site-pue CSV] [--out HTML] [--force]
+    python cli.py simulate  [--sweep NAME=SPEC ...] [--compare] [--out FILE]
+    python cli.py screen    [--loads MW ...] [--eia-dir DIR] [--data-centers CSV] [--out CSV]
+    python cli.py cube      [--query DIM=VALUE ...] [--rollup DIM ...] [--rebuild] [--cube PARQUET]
+
+Each subcommand is the `main(argv)` of its module (geocode_comprehensive,
+map_visualization_interactive, build_graph, simulation, siting_screen,
+capacity_cube), imported only when that subcommand runs. Those modules load
+pandas and SciPy inside the functions that need them, so `python cli.py
+<command> --help` costs no more than importing NumPy. The modules themselves
+have no import-time side effects (the subcommand name reaches their parser as
+`prog`, not through `sys.argv`) and can be used directly from notebooks and
+services.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+# subcommand -> (module, one-line help)
+COMMANDS = {
+    'geocode': ('geocode_comprehensive', "geocode the data-center list (cache, ZIP index, ArcGIS)"),
+    'build-map': ('map_visualization_interactive', "build data_centers_map_interactive.html"),
+    'build': ('build_graph', "incremental map build: re-run only the steps whose inputs changed"),
+    'simulate': ('simulation', "cooling / PUE model report, sweeps and architecture comparison"),
+    'screen': ('siting_screen', "rank EIA-860 plants as co-location sites for a target IT load"),
+    'cube': ('capacity_cube', "build / query the state x fuel x capacity x density capacity cube"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Data-center siting and cooling pipeline.")
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        # The command's own parser handles its options (and --help)
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    # Usage lines read "cli.py <command> ..."
+    return module.main(rest, prog=f"{os.path.basename(sys.argv[0])} {args.command}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Design optimizer for the cooling models in simulation.py.
+
+Searches the design variables (by default dt_air, dt_water, dp_air, dp_water)
+for the minimum PUE / cooling MW at a given IT load, subject to:
+
+  - variable bounds (e.g. a minimum delta T is a lower bound),
+  - caps on model outputs (`max_outputs`, e.g. {'vol_flow_fw': 8.0} m3/s),
+  - a temperature budget: dt_air + dt_water <= budget. Air leaving the servers
+    (limited by `t_exhaust_max`) must stay above the FW return, which sits
+    above the source water, so the air-side and water-side delta T share
+    t_exhaust_max - t_source - approaches. Without it both objectives simply
+    run to the upper delta T bounds.
+
+Each local search is SLSQP in the unit cube from a Latin-hypercube start;
+starts run in parallel. When outputs are capped, model evaluations are
+memoized per search on the rounded design vector: SLSQP evaluates the
+objective and every output constraint at the same points, so this roughly
+halves the model calls. Without caps there is nothing to share (the
+finite-difference points are all distinct) and the cache is skipped.
+
+Fan and pump efficiencies are equipment ratings, not design choices: every
+objective improves monotonically with them, so a search would only pin them
+to their upper bound. They are taken from the model defaults or `fixed`.
+
+pareto_front() traces cooling power against a flow metric (the FW / source
+flow, a proxy for water use) by minimizing power under a sweep of flow caps
+(epsilon-constraint) and keeping the non-dominated designs.
+
+    python design_optimizer.py --it-load 360 --starts 16
+    python design_optimizer.py --pareto 25 --out pareto.csv
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.stats import qmc
+
+from simulation import ARCHITECTURES, model_params
+
+DEFAULT_BOUNDS = {
+    'dt_air': (8.0, 25.0),
+    'dt_water': (5.0, 20.0),
+    'dp_air': (400.0, 800.0),
+    'dp_water': (250.0, 500.0),
+}
+
+# Temperature budget defaults (degC / K)
+T_EXHAUST_MAX = 45.0
+T_SOURCE = 15.0
+COIL_APPROACH_K = 3.0
+HX_APPROACH_K = 2.0
+
+
+def temperature_budget(t_exhaust_max=T_EXHAUST_MAX, t_source=T_SOURCE,
+                       coil_approach_k=COIL_APPROACH_K, hx_approach_k=HX_APPROACH_K):
+    """Largest dt_air + dt_water the server exhaust limit leaves above the source water."""
+    return t_exhaust_max - t_source - coil_approach_k - hx_approach_k
+
+
+class MemoizedModel:
+    """Model outputs per design point, cached on the (rounded) design vector."""
+
+    def __init__(self, model, names, fixed, decimals=10, enabled=True):
+        self.model = model
+        self.names = list(names)
+        self.fixed = dict(fixed)
+        self.decimals = decimals
+        self.cache = {} if enabled else None
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, x):
+        key = tuple(np.round(np.asarray(x, dtype=np.float64), self.decimals))
+        result = None if self.cache is None else self.cache.get(key)
+        if result is None:
+            self.misses += 1
+            out = self.model(**{**self.fixed, **dict(zip(self.names, key))})
+            result = {k: float(v) for k, v in out.items()}
+            if self.cache is not None:
+                self.cache[key] = result
+        else:
+            self.hits += 1
+        return result
+
+
+def _local_search(u0, problem):
+    """One SLSQP run from unit-cube start u0; returns the design and its outputs."""
+    names, lo, hi = problem['names'], problem['lo'], problem['hi']
+    memo = MemoizedModel(ARCHITECTURES[problem['model']], names, problem['fixed'],
+                         enabled=bool(problem['max_outputs']))
+
+    def outputs(u):
+        return memo(lo + np.clip(u, 0.0, 1.0) * (hi - lo))
+
+    def params(u):
+        return {**problem['fixed'], **dict(zip(names, lo + np.clip(u, 0.0, 1.0) * (hi - lo)))}
+
+    scale = problem['objective_scale']
+    constraints = []
+    for metric, cap in problem['max_outputs'].items():
+        constraints.append({'type': 'ineq', 'fun': lambda u, m=metric, c=cap: (c - outputs(u)[m]) / abs(c)})
+    budget = problem['temperature_budget']
+    if budget is not None:
+        constraints.append({'type': 'ineq',
+                            'fun': lambda u: (budget - params(u)['dt_air'] - params(u)['dt_water']) / budget})
+
+    res = minimize(lambda u: outputs(u)[problem['objective']] / scale, u0, method='SLSQP',
+                   bounds=[(0.0, 1.0)] * len(names), constraints=constraints,
+                   options={'maxiter': 200, 'ftol': 1e-10})
+    u = np.clip(res.x, 0.0, 1.0)
+    design = params(u)
+    out = outputs(u)
+    violation = max([0.0] + [-c['fun'](u) for c in constraints])
+    return {
+        **{k: design[k] for k in names},
+        **{k: out[k] for k in problem['report']},
+        'feasible': violation <= 1e-6,
+        'converged': bool(res.success),
+        'evaluations': memo.misses,
+        'cache_hits': memo.hits,
+    }
+
+
+def _problem(it_load_mw, objective, bounds, fixed, model, max_outputs, budget, report):
+    names = list(bounds)
+    # Model defaults under `fixed`, so dt_air / dt_water are known to the budget even when not searched
+    fixed = {**model_params(ARCHITECTURES[model]), 'target_it_load_mw': it_load_mw, **(fixed or {})}
+    return {
+        'names': names,
+        'lo': np.array([bounds[k][0] for k in names], dtype=np.float64),
+        'hi': np.array([bounds[k][1] for k in names], dtype=np.float64),
+        'fixed': fixed,
+        'model': model,
+        'objective': objective,
+        'objective_scale': max(abs(float(ARCHITECTURES[model](**fixed)[objective])), 1e-9),
+        'max_outputs': dict(max_outputs or {}),
+        'temperature_budget': budget,
+        'report': report,
+    }
+
+
+def _run(tasks, workers):
+    if workers == 1 or len(tasks) == 1:
+        return [_local_search(*t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(_local_search, *zip(*tasks)))
+
+
+def _starts(n_vars, n, seed):
+    return qmc.LatinHypercube(d=n_vars, seed=seed).random(n)
+
+
+def optimize_design(it_load_mw=360.0, objective='pue', bounds=None, fixed=None, model='fw_fan',
+                    max_outputs=None, temperature_budget_k='default', starts=8, workers=None, seed=0):
+    """
+    Multi-start constrained minimization of `objective` (any model output).
+
+    temperature_budget_k: 'default' -> temperature_budget(), a number, or None
+    to drop the constraint. Returns {'best': Series, 'starts': DataFrame} with
+    one row per start (design, outputs, feasibility, evaluation/cache counts).
+    """
+    bounds = dict(DEFAULT_BOUNDS if bounds is None else bounds)
+    budget = temperature_budget() if temperature_budget_k == 'default' else temperature_budget_k
+    report = sorted({objective, 'pue', 'total_cooling_power_mw', 'vol_flow_air', 'vol_flow_fw', *(max_outputs or {})})
+    problem = _problem(it_load_mw, objective, bounds, fixed, model, max_outputs, budget, report)
+
+    results = pd.DataFrame(_run([(u0, problem) for u0 in _starts(len(bounds), starts, seed)], workers))
+    feasible = results[results['feasible']]
+    if feasible.empty:
+        raise ValueError("no start found a feasible design; relax the bounds or constraints")
+    best = feasible.loc[feasible[objective].idxmin()]
+    return {'best': best, 'starts': results.sort_values(objective).reset_index(drop=True)}
+
+
+def nondominated(df, objectives, rtol=1e-6):
+    """Rows of `df` not dominated on `objectives` (all minimized); near-duplicates within rtol collapse."""
+    values = df[list(objectives)].to_numpy(dtype=np.float64)
+    order = np.lexsort(values.T[::-1])
+    keep = []
+    if values.shape[1] == 2:
+        # Sorted by the first objective: keep designs that improve the second one
+        for i in order:
+            if not keep or values[i, 1] < values[keep[-1], 1] - rtol * abs(values[keep[-1], 1]):
+                keep.append(i)
+    else:
+        for i in order:
+            if not any(np.all(values[j] <= values[i]) and np.any(values[j] < values[i]) for j in keep):
+                keep.append(i)
+    return df.iloc[sorted(keep, key=lambda i: values[i, 0])].reset_index(drop=True)
+
+
+def pareto_front(it_load_mw=360.0, flow_metric='vol_flow_fw', points=20, power_metric='total_cooling_power_mw',
+                 bounds=None, fixed=None, model='fw_fan', max_outputs=None, temperature_budget_k='default',
+                 starts=4, workers=None, seed=0):
+    """
+    Cooling power vs `flow_metric` trade-off at `it_load_mw`.
+
+    The flow range is bracketed by the flow-minimizing and the power-minimizing
+    designs; power is then minimized under `points` flow caps in between.
+    """
+    bounds = dict(DEFAULT_BOUNDS if bounds is None else bounds)
+    budget = temperature_budget() if temperature_budget_k == 'default' else temperature_budget_k
+    report = sorted({'pue', power_metric, flow_metric, 'vol_flow_air', 'vol_flow_fw', *(max_outputs or {})})
+    u_starts = _starts(len(bounds), starts, seed)
+
+    def solve_all(problems):
+        rows = _run([(u0, p) for p in problems for u0 in u_starts], workers)
+        return pd.DataFrame(rows).assign(task=np.repeat(np.arange(len(problems)), len(u_starts)))
+
+    # Ends of the front
+    ends = solve_all([
+        _problem(it_load_mw, flow_metric, bounds, fixed, model, max_outputs, budget, report),
+        _problem(it_load_mw, power_metric, bounds, fixed, model, max_outputs, budget, report),
+    ])
+    ends = ends[ends['feasible']]
+    if ends.empty:
+        raise ValueError("no feasible design; relax the bounds or constraints")
+    flow_min = ends.loc[ends['task'] == 0, flow_metric].min()
+    flow_max = ends.loc[ends['task'] == 1].sort_values(power_metric)[flow_metric].iloc[0]
+
+    caps = np.linspace(flow_min, max(flow_max, flow_min), points)
+    problems = [_problem(it_load_mw, power_metric, bounds, fixed, model,
+                         {**(max_outputs or {}), flow_metric: cap}, budget, report) for cap in caps]
+    runs = solve_all(problems)
+    candidates = pd.concat([runs, ends], ignore_index=True)
+    candidates = candidates[candidates['feasible']].drop(columns=['task'])
+    return nondominated(candidates, [flow_metric, power_metric])
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Minimum-PUE cooling design search and power/flow Pareto front.")
+    parser.add_argument('--it-load', type=float, default=360.0)
+    parser.add_argument('--model', choices=list(ARCHITECTURES), default='fw_fan')
+    parser.add_argument('--objective', default='pue', help="model output to minimize")
+    parser.add_argument('--max', nargs='+', default=[], metavar='OUTPUT=CAP',
+                        help="caps on model outputs, e.g. vol_flow_fw=8 vol_flow_air=25000")
+    parser.add_argument('--budget', type=float, default=None,
+                        help=f"dt_air + dt_water limit in K (default {temperature_budget():g}; <= 0 disables)")
+    parser.add_argument('--starts', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pareto', type=int, metavar='POINTS', help="trace the cooling power / FW flow front")
+    parser.add_argument('--out', help="write the starts table / Pareto front to CSV")
+    args = parser.parse_args()
+
+    caps = {k: float(v) for k, v in (s.split('=') for s in args.max)}
+    budget = 'default' if args.budget is None else (args.budget if args.budget > 0 else None)
+    start = time.perf_counter()
+    if args.pareto:
+        front = pareto_front(args.it_load, points=args.pareto, model=args.model, max_outputs=caps,
+                             temperature_budget_k=budget, starts=args.starts, workers=args.workers, seed=args.seed)
+        print(f"Pareto front at {args.it_load:g} MW IT: {len(front)} designs in {time.perf_counter() - start:.2f}s")
+        print(front.drop(columns=['feasible', 'converged']).to_string(index=False, float_format=lambda v: f"{v:,.4f}"))
+        table = front
+    else:
+        res = optimize_design(args.it_load, objective=args.objective, model=args.model, max_outputs=caps,
+                              temperature_budget_k=budget, starts=args.starts, workers=args.workers, seed=args.seed)
+        table = res['starts']
+        print(f"{args.starts} starts in {time.perf_counter() - start:.2f}s "
+              f"({table['evaluations'].sum()} model evaluations, {table['cache_hits'].sum()} cache hits)")
+        print("\nBest design:")
+        print(res['best'].to_string())
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"Saved to {args.out}")
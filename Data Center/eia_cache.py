@@ -0,0 +1,157 @@
+"""
+Columnar cache for the EIA-860 workbooks.
+
+Parsing the xlsx files with openpyxl is the slowest part of building the map,
+so the first read of each sheet is converted to Parquet and stored next to the
+workbook in a `.cache/` folder. Later reads load the Parquet file directly.
+
+A cache entry is valid while the source file's size and mtime are unchanged.
+If either changed, the file is re-hashed (sha256) and only rebuilt when the
+content actually differs (e.g. a `touch` or a fresh checkout keeps the cache).
+
+Usage:
+    from eia_cache import read_eia_sheet
+    plant_df = read_eia_sheet('eia8602024/2___Plant_Y2024.xlsx', header=1)
+
+    # Only the needed columns (Parquet is columnar, the rest is never read)
+    gen_df = read_eia_sheet('eia8602024/3_1_Generator_Y2024.xlsx',
+                            columns=['Plant Code', 'Energy Source 1', 'Nameplate Capacity (MW)'])
+
+    # Pre-warm the cache for the whole directory
+    python eia_cache.py eia8602024
+"""
+import hashlib
+import json
+import os
+import time
+
+from instrumentation import count
+
+CACHE_DIR_NAME = '.cache'
+CACHE_VERSION = 1
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_paths(path, sheet_name, header):
+    src_dir, src_name = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(src_name)[0]
+    key = f"{stem}__{sheet_name}__h{header}"
+    cache_dir = os.path.join(src_dir, CACHE_DIR_NAME)
+    return cache_dir, os.path.join(cache_dir, key + '.parquet'), os.path.join(cache_dir, key + '.json')
+
+
+def _to_arrow_safe(df):
+    import pandas as pd
+
+    # EIA sheets mix numbers and text in some columns (e.g. turbine model
+    # numbers), which Parquet can't store as one type. Those columns are kept
+    # as strings; callers already coerce numeric fields with pd.to_numeric.
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            types = set(type(v) for v in df[col].dropna())
+            if len(types) > 1:
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def _write_meta(meta, meta_path):
+    tmp_meta = meta_path + '.tmp'
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, meta_path)
+
+
+def _write_atomic(df, parquet_path, meta, meta_path):
+    tmp_parquet = parquet_path + '.tmp'
+    df.to_parquet(tmp_parquet, index=False)
+    os.replace(tmp_parquet, parquet_path)
+    _write_meta(meta, meta_path)
+
+
+def read_eia_sheet(path, sheet_name=0, header=1, refresh=False, columns=None):
+    """
+    Drop-in replacement for pd.read_excel(path, header=...) backed by a Parquet cache.
+
+    `columns` works like read_excel's usecols with a list of names: only those
+    columns are read from the cache (the cache itself always holds the full sheet).
+    """
+    import pandas as pd
+
+    cache_dir, parquet_path, meta_path = _cache_paths(path, sheet_name, header)
+    st = os.stat(path)
+
+    meta = None
+    if not refresh and os.path.exists(meta_path) and os.path.exists(parquet_path):
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except ValueError:
+            meta = None  # truncated by an older, non-atomic in-place rewrite
+        if meta is not None and meta.get('version') != CACHE_VERSION:
+            meta = None
+
+    if meta is not None:
+        if meta['size'] == st.st_size and meta['mtime_ns'] == st.st_mtime_ns:
+            count('eia_cache_hits')
+            return pd.read_parquet(parquet_path, columns=columns)
+        # Size/mtime changed: only a content change invalidates the entry
+        digest = _file_sha256(path)
+        if digest == meta['sha256']:
+            meta.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            _write_meta(meta, meta_path)
+            count('eia_cache_hits')
+            return pd.read_parquet(parquet_path, columns=columns)
+    else:
+        digest = _file_sha256(path)
+
+    count('eia_cache_misses')
+    df = pd.read_excel(path, sheet_name=sheet_name, header=header)
+    df = _to_arrow_safe(df)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = {
+        'version': CACHE_VERSION,
+        'source': os.path.basename(path),
+        'sheet_name': sheet_name,
+        'header': header,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha256': digest,
+    }
+    _write_atomic(df, parquet_path, meta, meta_path)
+    return df if columns is None else df[list(columns)]
+
+
+def warm_cache(directory, header=1, refresh=False):
+    """Convert every EIA-860 data workbook (*_Y????.xlsx) in `directory` to Parquet."""
+    names = sorted(n for n in os.listdir(directory)
+                   if n.endswith('.xlsx') and '_Y' in n and not n.startswith('~$'))
+    for name in names:
+        path = os.path.join(directory, name)
+        start = time.perf_counter()
+        df = read_eia_sheet(path, header=header, refresh=refresh)
+        print(f"  {name:<40} {len(df):>7} rows  {time.perf_counter() - start:6.2f}s")
+    return names
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-warm the EIA-860 Parquet cache.")
+    parser.add_argument('directory', nargs='?', default='eia8602024')
+    parser.add_argument('--header', type=int, default=1)
+    parser.add_argument('--refresh', action='store_true', help="rebuild even if the cache is valid")
+    args = parser.parse_args()
+
+    print(f"Warming EIA-860 cache in {args.directory}/{CACHE_DIR_NAME} ...")
+    warm_cache(args.directory, header=args.header, refresh=args.refresh)
+    print("Done.")
@@ -0,0 +1,183 @@
+"""
+Persistent SQLite cache for geocode_comprehensive.py.
+
+Every lookup result is stored under a normalized address key together with
+where it came from ('zip' = pgeocode ZIP centroid, 'arcgis' = ArcGIS address
+lookup):
+
+  hit    -> coordinates, kept forever
+  miss   -> geocoder returned no match; negative-cached until `expires_at`
+  retry  -> request raised (timeout, HTTP error...); re-queued with
+            exponential backoff in `next_retry_at`
+
+A second run over the same input reads everything it can from the cache and
+only sends addresses that are new, whose miss TTL expired, or whose retry is due.
+"""
+import re
+import sqlite3
+import time
+
+from instrumentation import count
+
+DEFAULT_DB = 'geocode_cache.sqlite'
+MISS_TTL_SECONDS = 30 * 24 * 3600     # re-check "no match" answers after 30 days
+RETRY_BASE_SECONDS = 30.0             # first retry after 30s, then 60s, 120s, ...
+RETRY_MAX_SECONDS = 24 * 3600.0
+
+
+def normalize_address(addr):
+    """Cache key: upper case, single spaces, no trailing country suffix."""
+    if addr is None:
+        return None
+    key = re.sub(r'\s+', ' ', str(addr)).strip().upper()
+    key = re.sub(r',?\s*(USA|UNITED STATES)$', '', key)
+    return key.rstrip(', ')
+
+
+class GeocodeCache:
+    def __init__(self, path=DEFAULT_DB, miss_ttl=MISS_TTL_SECONDS,
+                 retry_base=RETRY_BASE_SECONDS, retry_max=RETRY_MAX_SECONDS):
+        self.path = path
+        self.miss_ttl = miss_ttl
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode (
+                key           TEXT PRIMARY KEY,
+                address       TEXT,
+                status        TEXT NOT NULL,      -- hit | miss | retry
+                latitude      REAL,
+                longitude     REAL,
+                source        TEXT,               -- zip | arcgis
+                attempts      INTEGER NOT NULL DEFAULT 0,
+                error         TEXT,
+                updated_at    REAL NOT NULL,
+                expires_at    REAL,               -- misses only
+                next_retry_at REAL                -- retries only
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- reads ---
+    def lookup_many(self, addresses, now=None):
+        """
+        Split addresses into (hits, skip, todo):
+          hits -> {addr: (lat, lon, source)} from the cache
+          skip -> addresses with a live negative entry or a retry not yet due
+          todo -> addresses that need a network lookup
+        """
+        now = time.time() if now is None else now
+        rows = {}
+        keys = {addr: normalize_address(addr) for addr in addresses}
+        unique_keys = list(set(keys.values()))
+        for i in range(0, len(unique_keys), 500):
+            chunk = unique_keys[i:i + 500]
+            q = ("SELECT key, status, latitude, longitude, source, expires_at, next_retry_at "
+                 f"FROM geocode WHERE key IN ({','.join('?' * len(chunk))})")
+            for row in self.conn.execute(q, chunk):
+                rows[row[0]] = row[1:]
+
+        hits, skip, todo = {}, [], []
+        for addr, key in keys.items():
+            row = rows.get(key)
+            if row is None:
+                todo.append(addr)
+                continue
+            status, lat, lon, source, expires_at, next_retry_at = row
+            if status == 'hit':
+                hits[addr] = (lat, lon, source)
+            elif status == 'miss' and expires_at is not None and expires_at > now:
+                skip.append(addr)
+            elif status == 'retry' and next_retry_at is not None and next_retry_at > now:
+                skip.append(addr)
+            else:
+                todo.append(addr)
+        count('geocode_cache_hits', len(hits))
+        count('geocode_cache_skips', len(skip))
+        return hits, skip, todo
+
+    def due_retries(self, now=None):
+        now = time.time() if now is None else now
+        return [r[0] for r in self.conn.execute(
+            "SELECT address FROM geocode WHERE status = 'retry' AND next_retry_at <= ? "
+            "ORDER BY next_retry_at", (now,))]
+
+    def next_retry_time(self):
+        row = self.conn.execute(
+            "SELECT MIN(next_retry_at) FROM geocode WHERE status = 'retry'").fetchone()
+        return row[0]
+
+    def stats(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM geocode GROUP BY status"))
+
+    # --- writes ---
+    def put_hit(self, addr, lat, lon, source, commit=True):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO geocode (key, address, status, latitude, longitude, source, "
+            "attempts, updated_at) VALUES (?, ?, 'hit', ?, ?, ?, 0, ?)",
+            (normalize_address(addr), str(addr), float(lat), float(lon), source, time.time()))
+        if commit:
+            self.conn.commit()
+
+    def put_hits(self, items, source):
+        """Bulk insert [(addr, lat, lon), ...] in one transaction."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO geocode (key, address, status, latitude, longitude, source, "
+            "attempts, updated_at) VALUES (?, ?, 'hit', ?, ?, ?, 0, ?)",
+            [(normalize_address(a), str(a), float(lat), float(lon), source, now) for a, lat, lon in items])
+        self.conn.commit()
+
+    def put_miss(self, addr, source, commit=True):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO geocode (key, address, status, source, attempts, updated_at, "
+            "expires_at) VALUES (?, ?, 'miss', ?, 0, ?, ?)",
+            (normalize_address(addr), str(addr), source, now, now + self.miss_ttl))
+        if commit:
+            self.conn.commit()
+
+    def put_failure(self, addr, source, error, commit=True):
+        """Queue a failed lookup for retry; returns the backoff delay in seconds."""
+        key = normalize_address(addr)
+        row = self.conn.execute("SELECT attempts FROM geocode WHERE key = ?", (key,)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO geocode (key, address, status, source, attempts, error, "
+            "updated_at, next_retry_at) VALUES (?, ?, 'retry', ?, ?, ?, ?, ?)",
+            (key, str(addr), source, attempts, repr(error)[:500], now, now + delay))
+        if commit:
+            self.conn.commit()
+        return delay
+
+    def commit(self):
+        self.conn.commit()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the geocode cache.")
+    parser.add_argument('db', nargs='?', default=DEFAULT_DB)
+    args = parser.parse_args()
+
+    with GeocodeCache(args.db) as cache:
+        print(f"Cache: {args.db}")
+        for status, n in sorted(cache.stats().items()):
+            print(f"  {status:<6}: {n}")
+        nxt = cache.next_retry_time()
+        if nxt is not None:
+            print(f"  next retry due in {max(0, nxt - time.time()):.0f}s")
@@ -1,131 +1,264 @@
-import pandas as pd
-import pgeocode
-import re
+"""
+Geocode datacenters_final_structure(Sheet1).csv -> datacenters_with_coords.csv.
+
+  Phase 0  persistent SQLite cache (geocode_cache.py)
+  Phase 1  ZIP centroids from the offline index (zip_index.py)
+  Phase 2  grouped, de-duplicated ArcGIS lookups, concurrent behind a rate limit
+
+geocode_data_centers() can be called from a notebook; geopy is only imported
+when Phase 2 has something to look up and no `geocode` callable is given.
+
+    python geocode_comprehensive.py
+    python geocode_comprehensive.py --input dcs.csv --output dcs_with_coords.csv --simulated
+"""
 import numpy as np
 import os
-from geopy.geocoders import ArcGIS
-from geopy.extra.rate_limiter import RateLimiter
 import time
 import signal
 import sys
+import threading
+from geocode_engine import geocode_addresses
+from geocode_cache import GeocodeCache
+from geocode_journal import CheckpointJournal
+from address_dedup import dedupe_addresses
+from zip_index import INDEX_FILE, extract_zips, lookup_zips, load_zip_index
+from instrumentation import close_lap, count, lap
+
+INPUT_FILE = 'datacenters_final_structure(Sheet1).csv'
+OUTPUT_FILE = 'datacenters_with_coords.csv'
+
+# Phase 2 concurrency settings
+MAX_IN_FLIGHT = 8            # concurrent ArcGIS requests
+MAX_REQUESTS_PER_SEC = 10.0  # shared rate limit (same as the old 0.1s min delay)
+REQUEST_TIMEOUT = 10.0       # seconds per request
+
+# Persistent cache (hits, negative misses, retry queue)
+CACHE_DB = 'geocode_cache.sqlite'
+MAX_RETRY_ROUNDS = 3         # in-run retry passes for failed lookups (exponential backoff)
+MAX_RETRY_WAIT = 120.0       # don't block longer than this waiting for a retry to come due
+
+
+def geocode_data_centers(input_file=INPUT_FILE, output_file=OUTPUT_FILE, cache_db=CACHE_DB,
+                         zip_index_path=INDEX_FILE, geocode=None, max_in_flight=MAX_IN_FLIGHT,
+                         rate=MAX_REQUESTS_PER_SEC, timeout=REQUEST_TIMEOUT):
+    """
+    Run all phases and write `output_file`; returns the geocoded frame.
+
+    `geocode` is any geopy-style callable (default: ArcGIS, e.g.
+    geocode_engine.SimulatedGeocoder() to run offline).
+    """
+    import pandas as pd
+
+    print("=== Comprehensive Geocoder (Zip + Grouped City Lookup) ===")
+    # 1. Load Data
+    lap('load')
+    try:
+        df = pd.read_csv(input_file, encoding='utf-8')
+    except UnicodeDecodeError:
+        df = pd.read_csv(input_file, encoding='latin-1')
+    print(f"Loaded {len(df)} total entries.")
+    count('rows', len(df))
+
+    # Initialize Columns if not present
+    if 'Latitude' not in df.columns: df['Latitude'] = np.nan
+    if 'Longitude' not in df.columns: df['Longitude'] = np.nan
+
+    cache = GeocodeCache(cache_db)
+    journal = CheckpointJournal(output_file)
+
+    def apply_coords(addr_to_latlon):
+        if not addr_to_latlon: return
+        lat = df['Address'].map({a: v[0] for a, v in addr_to_latlon.items()})
+        lon = df['Address'].map({a: v[1] for a, v in addr_to_latlon.items()})
+        fill = df['Latitude'].isna() & lat.notna()
+        df.loc[fill, 'Latitude'] = lat[fill]
+        df.loc[fill, 'Longitude'] = lon[fill]
+
+    # Resume an interrupted run from its checkpoint journal
+    resumed = journal.replay()
+    if resumed:
+        apply_coords(resumed)
+        print(f"Resumed {len(resumed)} resolved locations from {journal.path}")
+
+    # 2. Cached Results (Phase 0: no network)
+    lap('phase0_cache')
+    print("Phase 0: Geocode Cache...")
+    all_addresses = df['Address'].dropna().unique()
+    cached_hits, cached_skip, _ = cache.lookup_many(all_addresses)
+    apply_coords(cached_hits)
+    print(f"  -> {len(cached_hits)} cached locations, {len(cached_skip)} known misses/pending retries")
+
+    # 3. Extract Zip Codes (Phase 1: Fast, vectorized against the offline ZIP index)
+    lap('phase1_zip')
+    print("Phase 1: Zip Code Lookup...")
+    df['Zip'] = extract_zips(df['Address'])
+    need_zip = df['Latitude'].isna() & df['Zip'].notna()
+
+    if need_zip.any() and not os.path.exists(zip_index_path):
+        print(f"  Warning: ZIP centroid index {zip_index_path} not found (`python zip_index.py --rebuild` "
+              f"creates it); sending all {int(need_zip.sum())} ZIP rows to Phase 2")
+    elif need_zip.any():
+        zip_lat, zip_lon = lookup_zips(df.loc[need_zip, 'Zip'], load_zip_index(zip_index_path))
+        found = ~np.isnan(zip_lat)
+        rows = df.index[need_zip][found]
+        df.loc[rows, 'Latitude'] = zip_lat[found]
+        df.loc[rows, 'Longitude'] = zip_lon[found]
+        count('zip_hits', len(rows))
+    
+        zip_hits = df.loc[rows, ['Address', 'Latitude', 'Longitude']].dropna().drop_duplicates('Address')
+        zip_records = list(zip_hits.itertuples(index=False, name=None))
+        journal.record_many(zip_records)
+        cache.put_hits(zip_records, source='zip')
+
+    done_count = df['Latitude'].notna().sum()
+    print(f"  -> Phase 1 Complete. Resolved: {done_count}/{len(df)}")
+
+    # Helper to save progress: append newly resolved records to the journal
+    # (constant cost per batch); the full CSV is only written once at the end.
+    def save_progress():
+        journal.checkpoint()
+
+    # Handle Interrupts
+    def signal_handler(sig, frame):
+        print("\nInterrupted! Saving current progress...")
+        save_progress()
+        cache.close()
+        print(f"Saved to {journal.path}. Re-run to resume. Exiting.")
+        sys.exit(0)
+
+    # Only the main thread may install signal handlers (not e.g. a service worker)
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    previous_handler = signal.signal(signal.SIGINT, signal_handler) if in_main_thread else None
 
-print("=== Comprehensive Geocoder (Zip + Grouped City Lookup) ===")
-input_file = 'datacenters_final_structure(Sheet1).csv'
-output_file = 'datacenters_with_coords.csv' 
-
-# 1. Load Data
-try:
-    df = pd.read_csv(input_file, encoding='utf-8')
-except UnicodeDecodeError:
-    df = pd.read_csv(input_file, encoding='latin-1')
-print(f"Loaded {len(df)} total entries.")
-
-# Initialize Columns if not present
-if 'Latitude' not in df.columns: df['Latitude'] = np.nan
-if 'Longitude' not in df.columns: df['Longitude'] = np.nan
-
-# 2. Extract Zip Codes (Phase 1: Fast)
-def extract_zip(address):
-    if pd.isna(address): return None
-    matches = re.findall(r'\b\d{5}\b', str(address))
-    if matches: return matches[-1]
-    return None
-
-print("Phase 1: Zip Code Lookup...")
-df['Zip'] = df['Address'].apply(extract_zip)
-valid_zips = df['Zip'].dropna().unique()
-
-nomi = pgeocode.Nominatim('us')
-if len(valid_zips) > 0:
-    zip_res = nomi.query_postal_code(valid_zips)
-    zip_map = zip_res.set_index('postal_code')[['latitude', 'longitude']].to_dict('index')
+    # 4. Grouped Address Lookup (Phase 2: Fallback using ArcGIS)
+    lap('phase2_lookup')
+    try:
+        # Identify remaining items
+        df_missing = df[df['Latitude'].isna()].copy()
+        # Skip addresses with a live negative-cache entry or a retry that isn't due yet
+        _, _, unique_addresses = cache.lookup_many(df_missing['Address'].dropna().unique())
+
+        print(f"\nPhase 2: Grouped Address Lookup (Using ArcGIS for speed)")
+        print(f"  Remaining items: {len(df_missing)}")
+        print(f"  Unique locations to search: {len(unique_addresses)}")
+
+        if len(unique_addresses) > 0:
+            print("  Starting Geocoding for unique locations...")
+    
+            if geocode is None:
+                from geopy.geocoders import ArcGIS
+                geocode = ArcGIS(user_agent="dc_geocoder_grouped_v3").geocode
+    
+            # Near-duplicate addresses share one lookup; `groups` maps each
+            # representative to every original address it stands for.
+            groups = {}
     
-    # Apply Zip Coordinates
-    for idx, row in df.iterrows():
-        # Only if empty
-        if pd.isna(row['Latitude']) and row['Zip'] in zip_map:
-            lat = zip_map[row['Zip']]['latitude']
-            lon = zip_map[row['Zip']]['longitude']
-            if not np.isnan(lat):
-                df.at[idx, 'Latitude'] = lat
-                df.at[idx, 'Longitude'] = lon
-
-done_count = df['Latitude'].notna().sum()
-print(f"  -> Phase 1 Complete. Resolved: {done_count}/{len(df)}")
-
-# Helper to save progress
-def save_progress():
-    final_df = df.dropna(subset=['Latitude', 'Longitude'])
-    final_df.to_csv(output_file, index=False)
-    # print(f"  (Saved progress: {len(final_df)} records)")
-
-# Handle Interrupts
-def signal_handler(sig, frame):
-    print("\nInterrupted! Saving current progress...")
-    save_progress()
-    print("Saved. Exiting.")
-    sys.exit(0)
-
-signal.signal(signal.SIGINT, signal_handler)
-
-# 3. Grouped Address Lookup (Phase 2: Fallback using ArcGIS)
-# Identify remaining items
-df_missing = df[df['Latitude'].isna()].copy()
-unique_addresses = df_missing['Address'].dropna().unique()
-
-print(f"\nPhase 2: Grouped Address Lookup (Using ArcGIS for speed)")
-print(f"  Remaining items: {len(df_missing)}")
-print(f"  Unique locations to search: {len(unique_addresses)}")
-
-if len(unique_addresses) > 0:
-    print("  Starting Geocoding for unique locations...")
+            # Apply each result to the main DF and the cache as it arrives (runs on
+            # this thread), so save_progress() always sees an up-to-date state.
+            def apply_result(i, rep, latlon):
+                if i % 5 == 0:
+                    print(f"  [{i+1}/{len(groups)}] {str(rep)[:40]}...             ", end="\r")
+                if latlon:
+                    members = groups[rep]
+                    mask = df['Address'].isin(members)
+                    df.loc[mask, 'Latitude'] = latlon[0]
+                    df.loc[mask, 'Longitude'] = latlon[1]
+                    for addr in members:
+                        cache.put_hit(addr, latlon[0], latlon[1], source='arcgis', commit=False)
+                        journal.record(addr, latlon[0], latlon[1])
+                if i % 20 == 0 and i > 0:
+                    cache.commit()
+                    save_progress()
     
-    geolocator = ArcGIS(user_agent="dc_geocoder_grouped_v3")
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=0.1)
+            def record_failures(failed):
+                # No match -> negative cache (TTL); exception -> retry queue (backoff)
+                for rep, err in failed.items():
+                    for addr in groups[rep]:
+                        if err is None:
+                            cache.put_miss(addr, source='arcgis', commit=False)
+                        else:
+                            cache.put_failure(addr, source='arcgis', error=err, commit=False)
+                cache.commit()
     
-    addr_map = {}
+            def run_lookups(addresses):
+                groups.clear()
+                deduped, stats = dedupe_addresses(addresses)
+                groups.update(deduped)
+                if stats['saved']:
+                    print(f"  Address de-duplication: {stats['addresses']} -> {stats['lookups']} lookups "
+                          f"({stats['saved']} saved, {stats['fuzzy_merges']} fuzzy merges)")
+                # Several requests in flight, shared token bucket caps the overall rate
+                rep_map, failed = geocode_addresses(
+                    list(groups), geocode,
+                    max_in_flight=max_in_flight, rate=rate,
+                    timeout=timeout, on_result=apply_result,
+                )
+                record_failures(failed)
+                # Fan results back out to every member address
+                addr_map = {addr: latlon for rep, latlon in rep_map.items() for addr in groups[rep]}
+                return addr_map, failed
     
-    for i, addr in enumerate(unique_addresses):
-        try:
-            query = addr
-            if "USA" not in str(query) and "United States" not in str(query):
-                query = f"{query}, USA"
-            
-            # Print progress every 5 items
-            if i % 5 == 0:
-                print(f"  [{i+1}/{len(unique_addresses)}] {str(query)[:40]}...             ", end="\r")
-            
-            loc = geocode(query)
-            if loc:
-                addr_map[addr] = (loc.latitude, loc.longitude)
-                
-                # Apply immediately to main DF to ensure up-to-date state for saving
-                # Note: This is slow to iterate whole DF every time.
-                # Optimized: Just update the specific rows LATER?
-                # No, for 'save_progress' to work, 'df' needs to be updated.
-                # Iterating 2000 rows is instant in memory.
-                
-                # Update all matching rows
-                # Using boolean indexing is faster
-                # df.loc[df['Address'] == addr, 'Latitude'] = loc.latitude
-                # df.loc[df['Address'] == addr, 'Longitude'] = loc.longitude
-                # But 'Address' un-indexed search might be slightly slow if done 1000 times? 
-                # 2000 rows is tiny. It's fine.
-                mask = df['Address'] == addr
-                df.loc[mask, 'Latitude'] = loc.latitude
-                df.loc[mask, 'Longitude'] = loc.longitude
-            
-            if i % 20 == 0 and i > 0:
-                save_progress()
-                
-        except Exception as e:
-             pass 
+            lookup_set = set(unique_addresses)
+            addr_map, failed = run_lookups(unique_addresses)
+            print(f"\n  Resolved {len(addr_map)} unique addresses, {len(failed)} lookups failed.")
     
-    print("\n  Phase 2 Complete.")
-
-# 4. Save Final
-save_progress()
-final_df = df.dropna(subset=['Latitude', 'Longitude'])
-print("-" * 50)
-print(f"Total Geocoded: {len(final_df)} / {len(df)} ({len(final_df)/len(df)*100:.1f}%)")
-print(f"Saved to {output_file}")
+            # Retry queue: re-send failed lookups once their backoff delay has passed
+            for retry_round in range(MAX_RETRY_ROUNDS):
+                next_due = cache.next_retry_time()
+                if next_due is None: break
+                wait = next_due - time.time()
+                if wait > MAX_RETRY_WAIT:
+                    break
+                if wait > 0:
+                    print(f"  Retry round {retry_round+1}: waiting {wait:.0f}s for backoff...")
+                    time.sleep(wait)
+                due = [a for a in cache.due_retries() if a in lookup_set]
+                if not due: break
+                retry_map, failed = run_lookups(due)
+                addr_map.update(retry_map)
+                print(f"\n  Retry round {retry_round+1}: {len(retry_map)}/{len(due)} resolved.")
+    
+            pending = cache.stats().get('retry', 0)
+            if pending:
+                print(f"  {pending} lookups left in the retry queue for the next run.")
+            print("  Phase 2 Complete.")
+    finally:
+        if in_main_thread:
+            signal.signal(signal.SIGINT, previous_handler)
+
+    # 5. Save Final (atomic compaction of the journal into the output CSV)
+    lap('save')
+    final_df = journal.compact(df)
+    cache.close()
+    close_lap()
+    count('geocoded_rows', len(final_df))
+    print("-" * 50)
+    print(f"Total Geocoded: {len(final_df)} / {len(df)} ({len(final_df)/len(df)*100:.1f}%)")
+    print(f"Saved to {output_file}")
+    return final_df
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Geocode the data-center list (cache, ZIP index, ArcGIS).")
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--cache-db', default=CACHE_DB)
+    parser.add_argument('--zip-index', default=INDEX_FILE)
+    parser.add_argument('--workers', type=int, default=MAX_IN_FLIGHT, help="concurrent lookups")
+    parser.add_argument('--rate', type=float, default=MAX_REQUESTS_PER_SEC, help="max requests per second")
+    parser.add_argument('--simulated', action='store_true',
+                        help="use the offline SimulatedGeocoder instead of ArcGIS (testing)")
+    args = parser.parse_args(argv)
+
+    geocode = None
+    if args.simulated:
+        from geocode_engine import SimulatedGeocoder
+        geocode = SimulatedGeocoder(latency=(0.001, 0.01))
+    geocode_data_centers(args.input, args.output, args.cache_db, args.zip_index, geocode=geocode,
+                         max_in_flight=args.workers, rate=args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Concurrent, rate-limited geocoding for Phase 2 of geocode_comprehensive.py.
+
+A serial RateLimiter loop spends most of its time waiting on network round
+trips. Here a thread pool keeps several requests in flight while a shared
+token bucket enforces the overall request rate, so throughput is bounded by
+the rate limit instead of latency.
+
+`SimulatedGeocoder` is a local stand-in with configurable latency and error
+rate, so the engine can be exercised offline:
+
+    python geocode_engine.py --addresses 300 --workers 16 --rate 50
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from instrumentation import count
+
+Location = namedtuple('Location', ['latitude', 'longitude'])
+
+
+def build_query(addr):
+    """Same query the serial loop used: append ', USA' unless a country is present."""
+    query = str(addr)
+    if "USA" not in query and "United States" not in query:
+        query = f"{query}, USA"
+    return query
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` at once."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def geocode_addresses(addresses, geocode, max_in_flight=8, rate=10.0, burst=None,
+                      timeout=10.0, on_result=None):
+    """
+    Geocode unique addresses concurrently.
+
+    `geocode(query, timeout=...)` is any geopy-style callable returning an
+    object with .latitude/.longitude (or None). `on_result(i, addr, latlon)` is
+    called from the calling thread as each lookup finishes, so callers can
+    update their DataFrame and checkpoint without locking.
+
+    Returns (addr_map, failures): addr -> (lat, lon) for hits, and
+    addr -> exception (or None for "no match") for everything else.
+    """
+    bucket = TokenBucket(rate, burst if burst is not None else max_in_flight)
+    addr_map = {}
+    failures = {}
+
+    def lookup(addr):
+        bucket.acquire()
+        count('geocoder_calls')
+        return geocode(build_query(addr), timeout=timeout)
+
+    pool = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        futures = {pool.submit(lookup, addr): addr for addr in addresses}
+        for i, fut in enumerate(as_completed(futures)):
+            addr = futures[fut]
+            latlon = None
+            try:
+                loc = fut.result()
+                if loc:
+                    latlon = (loc.latitude, loc.longitude)
+                    addr_map[addr] = latlon
+                else:
+                    failures[addr] = None
+            except Exception as e:
+                failures[addr] = e
+                count('geocoder_errors')
+            if on_result is not None:
+                on_result(i, addr, latlon)
+    finally:
+        # On Ctrl+C / sys.exit don't wait for the queued lookups to run
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return addr_map, failures
+
+
+class SimulatedGeocoder:
+    """
+    Offline stand-in for geopy's ArcGIS geocoder.
+
+    Each call sleeps for a random latency, fails with probability
+    `error_rate`, and raises TimeoutError if the latency exceeds the request
+    timeout. Coordinates are derived from a hash of the query, so results are
+    stable across runs and independent of scheduling order.
+    """
+
+    def __init__(self, latency=(0.05, 0.25), error_rate=0.0, miss_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.miss_rate = miss_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def geocode(self, query, timeout=None):
+        with self.lock:
+            self.calls += 1
+            delay = self.rng.uniform(*self.latency)
+            roll = self.rng.random()
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"simulated timeout after {timeout}s: {query}")
+        time.sleep(delay)
+        if roll < self.error_rate:
+            raise ConnectionError(f"simulated service error: {query}")
+        h = int(hashlib.md5(query.encode('utf-8')).hexdigest(), 16)
+        if (h % 1000) / 1000.0 < self.miss_rate:
+            return None
+        lat = 25.0 + (h % 2400) / 100.0
+        lon = -124.0 + ((h // 2400) % 5700) / 100.0
+        return Location(lat, lon)
+
+    __call__ = geocode
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the concurrent geocoder against a local stand-in.")
+    parser.add_argument('--addresses', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=50.0, help="max requests per second")
+    parser.add_argument('--timeout', type=float, default=1.0)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    addrs = [f"{i} Main St, Springfield, IL 627{i % 100:02d}" for i in range(args.addresses)]
+
+    serial = SimulatedGeocoder(error_rate=args.error_rate)
+    start = time.perf_counter()
+    serial_map, _ = geocode_addresses(addrs, serial, max_in_flight=1, rate=args.rate, timeout=args.timeout)
+    t_serial = time.perf_counter() - start
+
+    conc = SimulatedGeocoder(error_rate=args.error_rate)
+    start = time.perf_counter()
+    conc_map, failures = geocode_addresses(addrs, conc, max_in_flight=args.workers, rate=args.rate, timeout=args.timeout)
+    t_conc = time.perf_counter() - start
+
+    same = all(serial_map[a] == conc_map[a] for a in serial_map.keys() & conc_map.keys())
+    print(f"Serial     : {len(serial_map)}/{len(addrs)} resolved in {t_serial:.2f}s")
+    print(f"Concurrent : {len(conc_map)}/{len(addrs)} resolved in {t_conc:.2f}s "
+          f"({len(failures)} failed, {args.workers} in flight, {args.rate:g} req/s)")
+    print(f"Speedup    : {t_serial / t_conc:.1f}x  (matching coordinates: {same})")
@@ -0,0 +1,101 @@
+"""
+Append-only checkpoint journal for geocode_comprehensive.py.
+
+Instead of rewriting the whole output CSV at every checkpoint, resolved
+(address, lat, lon) records are appended to `<output>.journal` as JSON lines
+and fsync'ed. A checkpoint therefore costs the same no matter how large the
+dataset is, and a kill mid-write can at worst leave one partial last line.
+That line is cut off (replay() or the first checkpoint truncates the file to
+its last newline) so the next append starts on a fresh line.
+
+At the end of a run compact() writes the final CSV to a temp file, swaps it in
+with os.replace (atomic), and removes the journal. If the run is interrupted
+the journal survives and the next run replays it before doing any lookups.
+"""
+import json
+import os
+
+
+class CheckpointJournal:
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.path = output_file + '.journal'
+        self.pending = []
+        self.repaired = False
+
+    def _repair(self):
+        """Drop a torn last line, so appends don't run into it."""
+        self.repaired = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Scan back from the end for the last complete line
+            end = size - 1
+            while end > 0:
+                start = max(0, end - (1 << 16))
+                f.seek(start)
+                nl = f.read(end - start).rfind(b'\n')
+                if nl >= 0:
+                    end = start + nl + 1
+                    break
+                end = start
+            f.truncate(end)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, address, lat, lon):
+        self.pending.append((address, lat, lon))
+
+    def record_many(self, records):
+        self.pending.extend(records)
+
+    def checkpoint(self):
+        """Append pending records to the journal; returns how many were written."""
+        if not self.pending:
+            return 0
+        if not self.repaired:
+            self._repair()
+        lines = ''.join(
+            json.dumps({'address': a, 'lat': float(lat), 'lon': float(lon)}) + '\n'
+            for a, lat, lon in self.pending)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        n = len(self.pending)
+        self.pending = []
+        return n
+
+    def replay(self):
+        """Return {address: (lat, lon)} from a previous, interrupted run."""
+        resolved = {}
+        self._repair()
+        if not os.path.exists(self.path):
+            return resolved
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # corrupt line (torn lines are truncated by _repair)
+                resolved[rec['address']] = (rec['lat'], rec['lon'])
+        return resolved
+
+    def compact(self, df):
+        """Atomically write the resolved rows of `df` to the output CSV and drop the journal."""
+        self.checkpoint()
+        final_df = df.dropna(subset=['Latitude', 'Longitude'])
+        tmp = self.output_file + '.tmp'
+        final_df.to_csv(tmp, index=False)
+        with open(tmp, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, self.output_file)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return final_df
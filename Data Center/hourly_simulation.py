@@ -0,0 +1,207 @@
+"""
+Hourly (8760) FW + fan cooling simulation with chiller switchover.
+
+simulation.py assumes free cooling all year. Here every hour of a weather
+file is evaluated: the source water (river/lake, cooling tower or outdoor air,
+see `condenser`) pre-cools the FW return through the heat exchanger and a
+mechanical chiller trims whatever it cannot reach:
+
+    free fraction    = (t_return - (t_source + hx_approach)) / dt_water,  clipped to [0, 1]
+    chiller load     = (1 - free fraction) * heat load
+    compressor power = chiller load / COP(t_evap, t_cond)
+
+COP is a fraction of the Carnot COP between the evaporator and the condenser.
+All sites and hours are one flat (site, hour) array, so a batch of sites is
+evaluated without a Python loop over hours or sites.
+
+Weather CSV columns (one row per hour; several sites may share a file):
+    site (optional, defaults to the file name), dry_bulb_c, wet_bulb_c, water_temp_c
+
+    python hourly_simulation.py weather/*.csv --it-load 360 --out hourly.parquet
+    python hourly_simulation.py --synthetic 3          # demo with generated weather
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from simulation import fw_fan_cooling
+
+HOURS_PER_YEAR = 8760
+
+# Source temperature for heat rejection, by condenser type
+CONDENSER_SOURCE = {
+    'water': 'water_temp_c',   # river / lake (the design case in simulation.py)
+    'tower': 'wet_bulb_c',     # evaporative cooling tower
+    'air': 'dry_bulb_c',       # dry cooler / air-cooled chiller
+}
+
+DEFAULT_CHILLER = {
+    'supply_temp_c': 18.0,       # FW supply to the CRAH coils
+    'hx_approach_k': 2.0,        # source -> FW heat exchanger
+    'condenser_approach_k': 4.0,  # tower/dry-cooler approach (added to wet/dry bulb)
+    'evap_approach_k': 2.0,
+    'cond_lift_k': 5.0,          # condensing temperature above the source
+    'carnot_fraction': 0.5,
+    'min_cop': 2.0,
+    'max_cop': 12.0,
+}
+
+
+def load_weather(paths):
+    """Read one or more hourly weather CSVs into one long (site, hour) frame."""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path)
+        if 'site' not in df:
+            df['site'] = os.path.splitext(os.path.basename(path))[0]
+        frames.append(df)
+    weather = pd.concat(frames, ignore_index=True)
+    weather['hour'] = weather.groupby('site', sort=False).cumcount()
+    return weather
+
+
+def synthetic_weather(sites, hours=HOURS_PER_YEAR, seed=0):
+    """
+    Sinusoidal annual + diurnal weather for `sites` ({name: (mean_dry_bulb, annual_swing)}
+    or an int count). Used for demos and benchmarks, not for design decisions.
+    """
+    rng = np.random.default_rng(seed)
+    if isinstance(sites, int):
+        sites = {f'site_{i:03d}': (rng.uniform(5, 22), rng.uniform(6, 16)) for i in range(sites)}
+    names = np.repeat(list(sites), hours)
+    mean, swing = (np.repeat(np.array(v, dtype=np.float64), hours) for v in zip(*sites.values()))
+    h = np.tile(np.arange(hours, dtype=np.float64), len(sites))
+    annual = -np.cos(2 * np.pi * (h - 400) / HOURS_PER_YEAR)   # coldest mid-January
+    diurnal = -np.cos(2 * np.pi * (h - 4) / 24)
+    dry = mean + swing * annual + 4.0 * diurnal + rng.normal(0, 1.5, len(h))
+    wet = dry - np.abs(rng.normal(4.0, 1.5, len(h)))
+    water = mean - 0.6 * swing * np.cos(2 * np.pi * (h - 1120) / HOURS_PER_YEAR)  # lags air by ~a month
+    return pd.DataFrame({'site': names, 'hour': h.astype(np.int64),
+                         'dry_bulb_c': dry, 'wet_bulb_c': wet, 'water_temp_c': water})
+
+
+def chiller_cop(t_evap_c, t_cond_c, carnot_fraction, min_cop, max_cop):
+    t_evap = np.asarray(t_evap_c, dtype=np.float64) + 273.15
+    lift = np.maximum(np.asarray(t_cond_c, dtype=np.float64) + 273.15 - t_evap, 1.0)
+    return np.clip(carnot_fraction * t_evap / lift, min_cop, max_cop)
+
+
+def simulate_hourly(weather, it_load_mw=360.0, condenser='water', chiller=None, **design):
+    """
+    Hourly cooling power and PUE for every (site, hour) row of `weather`.
+
+    `it_load_mw` is a scalar, a per-row array, or a {site: MW} mapping; an
+    optional `it_load_fraction` column scales it per hour. `design` overrides
+    fw_fan_cooling() inputs (dt_air, dp_water, ...), `chiller` overrides
+    DEFAULT_CHILLER. Returns the weather frame with result columns added.
+    """
+    c = {**DEFAULT_CHILLER, **(chiller or {})}
+    dt_water = design.get('dt_water', 10.0)
+
+    if isinstance(it_load_mw, dict):
+        load = weather['site'].map(it_load_mw).to_numpy(dtype=np.float64)
+    else:
+        load = np.broadcast_to(np.asarray(it_load_mw, dtype=np.float64), len(weather)).copy()
+    if 'it_load_fraction' in weather:
+        load = load * weather['it_load_fraction'].to_numpy(dtype=np.float64)
+
+    if CONDENSER_SOURCE[condenser] not in weather:
+        raise ValueError(f"condenser={condenser!r} needs a {CONDENSER_SOURCE[condenser]!r} weather column")
+    source = weather[CONDENSER_SOURCE[condenser]].to_numpy(dtype=np.float64)
+    if condenser != 'water':
+        source = source + c['condenser_approach_k']
+
+    # Free cooling share of the FW return -> supply temperature drop
+    t_return = c['supply_temp_c'] + dt_water
+    free_fraction = np.clip((t_return - (source + c['hx_approach_k'])) / dt_water, 0.0, 1.0)
+    chiller_fraction = 1.0 - free_fraction
+
+    cop = chiller_cop(c['supply_temp_c'] - c['evap_approach_k'], source + c['cond_lift_k'],
+                      c['carnot_fraction'], c['min_cop'], c['max_cop'])
+    heat_kw = load * 1000.0
+    compressor_kw = chiller_fraction * heat_kw / cop
+
+    base = fw_fan_cooling(load, **design)
+    # The source loop also rejects the compressor heat
+    source_pump_kw = base['source_pump_power_kw'] * (1.0 + np.divide(
+        compressor_kw, heat_kw, out=np.zeros_like(heat_kw), where=heat_kw > 0))
+    cooling_kw = base['fan_power_kw'] + base['pump_power_kw'] + source_pump_kw + compressor_kw
+
+    out = weather.copy()
+    out['it_load_mw'] = load
+    out['free_fraction'] = free_fraction
+    out['mode'] = np.select([chiller_fraction <= 0.0, free_fraction <= 0.0], ['free', 'mechanical'], 'partial')
+    out['cop'] = cop
+    out['fan_power_kw'] = base['fan_power_kw']
+    out['pump_power_kw'] = base['pump_power_kw']
+    out['source_pump_power_kw'] = source_pump_kw
+    out['compressor_power_kw'] = compressor_kw
+    out['cooling_power_mw'] = cooling_kw / 1000.0
+    out['cooling_load_mw'] = (heat_kw + compressor_kw) / 1000.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['pue'] = (load + out['cooling_power_mw'].to_numpy()) / load
+    return out
+
+
+def annual_summary(hourly):
+    """Per-site annual energy, energy-weighted PUE, peaks and switchover hours."""
+    mode = hourly['mode'].to_numpy()
+    g = hourly.assign(
+        compressor_power_mw=hourly['compressor_power_kw'] / 1000.0,
+        free=mode == 'free', partial=mode == 'partial', mechanical=mode == 'mechanical',
+    ).groupby('site', sort=False)
+    summary = g.agg(
+        hours=('hour', 'size'),
+        it_energy_mwh=('it_load_mw', 'sum'),
+        cooling_energy_mwh=('cooling_power_mw', 'sum'),
+        compressor_energy_mwh=('compressor_power_mw', 'sum'),
+        peak_cooling_power_mw=('cooling_power_mw', 'max'),
+        peak_cooling_load_mw=('cooling_load_mw', 'max'),
+        peak_pue=('pue', 'max'),
+        free_hours=('free', 'sum'),
+        partial_hours=('partial', 'sum'),
+        mechanical_hours=('mechanical', 'sum'),
+    )
+    summary['annual_pue'] = (summary['it_energy_mwh'] + summary['cooling_energy_mwh']) / summary['it_energy_mwh']
+    return summary.reset_index()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Hourly FW + fan cooling simulation with chiller switchover.")
+    parser.add_argument('weather', nargs='*', help="hourly weather CSV(s)")
+    parser.add_argument('--synthetic', type=int, metavar='N_SITES', help="use generated weather for N sites")
+    parser.add_argument('--it-load', type=float, default=360.0, help="IT load (MW)")
+    parser.add_argument('--condenser', choices=list(CONDENSER_SOURCE), default='water')
+    parser.add_argument('--out', help="write the hourly table (.parquet or .csv)")
+    parser.add_argument('--summary-out', default='hourly_summary.csv')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        weather = synthetic_weather(args.synthetic)
+    elif args.weather:
+        weather = load_weather(args.weather)
+    else:
+        parser.error("give weather CSV(s) or --synthetic N")
+
+    start = time.perf_counter()
+    hourly = simulate_hourly(weather, it_load_mw=args.it_load, condenser=args.condenser)
+    summary = annual_summary(hourly)
+    elapsed = time.perf_counter() - start
+
+    print(f"Simulated {weather['site'].nunique()} sites x {len(weather) // max(weather['site'].nunique(), 1)} h "
+          f"({len(weather):,} rows) in {elapsed:.2f}s")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    summary.to_csv(args.summary_out, index=False)
+    print(f"Saved to {args.summary_out}")
+    if args.out:
+        if args.out.endswith('.parquet'):
+            hourly.to_parquet(args.out, index=False)
+        else:
+            hourly.to_csv(args.out, index=False)
+        print(f"Saved hourly results to {args.out}")
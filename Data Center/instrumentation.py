@@ -0,0 +1,275 @@
+"""
+Stage timing, memory and counter instrumentation with a JSON run report.
+
+Off by default; every call below is then a single `None` check. Turn it on
+for a run with environment variables (no code change in the scripts):
+
+    DC_RUN_REPORT=map_report.json python map_visualization_interactive.py
+    DC_RUN_REPORT=geo.json DC_TRACE_MEMORY=1 DC_PROFILE=hottest python geocode_comprehensive.py
+
+  DC_RUN_REPORT    path of the JSON report, written when the process exits
+  DC_TRACE_MEMORY  1 -> tracemalloc peak per stage (slows allocation-heavy code)
+  DC_PROFILE       'hottest' -> cProfile every top-level stage and keep the
+                   slowest one; or a stage name to profile only that stage.
+                   The .prof file is written next to the report (snakeviz,
+                   `python -m pstats`), and its top functions go in the report.
+
+Instrumenting code:
+
+    from instrumentation import count, lap, stage
+
+    with stage('encode'):            # context manager; nested stages become 'parent/encode'
+        ...
+
+    @stage('load_plant_locations')   # decorator
+    def load_plant_locations(...): ...
+
+    lap('phase1_zip')                # linear scripts: ends the previous lap, starts this one
+    count('geocoder_calls')          # counters (thread-safe)
+    count('rows', len(df))
+
+Per stage the report holds calls, wall and CPU seconds, RSS at exit, peak RSS
+so far and (with DC_TRACE_MEMORY) the peak traced allocation.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (MB)."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def current_rss_mb():
+    """Current resident set size (MB), or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Frame:
+    __slots__ = ('path', 'wall', 'cpu', 'child_peak', 'profiler')
+
+    def __init__(self, path):
+        self.path = path
+        self.child_peak = 0
+        self.profiler = None
+
+
+class Run:
+    """Collected stages and counters of one instrumented run."""
+
+    def __init__(self, report_path=None, trace_memory=False, profile=None):
+        self.report_path = report_path
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.started = time.time()
+        self.start_wall = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.stack = []
+        self.lap_frame = None
+        self.profile_result = None
+        self.lock = threading.Lock()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def push(self, name):
+        parent = self.stack[-1].path + '/' if self.stack else ''
+        frame = _Frame(parent + name)
+        if self.trace_memory:
+            if self.stack:
+                # Remember the parent's peak so far before resetting it for this stage
+                self.stack[-1].child_peak = max(self.stack[-1].child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        if not self.stack and self.profile in ('hottest', name):
+            import cProfile
+            frame.profiler = cProfile.Profile()
+            frame.profiler.enable()
+        self.stack.append(frame)
+        # Start the clocks last so profiler setup isn't charged to the stage
+        frame.wall = time.perf_counter()
+        frame.cpu = time.process_time()
+        return frame
+
+    def pop(self, frame):
+        wall = time.perf_counter() - frame.wall
+        cpu = time.process_time() - frame.cpu
+        if frame.profiler is not None:
+            frame.profiler.disable()
+        peak_alloc = None
+        if self.trace_memory:
+            peak_alloc = max(frame.child_peak, tracemalloc.get_traced_memory()[1])
+        self.stack.remove(frame)
+        if self.trace_memory and self.stack:
+            self.stack[-1].child_peak = max(self.stack[-1].child_peak, peak_alloc)
+
+        s = self.stages.get(frame.path)
+        if s is None:
+            s = self.stages[frame.path] = {'stage': frame.path, 'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0,
+                                           'max_seconds': 0.0}
+        s['calls'] += 1
+        s['seconds'] += wall
+        s['cpu_seconds'] += cpu
+        s['max_seconds'] = max(s['max_seconds'], wall)
+        s['rss_mb'] = current_rss_mb()
+        s['peak_rss_mb'] = peak_rss_mb()
+        if peak_alloc is not None:
+            s['peak_alloc_mb'] = max(s.get('peak_alloc_mb', 0.0), peak_alloc / 1e6)
+        if frame.profiler is not None and (self.profile_result is None or wall > self.profile_result[1]):
+            self.profile_result = (frame.path, wall, frame.profiler)
+
+    def count(self, name, n):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        report = {
+            'script': os.path.basename(sys.argv[0]) if sys.argv else None,
+            'argv': sys.argv[1:],
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'wall_seconds': time.perf_counter() - self.start_wall,
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': list(self.stages.values()),
+            'counters': dict(self.counters),
+        }
+        if self.trace_memory:
+            report['peak_alloc_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        if self.profile_result is not None:
+            report['profile'] = self._profile_summary()
+        return report
+
+    def _profile_summary(self, top=15):
+        import pstats
+
+        path, wall, profiler = self.profile_result
+        summary = {'stage': path, 'seconds': wall}
+        if self.report_path:
+            summary['file'] = os.path.splitext(self.report_path)[0] + '.prof'
+            profiler.dump_stats(summary['file'])
+        stats = pstats.Stats(profiler).stats
+        rows = sorted(stats.items(), key=lambda kv: kv[1][3], reverse=True)[:top]
+        summary['top_cumulative'] = [
+            {'function': f"{os.path.basename(fn)}:{line}({name})", 'calls': nc, 'tottime': tt, 'cumtime': ct}
+            for (fn, line, name), (cc, nc, tt, ct, _) in rows
+        ]
+        return summary
+
+    def write_report(self, path=None):
+        path = path or self.report_path
+        close_lap()
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+
+_run = None
+
+
+class _Stage:
+    """Context manager and decorator; does nothing while instrumentation is off."""
+    __slots__ = ('name', 'frame')
+
+    def __init__(self, name):
+        self.name = name
+        self.frame = None
+
+    def __enter__(self):
+        if _run is not None:
+            self.frame = _run.push(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        if self.frame is not None:
+            frame, self.frame = self.frame, None
+            if _run is not None:
+                _run.pop(frame)
+        return False
+
+    def __call__(self, fn):
+        name = self.name
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _run is None:
+                return fn(*args, **kwargs)
+            frame = _run.push(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _run.pop(frame)
+        return wrapper
+
+
+def stage(name):
+    """Time a block (`with stage(...)`) or a function (`@stage(...)`)."""
+    return _Stage(name)
+
+
+def lap(name):
+    """End the current lap stage (if any) and start `name`, for straight-line scripts."""
+    if _run is None:
+        return
+    close_lap()
+    _run.lap_frame = _run.push(name)
+
+
+def close_lap():
+    if _run is not None and _run.lap_frame is not None:
+        frame, _run.lap_frame = _run.lap_frame, None
+        if frame in _run.stack:
+            _run.pop(frame)
+
+
+def count(name, n=1):
+    """Add `n` to counter `name`."""
+    if _run is not None:
+        _run.count(name, n)
+
+
+def enabled():
+    return _run is not None
+
+
+def enable(report_path=None, trace_memory=False, profile=None, write_at_exit=True):
+    """Start collecting; with `report_path` the JSON report is written when the process exits."""
+    global _run
+    _run = Run(report_path, trace_memory=trace_memory, profile=profile)
+    if report_path and write_at_exit:
+        atexit.register(_write_at_exit, _run)
+    return _run
+
+
+def disable():
+    """Stop collecting and return the finished Run (or None)."""
+    global _run
+    run, _run = _run, None
+    if run is not None and run.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return run
+
+
+def report():
+    return _run.report() if _run is not None else None
+
+
+def _write_at_exit(run):
+    if _run is run:
+        path = run.write_report()
+        print(f"Run report written to {path}", file=sys.stderr)
+
+
+if os.environ.get('DC_RUN_REPORT'):
+    enable(os.environ['DC_RUN_REPORT'],
+           trace_memory=os.environ.get('DC_TRACE_MEMORY', '') not in ('', '0'),
+           profile=os.environ.get('DC_PROFILE') or None)
@@ -0,0 +1,185 @@
+"""
+Compact columnar encoding for the data embedded in data_centers_map_interactive.html.
+
+The map used to embed `json.dumps(df.to_dict('records'))` for six layers, which
+repeats every key ('Plant Name', 'Longitude', 'nuclear_capacity_mw', ...) on
+every record and prints floats at full precision. Here each layer is encoded
+column by column:
+
+  lon / lat / cap  -> float32 little-endian arrays, base64 (plants sorted by capacity, desc)
+  State / City / Provider -> dictionary encoded (unique values + uint16 codes)
+  names, addresses -> plain string arrays
+  lod              -> per zoom level, the grid cell (2, 1, 0.5 degree, nested) of
+                      every plant, so the browser can sum capacity per cell
+
+The whole payload can additionally be gzip'ed + base64'ed; the browser inflates
+it with the native DecompressionStream API (DECODER_JS below).
+
+    python map_payload.py      # size / decode-time comparison against the old records format
+"""
+import base64
+import gzip
+import json
+
+import numpy as np
+
+
+# Nested lat/lon grid sizes (degrees) used for level-of-detail clustering, coarse -> fine
+LOD_CELL_DEGREES = (2.0, 1.0, 0.5)
+
+
+def _b64(arr, dtype):
+    return base64.b64encode(np.ascontiguousarray(arr, dtype=dtype).tobytes()).decode('ascii')
+
+
+def _dict_encode(values):
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(values).astype(object).fillna('').astype(str), sort=True)
+    dtype = '<u2' if len(uniques) < 65536 else '<u4'
+    return {'dict': list(uniques), 'codes': _b64(codes, dtype), 'width': np.dtype(dtype).itemsize}
+
+
+def _lod_cells(lat, lon, cell_degrees):
+    """Grid cell code per plant for each LOD level (codes are dense 0..ncells-1)."""
+    import pandas as pd
+
+    levels = []
+    for deg in cell_degrees:
+        key = np.floor(lat / deg).astype(np.int64) * 100000 + np.floor(lon / deg).astype(np.int64)
+        codes, uniques = pd.factorize(key)
+        dtype = '<u2' if len(uniques) < 65536 else '<u4'
+        levels.append({'deg': deg, 'ncells': len(uniques), 'cells': _b64(codes, dtype),
+                       'width': np.dtype(dtype).itemsize})
+    return levels
+
+
+def encode_plant_layer(plants, cap_col, lod_cells=LOD_CELL_DEGREES):
+    """
+    Columnar encoding of one plant category (rows must already have coordinates).
+
+    Rows are sorted by capacity, largest first, so the browser can turn a
+    minimum-capacity filter into a prefix slice found by binary search.
+    """
+    plants = plants.sort_values(cap_col, ascending=False, kind='stable')
+    lat = plants['Latitude'].to_numpy(dtype=np.float64)
+    lon = plants['Longitude'].to_numpy(dtype=np.float64)
+    return {
+        'n': len(plants),
+        'lon': _b64(plants['Longitude'], '<f4'),
+        'lat': _b64(plants['Latitude'], '<f4'),
+        'cap': _b64(plants[cap_col].fillna(0), '<f4'),
+        'name': plants['Plant Name'].fillna('').astype(str).tolist(),
+        'city': _dict_encode(plants['City']),
+        'state': _dict_encode(plants['State']),
+        'lod': _lod_cells(lat, lon, lod_cells) if lod_cells else [],
+    }
+
+
+def encode_dc_layer(dcs, pue_col=None):
+    """Data-center layer; `pue_col` (e.g. site_pue.py's annual_pue) adds a float32 'pue' column."""
+    layer = {
+        'n': len(dcs),
+        'lon': _b64(dcs['Longitude'], '<f4'),
+        'lat': _b64(dcs['Latitude'], '<f4'),
+        'name': dcs['Data Center Name'].fillna('').astype(str).tolist(),
+        'provider': _dict_encode(dcs['Provider']),
+        'address': dcs['Address'].fillna('').astype(str).tolist(),
+    }
+    if pue_col is not None and pue_col in dcs:
+        layer['pue'] = _b64(dcs[pue_col], '<f4')
+    return layer
+
+
+def build_payload(layers, compress=True):
+    """Serialize {layer_name: encoded_layer}; returns (payload_string, is_compressed)."""
+    raw = json.dumps(layers, separators=(',', ':'))
+    if not compress:
+        return raw, False
+    packed = base64.b64encode(gzip.compress(raw.encode('utf-8'), compresslevel=9, mtime=0)).decode('ascii')
+    return packed, True
+
+
+# Browser-side decoder. `decodeMapData()` returns a Promise of
+# {layer: {n, lon: Float32Array, lat, cap, pue, name: [...], city: {dict, codes}, ...}}
+DECODER_JS = """
+        function b64Bytes(s) {
+            const bin = atob(s);
+            const out = new Uint8Array(bin.length);
+            for (let i = 0; i < bin.length; i++) out[i] = bin.charCodeAt(i);
+            return out;
+        }
+        function decodeColumns(layers) {
+            for (const key in layers) {
+                const L = layers[key];
+                for (const col of ['lon', 'lat', 'cap', 'pue']) {
+                    if (typeof L[col] === 'string') L[col] = new Float32Array(b64Bytes(L[col]).buffer);
+                }
+                for (const col of ['city', 'state', 'provider']) {
+                    if (L[col] && typeof L[col].codes === 'string') {
+                        const buf = b64Bytes(L[col].codes).buffer;
+                        L[col].codes = L[col].width === 4 ? new Uint32Array(buf) : new Uint16Array(buf);
+                    }
+                }
+                for (const level of (L.lod || [])) {
+                    if (typeof level.cells === 'string') {
+                        const buf = b64Bytes(level.cells).buffer;
+                        level.cells = level.width === 4 ? new Uint32Array(buf) : new Uint16Array(buf);
+                    }
+                }
+            }
+            return layers;
+        }
+        async function decodeMapData(payload, compressed) {
+            if (!compressed) return decodeColumns(JSON.parse(payload));
+            const stream = new Blob([b64Bytes(payload)]).stream().pipeThrough(new DecompressionStream('gzip'));
+            const text = await new Response(stream).text();
+            return decodeColumns(JSON.parse(text));
+        }
+"""
+
+
+def legacy_records_json(layers_frames):
+    """The old embedding: {name: json.dumps(df.to_dict('records'))} concatenated."""
+    return ''.join(json.dumps(df.to_dict('records')) for df in layers_frames.values())
+
+
+if __name__ == "__main__":
+    import time
+
+    from plant_data import CAPACITY_COLUMNS, load_data_centers, load_plant_locations
+
+    # Full (non-compact) frames: the records format being compared against was built from these
+    plant_locations = load_plant_locations(verbose=False, compact=False)
+    dcs = load_data_centers(compact=False).dropna(subset=['Latitude', 'Longitude'])
+
+    frames, layers = {}, {}
+    for cat, col in CAPACITY_COLUMNS.items():
+        p = plant_locations[plant_locations[col] > 0]
+        frames[cat] = p[['Longitude', 'Latitude', 'Plant Name', 'City', 'State', col]].fillna(0)
+        layers[cat] = encode_plant_layer(p, col)
+    frames['dc'] = dcs[['Longitude', 'Latitude', 'Data Center Name', 'Provider', 'Address']].fillna('')
+    layers['dc'] = encode_dc_layer(dcs)
+
+    def timed(fn, repeat=5):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    legacy = legacy_records_json(frames)
+    columnar, _ = build_payload(layers, compress=False)
+    packed, _ = build_payload(layers, compress=True)
+
+    legacy_parts = [json.dumps(df.to_dict('records')) for df in frames.values()]
+    t_legacy = timed(lambda: [json.loads(s) for s in legacy_parts])
+    t_columnar = timed(lambda: json.loads(columnar))
+    t_packed = timed(lambda: json.loads(gzip.decompress(base64.b64decode(packed))))
+
+    print(f"{'format':<22}{'bytes':>12}{'vs legacy':>11}{'decode (py)':>14}")
+    for label, size, t in [('records JSON (old)', len(legacy), t_legacy),
+                           ('columnar JSON', len(columnar), t_columnar),
+                           ('columnar gzip+base64', len(packed), t_packed)]:
+        print(f"{label:<22}{size:>12,}{size / len(legacy):>10.1%}{t * 1000:>12.1f}ms")
@@ -1,207 +1,129 @@
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import json
-
-# State name to abbreviation mapping
-state_abbrev = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
-    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
-    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
-    'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO',
-    'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
-    'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH',
-    'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
-    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
-    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY',
-    'District of Columbia': 'DC'
-}
-
-print("Loading data files...")
-
-# Read the geocoded data center CSV file
-df = pd.read_csv('datacenters_with_coords.csv')
-# Extract state from address for state mapping
-df['State'] = df['Address'].str.extract(r',\s*([A-Z]{2})[,\s]', expand=False)
-df['State_Code'] = df['State']
-
-# Load Power Plant location data (EIA-860)
-plant_df = pd.read_excel('eia8602024/2___Plant_Y2024.xlsx', header=1)
-print(f"Loaded {len(plant_df)} power plants")
-
-# Load Generator data
-gen_df = pd.read_excel('eia8602024/3_1_Generator_Y2024.xlsx', header=1)
-print(f"Loaded {len(gen_df)} generators")
-
-# Load Wind data
-wind_df = pd.read_excel('eia8602024/3_2_Wind_Y2024.xlsx', header=1)
-print(f"Loaded {len(wind_df)} wind generators")
-
-# Load Solar data
-solar_df = pd.read_excel('eia8602024/3_3_Solar_Y2024.xlsx', header=1)
-print(f"Loaded {len(solar_df)} solar generators")
-
-
-print("\nProcessing power plant data...")
-
-# Clean plant location data
-plant_df['Latitude'] = pd.to_numeric(plant_df['Latitude'], errors='coerce')
-plant_df['Longitude'] = pd.to_numeric(plant_df['Longitude'], errors='coerce')
-plant_df = plant_df.dropna(subset=['Latitude', 'Longitude'])
-
-# Process Generator data (Split into Nuclear, Gas, and Others)
-gen_df['Nameplate Capacity (MW)'] = pd.to_numeric(gen_df['Nameplate Capacity (MW)'], errors='coerce')
-
-# Nuclear
-nuc_df = gen_df[gen_df['Energy Source 1'] == 'NUC']
-nuc_capacity = nuc_df.groupby('Plant Code')['Nameplate Capacity (MW)'].sum().reset_index()
-nuc_capacity.columns = ['Plant Code', 'nuclear_capacity_mw']
-
-# Gas (Natural Gas)
-# Using 'NG' for Natural Gas. 'OG' is Other Gas, but usually NG is the main one.
-gas_df = gen_df[gen_df['Energy Source 1'] == 'NG']
-gas_capacity = gas_df.groupby('Plant Code')['Nameplate Capacity (MW)'].sum().reset_index()
-gas_capacity.columns = ['Plant Code', 'gas_capacity_mw']
-
-# Other (Everything else in gen_df: Coal, Hydro, Oil, etc.)
-# We exclude NUC and NG to get "Other General"
-other_gen_df = gen_df[~gen_df['Energy Source 1'].isin(['NUC', 'NG'])]
-other_capacity = other_gen_df.groupby('Plant Code')['Nameplate Capacity (MW)'].sum().reset_index()
-other_capacity.columns = ['Plant Code', 'other_capacity_mw']
-
-
-# Process Wind data
-wind_df['Nameplate Capacity (MW)'] = pd.to_numeric(wind_df['Nameplate Capacity (MW)'], errors='coerce')
-wind_capacity = wind_df.groupby('Plant Code')['Nameplate Capacity (MW)'].sum().reset_index()
-wind_capacity.columns = ['Plant Code', 'wind_capacity_mw']
-
-# Process Solar data
-solar_df['Nameplate Capacity (MW)'] = pd.to_numeric(solar_df['Nameplate Capacity (MW)'], errors='coerce')
-solar_capacity = solar_df.groupby('Plant Code')['Nameplate Capacity (MW)'].sum().reset_index()
-solar_capacity.columns = ['Plant Code', 'solar_capacity_mw']
-
-# Merge location data with capacity data
-plant_locations = plant_df[['Plant Code', 'Plant Name', 'State', 'City', 'Latitude', 'Longitude']].copy()
-
-# Merge all capacity types
-plant_locations = plant_locations.merge(nuc_capacity, on='Plant Code', how='left')
-plant_locations = plant_locations.merge(gas_capacity, on='Plant Code', how='left')
-plant_locations = plant_locations.merge(other_capacity, on='Plant Code', how='left')
-plant_locations = plant_locations.merge(wind_capacity, on='Plant Code', how='left')
-plant_locations = plant_locations.merge(solar_capacity, on='Plant Code', how='left')
-
-# Fill NaN values with 0
-plant_locations['nuclear_capacity_mw'] = plant_locations['nuclear_capacity_mw'].fillna(0)
-plant_locations['gas_capacity_mw'] = plant_locations['gas_capacity_mw'].fillna(0)
-plant_locations['other_capacity_mw'] = plant_locations['other_capacity_mw'].fillna(0)
-plant_locations['wind_capacity_mw'] = plant_locations['wind_capacity_mw'].fillna(0)
-plant_locations['solar_capacity_mw'] = plant_locations['solar_capacity_mw'].fillna(0)
-
-# Calculate Total Capacity primarily for filtering valid plants (avoid 0 capacity)
-plant_locations['total_capacity_mw'] = (
-    plant_locations['nuclear_capacity_mw'] + 
-    plant_locations['gas_capacity_mw'] + 
-    plant_locations['other_capacity_mw'] + 
-    plant_locations['wind_capacity_mw'] + 
-    plant_locations['solar_capacity_mw']
-)
-
-# Separate into different categories
-# We define distinct sets. A plant might have multiple types (hybrid), but usually dominant.
-# For map simplicity, we can categorize by presence.
-# If a plant has >0 capacity in a category, it's included in that list.
-# This means a hybrid plant might appear as two dots (likely overplotted), or we prioritize.
-# Given the typical distinct nature (Wind farm vs Nuke plant), simple filtering is fine.
-
-nuclear_plants = plant_locations[plant_locations['nuclear_capacity_mw'] > 0].copy()
-gas_plants = plant_locations[plant_locations['gas_capacity_mw'] > 0].copy()
-wind_plants = plant_locations[plant_locations['wind_capacity_mw'] > 0].copy()
-solar_plants = plant_locations[plant_locations['solar_capacity_mw'] > 0].copy()
-
-# For "General", we mean specifically the "Other" category (Coal, Hydro, etc.)
-# Renaming 'other_capacity_mw' to be used for 'General' display
-gen_plants = plant_locations[plant_locations['other_capacity_mw'] > 0].copy()
-
-
-print(f"Found {len(nuclear_plants)} nuclear power plants")
-print(f"Found {len(gas_plants)} gas power plants")
-print(f"Found {len(gen_plants)} general (coal/hydro/other) power plants")
-print(f"Found {len(wind_plants)} wind power plants")
-print(f"Found {len(solar_plants)} solar power plants")
-
-print("\nCreating base choropleth map with px.choropleth...")
-
-# Aggregate data centers by state for the choropleth
-state_summary = df.groupby('State_Code').size().reset_index(name='Data Centers')
-state_summary['State'] = state_summary['State_Code']
-
-# Create the base choropleth map using plotly.express
-fig = px.choropleth(
-    state_summary,
-    locations='State_Code',
-    locationmode='USA-states',
-    color='Data Centers',
-    scope='usa',
-    # Custom Columbia Blue Color Scheme
-    # Light (#EDF4F9) -> Dark (#003366)
-    color_continuous_scale=[
-        '#EDF4F9', # 6. Pale Azure (Background)
-        '#D9E8F0', # 5. Sky Mist
-        '#C4D8E2', # 4. Columbia Blue (Base)
-        '#5F8EB0', # 3. Medium Blue
-        '#2C5E8A', # 2. Royal Blue
-        '#003366'  # 1. Deep Blue (Important)
-    ],
-    labels={'Data Centers': 'Number of Data Centers'},
-    title='US Data Centers and Power Plants Distribution (Interactive Filter)',
-    hover_name='State',
-    hover_data={'Data Centers': True, 'State_Code': False}
-)
-
-# Update layout
-fig.update_layout(
-    title_font_size=24,
-    title_x=0.5,
-    geo=dict(
-        showlakes=True,
-        lakecolor='rgb(255, 255, 255)'
-    ),
-    height=800,
-    showlegend=True,
-    legend=dict(
-        x=0.02,
-        y=0.98,
-        bgcolor='rgba(255, 255, 255, 0.8)',
-        bordercolor='rgba(0, 0, 0, 0.3)',
-        borderwidth=1
+"""
+Interactive map of data centers and power plants (data_centers_map_interactive.html).
+
+build_map() has no side effects beyond writing the HTML file, so it can be
+called from a notebook; plotly is only imported when a map is built. Its steps
+(state_summary, choropleth_html, plant_layer / dc_frame, page_html) are also
+the nodes of the incremental build in build_graph.py.
+
+    python map_visualization_interactive.py
+    python map_visualization_interactive.py --eia-dir eia8602023 --out map_2023.html
+"""
+import os
+
+from plant_data import CAPACITY_COLUMNS, DATA_CENTER_KEY, DATA_CENTERS_FILE, EIA_DIR, category_masks, load_data_centers, load_plant_locations
+from map_payload import DECODER_JS, build_payload, encode_dc_layer, encode_plant_layer
+from instrumentation import close_lap, count, lap
+
+OUTPUT_FILE = 'data_centers_map_interactive.html'
+# Per-site annual PUE from site_pue.py colors the data-center layer when available
+SITE_PUE_FILE = 'site_pue.csv'
+
+# Payload layer key -> plant category (plant_data.CAPACITY_COLUMNS)
+PLANT_LAYERS = {'nuc': 'nuclear', 'gas': 'gas', 'gen': 'other', 'wind': 'wind', 'solar': 'solar'}
+# Columnar, dictionary-encoded, gzip'ed payload (see map_payload.py); decoded in the browser
+EMBED_GZIP = True
+
+
+def state_summary(df):
+    """Data centers per state, the choropleth's input."""
+    summary = df.groupby('State_Code', observed=True).size().reset_index(name='Data Centers')
+    summary['State_Code'] = summary['State_Code'].astype(str)
+    summary['State'] = summary['State_Code']
+    return summary
+
+
+def choropleth_html(summary, pue_colorbar=False):
+    """The base state choropleth as an HTML page (Plotly.js from the CDN)."""
+    import plotly.express as px
+
+    # Create the base choropleth map using plotly.express
+    fig = px.choropleth(
+        summary,
+        locations='State_Code',
+        locationmode='USA-states',
+        color='Data Centers',
+        scope='usa',
+        # Custom Columbia Blue Color Scheme
+        # Light (#EDF4F9) -> Dark (#003366)
+        color_continuous_scale=[
+            '#EDF4F9', # 6. Pale Azure (Background)
+            '#D9E8F0', # 5. Sky Mist
+            '#C4D8E2', # 4. Columbia Blue (Base)
+            '#5F8EB0', # 3. Medium Blue
+            '#2C5E8A', # 2. Royal Blue
+            '#003366'  # 1. Deep Blue (Important)
+        ],
+        labels={'Data Centers': 'Number of Data Centers'},
+        title='US Data Centers and Power Plants Distribution (Interactive Filter)',
+        hover_name='State',
+        hover_data={'Data Centers': True, 'State_Code': False}
     )
-)
-
-# Prepare data as JSON for JavaScript filtering
-# IMPORTANT: Replace NaN with None so json.dumps outputs 'null' instead of 'NaN' (which is valid JS but can cause issues)
-# Or better, drop rows with missing coordinates for plotting
-nuclear_plants = nuclear_plants.dropna(subset=['Latitude', 'Longitude'])
-gas_plants = gas_plants.dropna(subset=['Latitude', 'Longitude'])
-gen_plants = gen_plants.dropna(subset=['Latitude', 'Longitude'])
-wind_plants = wind_plants.dropna(subset=['Latitude', 'Longitude'])
-solar_plants = solar_plants.dropna(subset=['Latitude', 'Longitude'])
-df_clean = df.dropna(subset=['Latitude', 'Longitude'])
-
-nuc_plants_json = nuclear_plants[['Longitude', 'Latitude', 'Plant Name', 'City', 'State', 'nuclear_capacity_mw']].fillna(0).to_dict('records')
-gas_plants_json = gas_plants[['Longitude', 'Latitude', 'Plant Name', 'City', 'State', 'gas_capacity_mw']].fillna(0).to_dict('records')
-gen_plants_json = gen_plants[['Longitude', 'Latitude', 'Plant Name', 'City', 'State', 'other_capacity_mw']].fillna(0).to_dict('records')
-wind_plants_json = wind_plants[['Longitude', 'Latitude', 'Plant Name', 'City', 'State', 'wind_capacity_mw']].fillna(0).to_dict('records')
-solar_plants_json = solar_plants[['Longitude', 'Latitude', 'Plant Name', 'City', 'State', 'solar_capacity_mw']].fillna(0).to_dict('records')
-dc_points_json = df_clean[['Longitude', 'Latitude', 'Data Center Name', 'Provider', 'Address']].fillna('').to_dict('records')
-
-total_data_centers = len(df)
-
-# Convert the figure to HTML with full Plotly.js
-base_html = fig.to_html(include_plotlyjs='cdn')
-
-# Inject our custom filter UI and JavaScript into the HTML
-filter_ui_and_script = f"""
+
+    # Update layout
+    fig.update_layout(
+        title_font_size=24,
+        title_x=0.5,
+        geo=dict(
+            showlakes=True,
+            lakecolor='rgb(255, 255, 255)'
+        ),
+        height=800,
+        showlegend=True,
+        legend=dict(
+            x=0.02,
+            y=0.98,
+            bgcolor='rgba(255, 255, 255, 0.8)',
+            bordercolor='rgba(0, 0, 0, 0.3)',
+            borderwidth=1
+        )
+    )
+    if pue_colorbar:
+        # Make room for the PUE colorbar under the state colorbar
+        fig.update_layout(coloraxis_colorbar=dict(y=1.0, yanchor='top', len=0.5))
+
+    # Convert the figure to HTML with full Plotly.js
+    return fig.to_html(include_plotlyjs='cdn')
+
+
+def dc_frame(df, site_pue_path=None):
+    """
+    Data centers with coordinates, plus `annual_pue` when a site_pue.py table
+    is given. Sites are matched on DATA_CENTER_KEY (name + address), not row
+    position, so a regenerated CSV can't shift PUE onto other sites; sites
+    missing from the table get NaN (drawn uncolored) and mismatches are reported.
+    """
+    import pandas as pd
+
+    # (plant_locations only holds plants with coordinates; data centers may lack them)
+    df_clean = df.dropna(subset=['Latitude', 'Longitude'])
+    if site_pue_path and os.path.exists(site_pue_path):
+        site_pue = pd.read_csv(site_pue_path)
+        missing = [c for c in DATA_CENTER_KEY if c not in site_pue]
+        if missing:
+            raise ValueError(f"{site_pue_path} has no {missing} column(s); regenerate it with site_pue.py")
+        site_pue = site_pue.drop_duplicates(DATA_CENTER_KEY).set_index(DATA_CENTER_KEY)['annual_pue']
+        keys = pd.MultiIndex.from_frame(df_clean[DATA_CENTER_KEY].astype(object))
+        df_clean = df_clean.assign(annual_pue=site_pue.reindex(keys).to_numpy())
+        unmatched = int(df_clean['annual_pue'].isna().sum())
+        stale = len(site_pue.index.difference(keys))
+        if unmatched or stale:
+            print(f"Warning: {site_pue_path} doesn't match the data centers: {unmatched} sites have no PUE, "
+                  f"{stale} PUE rows match no site (re-run site_pue.py)")
+    return df_clean
+
+
+def plant_layer(plant_locations, layer, mask=None):
+    """Encoded payload layer `layer` (a PLANT_LAYERS key); `mask` from category_masks() if at hand."""
+    col = CAPACITY_COLUMNS[PLANT_LAYERS[layer]]
+    if mask is None:
+        mask = plant_locations[col].to_numpy() > 0
+    return encode_plant_layer(plant_locations[mask], col)
+
+
+def page_html(base_html, map_payload, payload_compressed):
+    """Inject the filter UI, the embedded payload and the layer JavaScript into the choropleth page."""
+    filter_ui_and_script = f"""
     <div id="filter-container" style="position: fixed; bottom: 20px; left: 20px; background: white; padding: 10px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); z-index: 1000; min-width: 200px;">
         <h3 style="margin-top: 0; margin-bottom: 8px; color: #333; font-size: 14px;">🔍 Filter Power Plants</h3>
         
@@ -225,6 +147,10 @@ filter_ui_and_script = f"""
             </div>
         </div>
         
+        <div style="margin-bottom: 8px; font-size: 11px; color: #555;">
+            <label><input type="checkbox" id="lod-toggle" checked style="vertical-align: middle;"> Cluster dense layers when zoomed out</label>
+        </div>
+        
         <div style="margin-top: 6px; padding: 6px; background-color: #f0f0f0; border-radius: 4px; font-size: 11px; color: #333;">
             <strong>Current Filter:</strong> ≥ <span id="current-value">10</span> MW
         </div>
@@ -241,210 +167,253 @@ filter_ui_and_script = f"""
     </div>
     
     <script>
-        // Embedded power plant data
-        const nucPlantsData = {json.dumps(nuc_plants_json)};
-        const gasPlantsData = {json.dumps(gas_plants_json)};
-        const genPlantsData = {json.dumps(gen_plants_json)};
-        const windPlantsData = {json.dumps(wind_plants_json)};
-        const solarPlantsData = {json.dumps(solar_plants_json)};
-        const dcPointsData = {json.dumps(dc_points_json)};
+        // Embedded power plant data (columnar; see map_payload.py)
+        const MAP_PAYLOAD = "{map_payload}";
+        const MAP_PAYLOAD_COMPRESSED = {'true' if payload_compressed else 'false'};
+        {DECODER_JS}
+        const dataReady = decodeMapData(MAP_PAYLOAD, MAP_PAYLOAD_COMPRESSED);
+        let mapData = null;
         
-        // Wait for the base map to load
-        setTimeout(function() {{
-            applyFilter();
-        }}, 1000);
+        // Trace styling per plant layer (same look as before)
+        const PLANT_LAYERS = [
+            {{key: 'nuc', countId: 'nuc-count', name: 'Nuclear', label: ' (Nuclear)', scale: 50,
+              color: 'rgba(255, 0, 255, 0.9)', line: {{color: 'rgba(255, 255, 255, 0.8)', width: 1}}, sizemin: 6}},
+            {{key: 'gas', countId: 'gas-count', name: 'Natural Gas / LNG', label: ' (Nat. Gas)', scale: 50,
+              color: 'rgba(0, 191, 255, 0.9)', line: {{color: 'rgba(255, 255, 255, 0.8)', width: 0.5}}, sizemin: 4}},
+            {{key: 'gen', countId: 'gen-count', name: 'Other (Coal, Hydro, etc.)', label: '', scale: 50,
+              color: 'rgba(255, 69, 0, 0.9)', line: {{color: 'rgba(255, 255, 255, 0.8)', width: 0.5}}, sizemin: 4}},
+            {{key: 'wind', countId: 'wind-count', name: 'Wind Power Plants', label: ' (Wind)', scale: 20,
+              color: 'rgba(50, 205, 50, 0.9)', line: {{color: 'rgba(255, 255, 255, 0.5)', width: 0.5}}, sizemin: 4}},
+            {{key: 'solar', countId: 'solar-count', name: 'Solar Power Plants', label: ' (Solar)', scale: 20,
+              color: 'rgba(255, 215, 0, 0.9)', line: {{color: 'rgba(255, 255, 255, 0.5)', width: 0.5}}, sizemin: 4}}
+        ];
         
-        function addPowerPlants(minCapacity) {{
-            // Filter data
-            // Note: DC CSV doesn't have capacity, so we show all of them or could enable separate toggle.
-            // For now, we show all available valid points.
-            const filteredNuc = nucPlantsData.filter(p => p.nuclear_capacity_mw >= minCapacity);
-            const filteredGas = gasPlantsData.filter(p => p.gas_capacity_mw >= minCapacity);
-            const filteredGen = genPlantsData.filter(p => p.other_capacity_mw >= minCapacity);
-            const filteredWind = windPlantsData.filter(p => p.wind_capacity_mw >= minCapacity);
-            const filteredSolar = solarPlantsData.filter(p => p.solar_capacity_mw >= minCapacity);
-            const filteredDC = dcPointsData; // Show all DCs as they don't have MW data in this CSV
-            
-            // Update stats
-            document.getElementById('nuc-count').textContent = filteredNuc.length;
-            document.getElementById('gas-count').textContent = filteredGas.length;
-            document.getElementById('gen-count').textContent = filteredGen.length;
-            document.getElementById('wind-count').textContent = filteredWind.length;
-            document.getElementById('solar-count').textContent = filteredSolar.length;
-            document.getElementById('dc-count').textContent = filteredDC.length;
-            
-            // Create power plant traces
-            const newTraces = [];
-            
-            // Nuclear Power Plants
-            if (filteredNuc.length > 0) {{
-                newTraces.push({{
-                    type: 'scattergeo',
-                    locationmode: 'USA-states',
-                    lon: filteredNuc.map(p => p.Longitude),
-                    lat: filteredNuc.map(p => p.Latitude),
-                    text: filteredNuc.map(p => 
-                        `${{p['Plant Name']}}<br>${{p.City}}, ${{p.State}}<br>${{p.nuclear_capacity_mw.toFixed(1)}} MW (Nuclear)`
-                    ),
-                    marker: {{
-                        size: filteredNuc.map(p => p.nuclear_capacity_mw / 50),
-                        color: 'rgba(255, 0, 255, 0.9)', // Vivid Magenta
-                        line: {{
-                            color: 'rgba(255, 255, 255, 0.8)',
-                            width: 1
-                        }},
-                        sizemode: 'area',
-                        sizemin: 6
-                    }},
-                    name: 'Nuclear',
-                    hovertemplate: '<b>%{{text}}</b><extra></extra>'
-                }});
+        // Plant layers are sorted by capacity (descending) in the generator, so
+        // "capacity >= threshold" is always a prefix [0, k) found by binary search.
+        // Full per-layer arrays are built once; a filter change only slices them
+        // and restyles the persistent plant traces (the DC trace is never touched).
+        const layerArrays = {{}};
+        let mapDiv = null;
+        let traceIndex = null;  // layer key -> trace index in mapDiv.data
+        let pendingCapacity = null;
+        let currentCapacity = 0;
+        
+        // Level of detail: while zoomed out, layers with more than LOD_MIN_POINTS
+        // visible plants are drawn as one marker per grid cell (capacity summed,
+        // capacity-weighted centroid). The cells are precomputed per plant in the
+        // payload (2, 1, 0.5 degree); LOD_MAX_SCALE[l] is the geo projection
+        // scale up to which level l is used. Past the last one plants are drawn
+        // individually.
+        const LOD_MAX_SCALE = [2, 4, 8];
+        const LOD_MIN_POINTS = 1000;
+        let lodLevel = -1;
+        
+        function countAtLeast(cap, minCapacity) {{
+            // cap is sorted descending: first index with cap[i] < minCapacity
+            let lo = 0, hi = cap.length;
+            while (lo < hi) {{
+                const mid = (lo + hi) >>> 1;
+                if (cap[mid] >= minCapacity) lo = mid + 1; else hi = mid;
             }}
-            
-            // Gas / LNG Power Plants
-            if (filteredGas.length > 0) {{
-                newTraces.push({{
-                    type: 'scattergeo',
-                    locationmode: 'USA-states',
-                    lon: filteredGas.map(p => p.Longitude),
-                    lat: filteredGas.map(p => p.Latitude),
-                    text: filteredGas.map(p => 
-                        `${{p['Plant Name']}}<br>${{p.City}}, ${{p.State}}<br>${{p.gas_capacity_mw.toFixed(1)}} MW (Nat. Gas)`
-                    ),
-                    marker: {{
-                        size: filteredGas.map(p => p.gas_capacity_mw / 50),
-                        color: 'rgba(0, 191, 255, 0.9)', // Deep Sky Blue
-                        line: {{
-                            color: 'rgba(255, 255, 255, 0.8)',
-                            width: 0.5
-                        }},
-                        sizemode: 'area',
-                        sizemin: 4
-                    }},
-                    name: 'Natural Gas / LNG',
-                    hovertemplate: '<b>%{{text}}</b><extra></extra>'
-                }});
+            return lo;
+        }}
+        
+        function buildLayerArrays(style, L) {{
+            const text = new Array(L.n), size = new Array(L.n);
+            for (let i = 0; i < L.n; i++) {{
+                text[i] = `${{L.name[i]}}<br>${{L.city.dict[L.city.codes[i]]}}, ${{L.state.dict[L.state.codes[i]]}}<br>${{L.cap[i].toFixed(1)}} MW${{style.label}}`;
+                size[i] = L.cap[i] / style.scale;
             }}
-            
-            // General power plants (Others)
-            if (filteredGen.length > 0) {{
-                newTraces.push({{
-                    type: 'scattergeo',
-                    locationmode: 'USA-states',
-                    lon: filteredGen.map(p => p.Longitude),
-                    lat: filteredGen.map(p => p.Latitude),
-                    text: filteredGen.map(p => 
-                        `${{p['Plant Name']}}<br>${{p.City}}, ${{p.State}}<br>${{p.other_capacity_mw.toFixed(1)}} MW`
-                    ),
-                    marker: {{
-                        size: filteredGen.map(p => p.other_capacity_mw / 50),
-                        color: 'rgba(255, 69, 0, 0.9)', // Red-Orange (Vivid)
-                        line: {{
-                            color: 'rgba(255, 255, 255, 0.8)',
-                            width: 0.5
-                        }},
-                        sizemode: 'area',
-                        sizemin: 4
-                    }},
-                    name: 'Other (Coal, Hydro, etc.)',
-                    hovertemplate: '<b>%{{text}}</b><extra></extra>'
-                }});
+            return {{lon: Array.from(L.lon), lat: Array.from(L.lat), text: text, size: size}};
+        }}
+        
+        function currentLodLevel() {{
+            if (!document.getElementById('lod-toggle').checked) return -1;
+            const geo = mapDiv._fullLayout && mapDiv._fullLayout.geo;
+            const scale = (geo && geo.projection && geo.projection.scale) || 1;
+            for (let l = 0; l < LOD_MAX_SCALE.length; l++) {{
+                if (scale < LOD_MAX_SCALE[l]) return l;
             }}
-            
-            // Wind power plants
-            if (filteredWind.length > 0) {{
-                newTraces.push({{
-                    type: 'scattergeo',
-                    locationmode: 'USA-states',
-                    lon: filteredWind.map(p => p.Longitude),
-                    lat: filteredWind.map(p => p.Latitude),
-                    text: filteredWind.map(p => 
-                        `${{p['Plant Name']}}<br>${{p.City}}, ${{p.State}}<br>${{p.wind_capacity_mw.toFixed(1)}} MW (Wind)`
-                    ),
-                    marker: {{
-                        size: filteredWind.map(p => p.wind_capacity_mw / 20),
-                        color: 'rgba(50, 205, 50, 0.9)', // Lime Green
-                        line: {{
-                            color: 'rgba(255, 255, 255, 0.5)',
-                            width: 0.5
-                        }},
-                        sizemode: 'area',
-                        sizemin: 4
-                    }},
-                    name: 'Wind Power Plants',
-                    hovertemplate: '<b>%{{text}}</b><extra></extra>'
-                }});
+            return -1;
+        }}
+        
+        function clusterView(style, L, A, k, level) {{
+            // Sum the top-k plants per grid cell; single-plant cells keep their own marker
+            const lod = L.lod[level], m = lod.ncells;
+            const cap = new Float64Array(m), wlat = new Float64Array(m), wlon = new Float64Array(m);
+            const count = new Uint32Array(m), first = new Int32Array(m);
+            for (let i = 0; i < k; i++) {{
+                const c = lod.cells[i], w = L.cap[i];
+                if (count[c] === 0) first[c] = i;
+                count[c]++;
+                cap[c] += w;
+                wlat[c] += w * L.lat[i];
+                wlon[c] += w * L.lon[i];
             }}
-            
-            // Solar power plants
-            if (filteredSolar.length > 0) {{
-                newTraces.push({{
-                    type: 'scattergeo',
-                    locationmode: 'USA-states',
-                    lon: filteredSolar.map(p => p.Longitude),
-                    lat: filteredSolar.map(p => p.Latitude),
-                    text: filteredSolar.map(p => 
-                        `${{p['Plant Name']}}<br>${{p.City}}, ${{p.State}}<br>${{p.solar_capacity_mw.toFixed(1)}} MW (Solar)`
-                    ),
-                    marker: {{
-                        size: filteredSolar.map(p => p.solar_capacity_mw / 20),
-                        color: 'rgba(255, 215, 0, 0.9)', // Gold (Vivid)
-                        line: {{
-                            color: 'rgba(255, 255, 255, 0.5)',
-                            width: 0.5
-                        }},
-                        sizemode: 'area',
-                        sizemin: 4
-                    }},
-                    name: 'Solar Power Plants',
-                    hovertemplate: '<b>%{{text}}</b><extra></extra>'
-                }});
+            const V = {{lon: [], lat: [], text: [], size: []}};
+            for (let c = 0; c < m; c++) {{
+                if (count[c] === 0) continue;
+                if (count[c] === 1 || cap[c] <= 0) {{
+                    const i = first[c];
+                    V.lon.push(A.lon[i]); V.lat.push(A.lat[i]); V.text.push(A.text[i]); V.size.push(A.size[i]);
+                    continue;
+                }}
+                V.lon.push(wlon[c] / cap[c]);
+                V.lat.push(wlat[c] / cap[c]);
+                V.text.push(`${{count[c]}} plants (${{lod.deg}}° cell)<br>${{cap[c].toFixed(1)}} MW total${{style.label}}<br><i>zoom in for individual plants</i>`);
+                V.size.push(cap[c] / style.scale);
             }}
-
-            // Data Centers (Black Squares)
-            if (filteredDC.length > 0) {{
-                newTraces.push({{
-                    type: 'scattergeo',
-                    locationmode: 'USA-states',
-                    lon: filteredDC.map(p => p.Longitude),
-                    lat: filteredDC.map(p => p.Latitude),
-                    text: filteredDC.map(p => 
-                        `<b>${{p['Data Center Name']}}</b><br>${{p.Provider}}<br>${{p.Address}}`
-                    ),
-                    marker: {{
-                        size: 6,
-                        symbol: 'square',
-                        color: 'black',
-                        line: {{
-                            color: 'white',
-                            width: 1
-                        }}
-                    }},
-                    name: 'Individual Data Centers',
-                    hovertemplate: '%{{text}}<extra></extra>'
-                }});
+            return V;
+        }}
+        
+        function layerView(style, k, level) {{
+            const L = mapData[style.key], A = layerArrays[style.key];
+            if (level >= 0 && k > LOD_MIN_POINTS && L.lod && L.lod[level]) {{
+                return clusterView(style, L, A, k, level);
             }}
-            
-            // Get the map element (Plotly creates a div with class 'plotly-graph-div')
-            const mapDiv = document.querySelector('.plotly-graph-div');
-            
-            if (mapDiv && mapDiv.data) {{
-                // Delete existing power plant traces (keep only the choropleth which is trace 0)
-                const tracesToDelete = [];
-                for (let i = 1; i < mapDiv.data.length; i++) {{
-                    tracesToDelete.push(i);
-                }}
-                if (tracesToDelete.length > 0) {{
-                    Plotly.deleteTraces(mapDiv, tracesToDelete);
+            return {{lon: A.lon.slice(0, k), lat: A.lat.slice(0, k), text: A.text.slice(0, k), size: A.size.slice(0, k)}};
+        }}
+        
+        function plantTrace(style, V, k) {{
+            return {{
+                type: 'scattergeo',
+                locationmode: 'USA-states',
+                lon: V.lon,
+                lat: V.lat,
+                text: V.text,
+                marker: {{
+                    size: V.size,
+                    color: style.color,
+                    line: style.line,
+                    sizemode: 'area',
+                    sizemin: style.sizemin
+                }},
+                name: style.name,
+                visible: k > 0,
+                hovertemplate: '<b>%{{text}}</b><extra></extra>'
+            }};
+        }}
+        
+        function dcTrace(D, idx, withPue) {{
+            const text = idx.map(i => {{
+                let t = `<b>${{D.name[i]}}</b><br>${{D.provider.dict[D.provider.codes[i]]}}<br>${{D.address[i]}}`;
+                if (withPue) t += `<br>Annual PUE: ${{D.pue[i].toFixed(3)}}`;
+                return t;
+            }});
+            // With site_pue.csv: color by annual PUE instead of uniform black
+            const marker = withPue ? {{
+                size: 7,
+                symbol: 'square',
+                color: idx.map(i => D.pue[i]),
+                colorscale: 'RdYlGn',
+                reversescale: true,
+                colorbar: {{title: {{text: 'Site PUE'}}, y: 0, yanchor: 'bottom', len: 0.45, thickness: 15}},
+                line: {{
+                    color: 'white',
+                    width: 1
                 }}
-                
-                // Add new power plant traces
-                if (newTraces.length > 0) {{
-                    Plotly.addTraces(mapDiv, newTraces);
+            }} : {{
+                size: 6,
+                symbol: 'square',
+                color: 'black',
+                line: {{
+                    color: 'white',
+                    width: 1
                 }}
+            }};
+            return {{
+                type: 'scattergeo',
+                locationmode: 'USA-states',
+                lon: idx.map(i => D.lon[i]),
+                lat: idx.map(i => D.lat[i]),
+                text: text,
+                marker: marker,
+                name: withPue || !D.pue ? 'Individual Data Centers' : 'Data Centers (no PUE)',
+                visible: idx.length > 0,
+                hovertemplate: '%{{text}}<extra></extra>'
+            }};
+        }}
+        
+        function dcTraces(D) {{
+            const all = Array.from({{length: D.n}}, (_, i) => i);
+            if (!D.pue) return [dcTrace(D, all, false)];
+            // Sites missing from site_pue.csv keep the plain black marker and no PUE line
+            const known = all.filter(i => !Number.isNaN(D.pue[i]));
+            const traces = [dcTrace(D, known, true)];
+            if (known.length < D.n) traces.push(dcTrace(D, all.filter(i => Number.isNaN(D.pue[i])), false));
+            return traces;
+        }}
+        
+        function initTraces(minCapacity) {{
+            // First render: add every layer once (choropleth stays at trace 0)
+            const traces = [];
+            traceIndex = {{}};
+            lodLevel = currentLodLevel();
+            for (const style of PLANT_LAYERS) {{
+                const L = mapData[style.key];
+                layerArrays[style.key] = buildLayerArrays(style, L);
+                const k = countAtLeast(L.cap, minCapacity);
+                document.getElementById(style.countId).textContent = k;
+                traceIndex[style.key] = mapDiv.data.length + traces.length;
+                traces.push(plantTrace(style, layerView(style, k, lodLevel), k));
             }}
+            // Data Centers (squares, colored by PUE if available) - no capacity in the CSV, always shown
+            traces.push(...dcTraces(mapData.dc));
+            document.getElementById('dc-count').textContent = mapData.dc.n;
+            Plotly.addTraces(mapDiv, traces);
         }}
         
+        function addPowerPlants(minCapacity) {{
+            currentCapacity = minCapacity;
+            if (!mapData || !mapDiv) {{
+                pendingCapacity = minCapacity;
+                return;
+            }}
+            if (traceIndex === null) {{
+                initTraces(minCapacity);
+                return;
+            }}
+            const upd = {{lon: [], lat: [], text: [], 'marker.size': [], visible: []}};
+            const indices = [];
+            lodLevel = currentLodLevel();
+            for (const style of PLANT_LAYERS) {{
+                const k = countAtLeast(mapData[style.key].cap, minCapacity);
+                document.getElementById(style.countId).textContent = k;
+                const V = layerView(style, k, lodLevel);
+                upd.lon.push(V.lon);
+                upd.lat.push(V.lat);
+                upd.text.push(V.text);
+                upd['marker.size'].push(V.size);
+                upd.visible.push(k > 0);
+                indices.push(traceIndex[style.key]);
+            }}
+            Plotly.restyle(mapDiv, upd, indices);
+        }}
+        
+        // First render once both the payload is decoded and Plotly has drawn the base map
+        const plotReady = new Promise(function(resolve) {{
+            const div = document.querySelector('.plotly-graph-div');
+            if (!div) return;
+            if (div._fullLayout && div.data) {{
+                resolve(div);
+            }} else {{
+                let done = false;
+                div.on('plotly_afterplot', function() {{
+                    if (!done) {{ done = true; resolve(div); }}
+                }});
+            }}
+        }});
+        Promise.all([dataReady, plotReady]).then(function(results) {{
+            mapData = results[0];
+            mapDiv = results[1];
+            if (pendingCapacity !== null) addPowerPlants(pendingCapacity);
+            else applyFilter();
+            // Swap between clustered and individual markers as the zoom crosses a level
+            mapDiv.on('plotly_relayout', function() {{
+                if (traceIndex !== null && currentLodLevel() !== lodLevel) addPowerPlants(currentCapacity);
+            }});
+        }});
+        
         function setFilter(value) {{
             document.getElementById('capacity-filter').value = value;
             applyFilter();
@@ -462,31 +431,111 @@ filter_ui_and_script = f"""
                 applyFilter();
             }}
         }});
+        
+        // Filtering is a slice + restyle, cheap enough to follow every keystroke
+        document.getElementById('capacity-filter').addEventListener('input', applyFilter);
+        document.getElementById('lod-toggle').addEventListener('change', function() {{
+            addPowerPlants(currentCapacity);
+        }});
     </script>
 </body>
 """
 
-# Replace the closing </body> tag with our custom content
-custom_html = base_html.replace('</body>', filter_ui_and_script)
-
-# Write the custom HTML file
-output_file = 'data_centers_map_interactive.html'
-with open(output_file, 'w', encoding='utf-8') as f:
-    f.write(custom_html)
-
-print(f"\n✅ Interactive map saved as '{output_file}'")
-print(f"Total Data Centers: {total_data_centers}")
-print(f"\nPower Plants Loaded:")
-print(f"  Nuclear: {len(nuclear_plants)}")
-print(f"  Gas/LNG: {len(gas_plants)}")
-print(f"  General (Other): {len(gen_plants)}")
-print(f"  Wind: {len(wind_plants)}")
-print(f"  Solar: {len(solar_plants)}")
-
-print(f"\n📊 Open the HTML file to use the interactive filter!")
-print(f"   Now includes Nuclear (Purple) and Gas/LNG (Blue) facilities!")
-
-print(f"\nTop 10 States by Data Center Count:")
-top_10 = state_summary.nlargest(10, 'Data Centers')
-for idx, row in top_10.iterrows():
-    print(f"  {row['State']}: {row['Data Centers']}")
+    # Replace the closing </body> tag with our custom content
+    return base_html.replace('</body>', filter_ui_and_script)
+
+
+def build_map(data_centers_path=DATA_CENTERS_FILE, eia_dir=EIA_DIR, output_file=OUTPUT_FILE,
+              site_pue_path=SITE_PUE_FILE):
+    """Build the map HTML from the geocoded data centers and an EIA-860 directory; returns the output path."""
+    print("Loading data files...")
+    lap('load_data')
+
+    # Read the geocoded data center CSV file (State_Code extracted from the address)
+    df = load_data_centers(data_centers_path)
+
+    # Plant coordinates + nameplate MW per category (EIA-860, see plant_data.py)
+    plant_locations = load_plant_locations(eia_dir)
+    count('data_centers', len(df))
+    count('plants', len(plant_locations))
+
+    # Separate into different categories
+    # We define distinct sets. A plant might have multiple types (hybrid), but usually dominant.
+    # For map simplicity, we can categorize by presence.
+    # If a plant has >0 capacity in a category, it's included in that list.
+    # This means a hybrid plant might appear as two dots (likely overplotted), or we prioritize.
+    # Given the typical distinct nature (Wind farm vs Nuke plant), simple filtering is fine.
+
+    # Boolean masks over plant_locations; rows are only materialized while encoding a layer.
+    # For "General", we mean specifically the "Other" category (Coal, Hydro, etc.)
+    masks = category_masks(plant_locations)
+
+
+    print(f"Found {masks['nuclear'].sum()} nuclear power plants")
+    print(f"Found {masks['gas'].sum()} gas power plants")
+    print(f"Found {masks['other'].sum()} general (coal/hydro/other) power plants")
+    print(f"Found {masks['wind'].sum()} wind power plants")
+    print(f"Found {masks['solar'].sum()} solar power plants")
+
+    print("\nCreating base choropleth map with px.choropleth...")
+    lap('choropleth')
+
+    # Aggregate data centers by state for the choropleth
+    summary = state_summary(df)
+    df_clean = dc_frame(df, site_pue_path)
+    has_pue = 'annual_pue' in df_clean
+    base_html = choropleth_html(summary, pue_colorbar=has_pue)
+
+    # Prepare data for JavaScript filtering
+    lap('payload')
+    if has_pue:
+        print(f"Coloring data centers by annual PUE from {site_pue_path}")
+    layers = {key: plant_layer(plant_locations, key, masks[cat]) for key, cat in PLANT_LAYERS.items()}
+    layers['dc'] = encode_dc_layer(df_clean, pue_col='annual_pue')
+    map_payload, payload_compressed = build_payload(layers, compress=EMBED_GZIP)
+
+    total_data_centers = len(df)
+
+    # Inject our custom filter UI and JavaScript into the HTML
+    lap('html')
+    custom_html = page_html(base_html, map_payload, payload_compressed)
+
+    # Write the custom HTML file
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(custom_html)
+    count('html_bytes', len(custom_html))
+    close_lap()
+
+    print(f"\n✅ Interactive map saved as '{output_file}'")
+    print(f"Total Data Centers: {total_data_centers}")
+    print(f"\nPower Plants Loaded:")
+    print(f"  Nuclear: {masks['nuclear'].sum()}")
+    print(f"  Gas/LNG: {masks['gas'].sum()}")
+    print(f"  General (Other): {masks['other'].sum()}")
+    print(f"  Wind: {masks['wind'].sum()}")
+    print(f"  Solar: {masks['solar'].sum()}")
+
+    print(f"\n📊 Open the HTML file to use the interactive filter!")
+    print(f"   Now includes Nuclear (Purple) and Gas/LNG (Blue) facilities!")
+
+    print(f"\nTop 10 States by Data Center Count:")
+    top_10 = summary.nlargest(10, 'Data Centers')
+    for idx, row in top_10.iterrows():
+        print(f"  {row['State']}: {row['Data Centers']}")
+    return output_file
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Build the interactive data-center / power-plant map.")
+    parser.add_argument('--data-centers', default=DATA_CENTERS_FILE, help="geocoded data-center CSV")
+    parser.add_argument('--eia-dir', default=EIA_DIR, help="EIA-860 year directory")
+    parser.add_argument('--site-pue', default=SITE_PUE_FILE, help="site_pue.py output used to color data centers")
+    parser.add_argument('--out', default=OUTPUT_FILE)
+    args = parser.parse_args(argv)
+    build_map(args.data_centers, args.eia_dir, args.out, args.site_pue)
+
+
+if __name__ == "__main__":
+    main()
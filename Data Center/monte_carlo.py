@@ -0,0 +1,257 @@
+"""
+Monte Carlo uncertainty analysis of the cooling / PUE models in simulation.py.
+
+The point estimates in simulation.py (fan/pump efficiency 0.70/0.75, 600 Pa /
+350 kPa / 200 kPa pressure drops, 15 K / 10 K delta T) are replaced by
+distributions. Samples are drawn and evaluated in chunks:
+
+  - every chunk gets its own child of one np.random.SeedSequence, so results
+    depend only on (seed, n, chunk_size), not on the number of workers;
+  - chunks run in a process pool and only return small accumulators
+    (histograms, sums, per-input bins), so memory is bounded by chunk_size;
+  - accumulators are merged into percentiles, moments and sensitivity indices:
+      src          standardized regression coefficient (linear, signed)
+      first_order  correlation ratio Var(E[Y | X_i]) / Var(Y) (first-order Sobol estimate)
+
+    python monte_carlo.py -n 5000000 --workers 8 --seed 42
+    python monte_carlo.py -n 1000000 --model lng_orc --set target_it_load_mw=100
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from simulation import ARCHITECTURES, evaluate
+
+# name -> (kind, *args); kinds: uniform(low, high), normal(mean, sd),
+# triangular(left, mode, right), lognormal(median, sigma)
+DEFAULT_DISTRIBUTIONS = {
+    'dt_air': ('uniform', 12.0, 18.0),
+    'dp_air': ('normal', 600.0, 60.0),
+    'fan_efficiency': ('triangular', 0.60, 0.70, 0.78),
+    'dt_water': ('uniform', 8.0, 12.0),
+    'dp_water': ('normal', 350.0, 35.0),
+    'pump_efficiency': ('triangular', 0.65, 0.75, 0.85),
+    'dp_source': ('normal', 200.0, 30.0),
+}
+DEFAULT_METRICS = ('pue', 'total_cooling_power_mw')
+PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+CHUNK_SIZE = 250_000
+PILOT_SIZE = 50_000
+HIST_BINS = 20_000
+INPUT_BINS = 50
+
+
+def sample_inputs(distributions, n, rng):
+    """{name: n draws} from `distributions`."""
+    out = {}
+    for name, (kind, *args) in distributions.items():
+        if kind == 'uniform':
+            out[name] = rng.uniform(args[0], args[1], n)
+        elif kind == 'normal':
+            out[name] = rng.normal(args[0], args[1], n)
+        elif kind == 'triangular':
+            out[name] = rng.triangular(args[0], args[1], args[2], n)
+        elif kind == 'lognormal':
+            out[name] = rng.lognormal(np.log(args[0]), args[1], n)
+        else:
+            raise ValueError(f"unknown distribution {kind!r} for {name}")
+    return out
+
+
+class _Accumulator:
+    """Mergeable streaming statistics for inputs X (p) and metrics Y (m)."""
+
+    def __init__(self, hist_edges, input_edges):
+        self.hist_edges = hist_edges        # per metric: bin edges
+        self.input_edges = input_edges      # per input: quantile bin edges
+        m, p = len(hist_edges), len(input_edges)
+        self.n = 0
+        self.hist = [np.zeros(len(e) + 1, dtype=np.int64) for e in hist_edges]  # + under/overflow
+        self.y_min = np.full(m, np.inf)
+        self.y_max = np.full(m, -np.inf)
+        self.sx = np.zeros(p)
+        self.sxx = np.zeros((p, p))
+        self.sy = np.zeros(m)
+        self.syy = np.zeros(m)
+        self.sxy = np.zeros((p, m))
+        self.bin_n = [np.zeros(len(e) + 1) for e in input_edges]
+        self.bin_sy = [np.zeros((len(e) + 1, m)) for e in input_edges]
+
+    def update(self, X, Y):
+        self.n += len(X)
+        for j, edges in enumerate(self.hist_edges):
+            self.hist[j] += np.bincount(np.searchsorted(edges, Y[:, j], side='right'), minlength=len(edges) + 1)
+        self.y_min = np.minimum(self.y_min, Y.min(axis=0))
+        self.y_max = np.maximum(self.y_max, Y.max(axis=0))
+        self.sx += X.sum(axis=0)
+        self.sxx += X.T @ X
+        self.sy += Y.sum(axis=0)
+        self.syy += (Y * Y).sum(axis=0)
+        self.sxy += X.T @ Y
+        for i, edges in enumerate(self.input_edges):
+            b = np.searchsorted(edges, X[:, i], side='right')
+            self.bin_n[i] += np.bincount(b, minlength=len(edges) + 1)
+            for j in range(Y.shape[1]):
+                self.bin_sy[i][:, j] += np.bincount(b, weights=Y[:, j], minlength=len(edges) + 1)
+
+    def merge(self, other):
+        self.n += other.n
+        for j in range(len(self.hist)):
+            self.hist[j] += other.hist[j]
+        self.y_min = np.minimum(self.y_min, other.y_min)
+        self.y_max = np.maximum(self.y_max, other.y_max)
+        self.sx += other.sx
+        self.sxx += other.sxx
+        self.sy += other.sy
+        self.syy += other.syy
+        self.sxy += other.sxy
+        for i in range(len(self.bin_n)):
+            self.bin_n[i] += other.bin_n[i]
+            self.bin_sy[i] += other.bin_sy[i]
+        return self
+
+
+def _evaluate_chunk(seed_seq, n, distributions, fixed, model, metrics, hist_edges, input_edges):
+    rng = np.random.default_rng(seed_seq)
+    draws = sample_inputs(distributions, n, rng)
+    result = evaluate({**fixed, **draws}, model=model, strict=False)
+    X = np.column_stack([draws[k] for k in distributions])
+    Y = np.column_stack([result[m].to_numpy(dtype=np.float64) for m in metrics])
+    acc = _Accumulator(hist_edges, input_edges)
+    acc.update(X, Y)
+    return acc
+
+
+def _hist_percentiles(edges, counts, y_min, y_max, q):
+    """Percentiles from a histogram with under/overflow buckets (linear inside a bin)."""
+    lo = np.concatenate([[y_min], edges])
+    hi = np.concatenate([edges, [y_max]])
+    cdf = np.cumsum(counts)
+    out = []
+    for target in np.asarray(q, dtype=np.float64) / 100.0 * cdf[-1]:
+        b = min(int(np.searchsorted(cdf, target, side='left')), len(counts) - 1)
+        before = cdf[b - 1] if b > 0 else 0
+        frac = (target - before) / counts[b] if counts[b] else 0.0
+        out.append(lo[b] + frac * (hi[b] - lo[b]))
+    return np.clip(out, y_min, y_max)
+
+
+def _summarize(acc, names, metrics, percentiles):
+    n = acc.n
+    mean_y = acc.sy / n
+    var_y = np.maximum(acc.syy / n - mean_y ** 2, 0.0)
+
+    stats = pd.DataFrame({
+        'mean': mean_y,
+        'std': np.sqrt(var_y),
+        'min': acc.y_min,
+        **{f'p{q:g}': [_hist_percentiles(acc.hist_edges[j], acc.hist[j], acc.y_min[j], acc.y_max[j], [q])[0]
+                       for j in range(len(metrics))] for q in percentiles},
+        'max': acc.y_max,
+    }, index=pd.Index(metrics, name='metric'))
+
+    mean_x = acc.sx / n
+    cov_xx = acc.sxx / n - np.outer(mean_x, mean_x)
+    cov_xy = acc.sxy / n - np.outer(mean_x, mean_y)
+    sd_x = np.sqrt(np.maximum(np.diag(cov_xx), 0.0))
+    sd_y = np.sqrt(var_y)
+    beta = np.linalg.lstsq(cov_xx, cov_xy, rcond=None)[0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        src = beta * sd_x[:, None] / sd_y[None, :]
+        corr = cov_xy / np.outer(sd_x, sd_y)
+
+    rows = []
+    for i, name in enumerate(names):
+        cnt = acc.bin_n[i]
+        used = cnt > 0
+        bin_mean = acc.bin_sy[i][used] / cnt[used][:, None]
+        between = (cnt[used][:, None] * (bin_mean - mean_y) ** 2).sum(axis=0) / n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            first_order = between / var_y
+        for j, metric in enumerate(metrics):
+            rows.append({'input': name, 'metric': metric, 'src': src[i, j],
+                         'first_order': first_order[j], 'corr': corr[i, j]})
+    sensitivity = pd.DataFrame(rows).sort_values(['metric', 'first_order'], ascending=[True, False])
+    return stats, sensitivity.reset_index(drop=True)
+
+
+def run_monte_carlo(n=1_000_000, distributions=None, fixed=None, model='fw_fan', metrics=DEFAULT_METRICS,
+                    seed=0, chunk_size=CHUNK_SIZE, workers=None, percentiles=PERCENTILES):
+    """
+    Propagate input distributions through a cooling model.
+
+    `model` is a key of simulation.ARCHITECTURES or a model function; `fixed`
+    sets non-default point inputs (e.g. target_it_load_mw). workers=1 runs in
+    this process; None uses every CPU. Returns {'n', 'stats', 'sensitivity'}:
+    stats has mean/std/min/percentiles/max per metric, sensitivity has src,
+    first_order and corr per (input, metric).
+    """
+    distributions = dict(DEFAULT_DISTRIBUTIONS if distributions is None else distributions)
+    fixed = dict(fixed or {})
+    model = ARCHITECTURES[model] if isinstance(model, str) else model
+    metrics = list(metrics)
+    names = list(distributions)
+
+    root = np.random.SeedSequence(seed)
+    pilot_seq, chunk_root = root.spawn(2)
+
+    # Pilot run fixes the histogram ranges and input bins every chunk shares
+    rng = np.random.default_rng(pilot_seq)
+    pilot_x = sample_inputs(distributions, PILOT_SIZE, rng)
+    pilot = evaluate({**fixed, **pilot_x}, model=model, strict=False)
+    hist_edges = []
+    for m in metrics:
+        lo, hi = pilot[m].min(), pilot[m].max()
+        pad = 0.25 * (hi - lo) or abs(lo) * 1e-6 or 1e-9
+        hist_edges.append(np.linspace(lo - pad, hi + pad, HIST_BINS + 1))
+    input_edges = [np.unique(np.quantile(pilot_x[k], np.linspace(0, 1, INPUT_BINS + 1)[1:-1])) for k in names]
+
+    sizes = [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+    seeds = chunk_root.spawn(len(sizes))
+    args = [(s, size, distributions, fixed, model, metrics, hist_edges, input_edges)
+            for s, size in zip(seeds, sizes)]
+
+    total = _Accumulator(hist_edges, input_edges)
+    if workers == 1 or len(args) == 1:
+        for a in args:
+            total.merge(_evaluate_chunk(*a))
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for acc in pool.map(_evaluate_chunk, *zip(*args)):
+                total.merge(acc)
+
+    stats, sensitivity = _summarize(total, names, metrics, percentiles)
+    return {'n': total.n, 'stats': stats, 'sensitivity': sensitivity}
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Monte Carlo PUE / cooling-power uncertainty.")
+    parser.add_argument('-n', type=int, default=1_000_000, help="number of samples")
+    parser.add_argument('--model', choices=list(ARCHITECTURES), default='fw_fan')
+    parser.add_argument('--set', nargs='+', default=[], metavar='NAME=VALUE', help="fixed non-default inputs")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all CPUs)")
+    parser.add_argument('--out', help="write stats + sensitivity to this CSV prefix")
+    args = parser.parse_args()
+
+    fixed = {k: float(v) for k, v in (s.split('=') for s in args.set)}
+    start = time.perf_counter()
+    res = run_monte_carlo(args.n, fixed=fixed, model=args.model, seed=args.seed,
+                          chunk_size=args.chunk_size, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{res['n']:,} samples ({args.model}) in {elapsed:.2f}s, seed {args.seed}\n")
+    print(res['stats'].T.to_string(float_format=lambda v: f"{v:,.4f}"))
+    print("\nSensitivity (first_order = Var(E[Y|X])/Var(Y), src = standardized regression coef.)")
+    print(res['sensitivity'].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    if args.out:
+        res['stats'].to_csv(f"{args.out}_stats.csv")
+        res['sensitivity'].to_csv(f"{args.out}_sensitivity.csv", index=False)
+        print(f"\nSaved to {args.out}_stats.csv, {args.out}_sensitivity.csv")
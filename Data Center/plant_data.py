@@ -0,0 +1,324 @@
+"""
+Shared loaders for the data-center and EIA-860 power plant frames.
+
+Moved out of map_visualization_interactive.py so the map, the proximity
+index and the siting screen all build `plant_locations` the same way.
+`load_plant_capacity()` is the general per-fuel aggregation behind it.
+
+Frames are lean by default (`compact=True`): only the columns the pipeline
+uses are read, State / City / Energy Source / Provider are categoricals and
+coordinates / MW are float32. Category subsets are boolean masks
+(`category_masks()`), not copies.
+
+    python plant_data.py --memory eia8602023 eia8602024    # peak RSS, lean vs full
+"""
+import glob
+import os
+import sys
+
+import numpy as np
+
+from eia_cache import read_eia_sheet
+from instrumentation import count, peak_rss_mb, stage
+from region_index import STATE_BOUNDARIES_FILE
+
+EIA_DIR = 'eia8602024'
+DATA_CENTERS_FILE = 'datacenters_with_coords.csv'
+STATE_COUNTS_FILE = 'data_centers.csv'
+
+# State name to abbreviation mapping
+STATE_ABBREV = {
+    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
+    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
+    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
+    'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
+    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO',
+    'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
+    'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH',
+    'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
+    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
+    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY',
+    'District of Columbia': 'DC'
+}
+
+# Columns actually used from each input (everything else is never read)
+PLANT_COLUMNS = ['Plant Code', 'Plant Name', 'State', 'City', 'Latitude', 'Longitude']
+GENERATOR_COLUMNS = ['Plant Code', 'Energy Source 1', 'Nameplate Capacity (MW)']
+CAPACITY_SHEET_COLUMNS = ['Plant Code', 'Nameplate Capacity (MW)']
+DATA_CENTER_COLUMNS = ['Provider', 'Data Center Name', 'Address', 'Latitude', 'Longitude']
+# Identifies a data center across re-geocoded / reordered copies of the CSV (unique in it)
+DATA_CENTER_KEY = ['Data Center Name', 'Address']
+
+# ", ST," / ", ST 12345" in an address; fallback where the state polygons don't apply
+STATE_PATTERN = r',\s*([A-Z]{2})[,\s]'
+
+# Map category -> capacity column in plant_locations
+CAPACITY_COLUMNS = {
+    'nuclear': 'nuclear_capacity_mw',
+    'gas': 'gas_capacity_mw',
+    'other': 'other_capacity_mw',
+    'wind': 'wind_capacity_mw',
+    'solar': 'solar_capacity_mw',
+}
+
+# EIA-860 'Energy Source 1' code -> fuel category for load_plant_capacity().
+# Codes not listed here fall into `default_category` ('other').
+FUEL_CATEGORIES = {
+    'NUC': 'nuclear',
+    'NG': 'gas', 'OG': 'other_gas', 'BFG': 'other_gas', 'PG': 'other_gas', 'SGP': 'other_gas',
+    'BIT': 'coal', 'SUB': 'coal', 'LIG': 'coal', 'ANT': 'coal', 'RC': 'coal', 'WC': 'coal', 'SGC': 'coal',
+    'DFO': 'oil', 'RFO': 'oil', 'JF': 'oil', 'KER': 'oil', 'WO': 'oil', 'PC': 'oil',
+    'WAT': 'hydro',
+    'MWH': 'storage',
+    'WND': 'wind',
+    'SUN': 'solar',
+    'GEO': 'geothermal',
+    'WDS': 'biomass', 'WDL': 'biomass', 'BLQ': 'biomass', 'AB': 'biomass', 'MSW': 'biomass',
+    'OBS': 'biomass', 'OBL': 'biomass', 'OBG': 'biomass', 'LFG': 'biomass', 'SLW': 'biomass',
+}
+
+# The map's three generator-sheet layers: NUC, NG, everything else
+MAP_FUEL_CATEGORIES = {'NUC': 'nuclear', 'NG': 'gas'}
+
+
+def _eia_file(eia_dir, prefix):
+    """`<eia_dir>/<prefix>_Y<year>.xlsx` for whichever EIA-860 year the directory holds."""
+    matches = sorted(glob.glob(os.path.join(eia_dir, f'{prefix}_Y????.xlsx')))
+    return matches[-1] if matches else os.path.join(eia_dir, f'{prefix}_Y2024.xlsx')
+
+
+def _compact(df, categorical=(), float32=()):
+    """Downcast in place: low-cardinality text -> category, float columns -> float32."""
+    import pandas as pd
+
+    for col in categorical:
+        if col in df:
+            df[col] = df[col].astype('category')
+    for col in float32:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+    return df
+
+
+def category_masks(plant_locations, categories=CAPACITY_COLUMNS):
+    """{category: boolean mask of plants with capacity > 0}; index with it instead of keeping copies."""
+    return {cat: plant_locations[col].to_numpy() > 0 for cat, col in categories.items()}
+
+
+def _capacity_matrix(plant_codes, categories, capacity):
+    """(unique plant codes, unique categories, dense plant x category MW matrix) in one bincount."""
+    import pandas as pd
+
+    plant_idx, plants = pd.factorize(plant_codes)
+    cat_idx, cats = pd.factorize(categories, sort=True)
+    keep = (plant_idx >= 0) & (cat_idx >= 0)
+    flat = plant_idx[keep] * len(cats) + cat_idx[keep]
+    weights = np.nan_to_num(np.asarray(capacity, dtype=np.float64)[keep])
+    matrix = np.bincount(flat, weights=weights, minlength=len(plants) * len(cats))
+    return plants, cats, matrix.reshape(len(plants), len(cats))
+
+
+@stage('load_plant_capacity')
+def load_plant_capacity(eia_dir=EIA_DIR, fuel_categories=FUEL_CATEGORIES, default_category='other',
+                        form='wide', generators=None):
+    """
+    Nameplate MW per plant and fuel category from the EIA-860 generator sheet.
+
+    Every generator row is mapped through `fuel_categories` ('Energy Source 1'
+    code -> category; unlisted codes go to `default_category`, and
+    `fuel_categories=None` keeps the raw codes). The Plant Code x category
+    matrix is then built in a single bincount.
+
+    form='wide': one row per Plant Code, one `<category>_capacity_mw` column per category.
+    form='long': columns Plant Code, category, capacity_mw (non-zero cells only).
+
+    Pass an already loaded generator frame as `generators` to skip the read.
+    """
+    import pandas as pd
+
+    gen_df = generators if generators is not None else read_eia_sheet(
+        _eia_file(eia_dir, '3_1_Generator'), header=1, columns=GENERATOR_COLUMNS)
+    codes = gen_df['Energy Source 1'].astype(object)
+    if fuel_categories is None:
+        categories = codes.fillna(default_category).astype(str)
+    else:
+        categories = codes.map(fuel_categories).fillna(default_category)
+    capacity = pd.to_numeric(gen_df['Nameplate Capacity (MW)'], errors='coerce')
+
+    plants, cats, matrix = _capacity_matrix(gen_df['Plant Code'], categories, capacity)
+    if form == 'wide':
+        wide = pd.DataFrame(matrix, columns=[f'{c}_capacity_mw' for c in cats])
+        wide.insert(0, 'Plant Code', plants)
+        return wide
+    if form == 'long':
+        rows, cols = np.nonzero(matrix)
+        return pd.DataFrame({
+            'Plant Code': np.asarray(plants)[rows],
+            'category': np.asarray(cats)[cols],
+            'capacity_mw': matrix[rows, cols],
+        })
+    raise ValueError(f"form must be 'wide' or 'long', got {form!r}")
+
+
+def assign_states(df, state_boundaries=STATE_BOUNDARIES_FILE):
+    """
+    2-letter state per row from the state polygon containing Latitude/Longitude
+    (region_index.py). The address regex fills rows the polygons miss, and all
+    rows when the boundary file doesn't exist.
+    """
+    import pandas as pd
+
+    state = df['Address'].str.extract(STATE_PATTERN, expand=False)
+    if state_boundaries and os.path.exists(state_boundaries):
+        from region_index import load_region_index
+
+        spatial = pd.Series(load_region_index(state_boundaries).lookup(df['Latitude'], df['Longitude']),
+                            index=df.index)
+        # Boundary files labeled with full names ("Texas") -> "TX"
+        spatial = spatial.map(STATE_ABBREV).fillna(spatial)
+        found = spatial.notna().to_numpy()
+        count('state_from_polygon', int(found.sum()))
+        count('state_from_address', int(state[~found].notna().sum()))
+        state = spatial.where(found, state)
+    else:
+        count('state_from_address', int(state.notna().sum()))
+    return state
+
+
+@stage('load_data_centers')
+def load_data_centers(path=DATA_CENTERS_FILE, compact=True, state_boundaries=STATE_BOUNDARIES_FILE):
+    """Geocoded data centers with a State_Code from the coordinates (address as fallback)."""
+    import pandas as pd
+
+    if compact:
+        df = pd.read_csv(path, usecols=DATA_CENTER_COLUMNS, dtype={'Provider': 'category'})
+        _compact(df, float32=['Latitude', 'Longitude'])
+    else:
+        df = pd.read_csv(path)
+    df['State'] = assign_states(df, state_boundaries)
+    if compact:
+        _compact(df, categorical=['State'])
+    df['State_Code'] = df['State']
+    return df
+
+
+def load_state_dc_counts(path=STATE_COUNTS_FILE):
+    """State-level data center counts (data_centers.csv) indexed by 2-letter state code."""
+    import pandas as pd
+
+    counts = pd.read_csv(path)
+    counts['State_Code'] = counts['State'].map(STATE_ABBREV)
+    return counts.dropna(subset=['State_Code']).set_index('State_Code')['Data Centers']
+
+
+@stage('load_plant_locations')
+def load_plant_locations(eia_dir=EIA_DIR, verbose=True, compact=True):
+    """
+    One row per EIA-860 plant with coordinates and per-category nameplate MW.
+
+    compact=False reads every column with the default dtypes (the old
+    behaviour, kept for the memory comparison).
+    """
+    import pandas as pd
+
+    # Load Power Plant location data (EIA-860)
+    # read_eia_sheet parses the xlsx once and serves later runs from eia8602024/.cache
+    def read(prefix, columns):
+        return read_eia_sheet(_eia_file(eia_dir, prefix), header=1, columns=columns if compact else None)
+
+    plant_df = read('2___Plant', PLANT_COLUMNS)
+    gen_df = read('3_1_Generator', GENERATOR_COLUMNS)
+    wind_df = read('3_2_Wind', CAPACITY_SHEET_COLUMNS)
+    solar_df = read('3_3_Solar', CAPACITY_SHEET_COLUMNS)
+    count('eia_rows', len(plant_df) + len(gen_df) + len(wind_df) + len(solar_df))
+    if compact:
+        _compact(plant_df, categorical=['State', 'City'])
+        _compact(gen_df, categorical=['Energy Source 1'])
+    if verbose:
+        print(f"Loaded {len(plant_df)} power plants")
+        print(f"Loaded {len(gen_df)} generators")
+        print(f"Loaded {len(wind_df)} wind generators")
+        print(f"Loaded {len(solar_df)} solar generators")
+        print("\nProcessing power plant data...")
+
+    # Clean plant location data
+    plant_df['Latitude'] = pd.to_numeric(plant_df['Latitude'], errors='coerce')
+    plant_df['Longitude'] = pd.to_numeric(plant_df['Longitude'], errors='coerce')
+    plant_df = plant_df.dropna(subset=['Latitude', 'Longitude'])
+
+    # Generator data: Nuclear, Gas and Other (everything else: Coal, Hydro, Oil, etc.) in one pass
+    gen_capacity = load_plant_capacity(fuel_categories=MAP_FUEL_CATEGORIES, generators=gen_df)
+
+    # Wind and Solar come from their own sheets
+    capacity = [gen_capacity]
+    for df, col in [(wind_df, 'wind_capacity_mw'), (solar_df, 'solar_capacity_mw')]:
+        mw = pd.to_numeric(df['Nameplate Capacity (MW)'], errors='coerce')
+        capacity.append(mw.groupby(df['Plant Code']).sum().rename(col).reset_index())
+
+    # Merge location data with capacity data
+    plant_locations = plant_df[['Plant Code', 'Plant Name', 'State', 'City', 'Latitude', 'Longitude']].copy()
+    for cap in capacity:
+        plant_locations = plant_locations.merge(cap, on='Plant Code', how='left')
+    plant_locations = plant_locations.reindex(
+        columns=['Plant Code', 'Plant Name', 'State', 'City', 'Latitude', 'Longitude', *CAPACITY_COLUMNS.values()])
+
+    # Fill NaN values with 0
+    for col in CAPACITY_COLUMNS.values():
+        plant_locations[col] = plant_locations[col].fillna(0)
+
+    # Calculate Total Capacity primarily for filtering valid plants (avoid 0 capacity)
+    plant_locations['total_capacity_mw'] = plant_locations[list(CAPACITY_COLUMNS.values())].sum(axis=1)
+    if compact:
+        _compact(plant_locations, float32=['Latitude', 'Longitude', *CAPACITY_COLUMNS.values(), 'total_capacity_mw'])
+    return plant_locations
+
+
+def _measure(eia_dirs, compact):
+    """Load every directory in this process; returns peak RSS and frame sizes (MB)."""
+    import pandas as pd
+
+    start_rss = peak_rss_mb()
+    frames = []
+    for eia_dir in eia_dirs:
+        plants = load_plant_locations(eia_dir, verbose=False, compact=compact)
+        frames.append(plants.assign(year=os.path.basename(os.path.normpath(eia_dir))[-4:]))
+    dcs = load_data_centers(compact=compact)
+    plants = pd.concat(frames, ignore_index=True)
+    return {
+        'plants': len(plants),
+        'baseline_rss_mb': start_rss,
+        'peak_rss_mb': peak_rss_mb(),
+        'plants_mb': plants.memory_usage(deep=True).sum() / 1e6,
+        'dcs_mb': dcs.memory_usage(deep=True).sum() / 1e6,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import subprocess
+
+    parser = argparse.ArgumentParser(description="Peak RSS of the lean (default) vs full plant/data-center frames.")
+    parser.add_argument('--memory', nargs='+', metavar='EIA_DIR', default=[EIA_DIR],
+                        help="EIA-860 year directories to load together (e.g. eia8602023 eia8602024)")
+    parser.add_argument('--measure', choices=['lean', 'full'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(_measure(args.memory, compact=args.measure == 'lean')))
+        sys.exit(0)
+
+    # Each mode runs in a fresh interpreter so ru_maxrss isn't shared
+    results = {}
+    for mode in ('full', 'lean'):
+        out = subprocess.run([sys.executable, __file__, '--measure', mode, '--memory', *args.memory],
+                             check=True, capture_output=True, text=True).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"EIA-860 sets: {', '.join(args.memory)}  ({results['lean']['plants']} plant rows)")
+    print(f"{'':<6}{'peak RSS':>12}{'  above import':>15}{'plants frame':>15}{'DC frame':>11}")
+    for mode, r in results.items():
+        print(f"{mode:<6}{r['peak_rss_mb']:>10.1f}MB{r['peak_rss_mb'] - r['baseline_rss_mb']:>13.1f}MB"
+              f"{r['plants_mb']:>13.2f}MB{r['dcs_mb']:>9.2f}MB")
+    full, lean = results['full'], results['lean']
+    print(f"Peak RSS reduction: {1 - lean['peak_rss_mb'] / full['peak_rss_mb']:.1%}")
@@ -0,0 +1,168 @@
+"""
+Spatial index over EIA-860 plants for data-center proximity queries.
+
+Coordinates are mapped to 3D unit vectors and indexed with a KD-tree per fuel
+category. On the unit sphere the straight-line (chord) distance is a monotonic
+function of the great-circle distance, so k-nearest and radius queries are
+exact haversine queries without an N x M distance matrix:
+
+    chord = 2 * sin(d / 2R)        d = 2R * arcsin(chord / 2)
+
+Usage:
+    index = PlantIndex(plant_locations)
+    dist_km, rows = index.nearest(dc_lat, dc_lon, 'nuclear', k=3, min_mw=360)
+    table = index.proximity_table(data_centers, k=3, min_mw=100)
+
+    python plant_proximity.py --k 3 --min-mw 100 --radius-km 50
+"""
+import numpy as np
+
+from plant_data import CAPACITY_COLUMNS
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_xyz(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def km_to_chord(km):
+    return 2.0 * np.sin(np.asarray(km, dtype=np.float64) / (2.0 * EARTH_RADIUS_KM))
+
+
+def chord_to_km(chord):
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class PlantIndex:
+    """KD-trees over plant locations, one per category and capacity threshold."""
+
+    def __init__(self, plant_locations, categories=CAPACITY_COLUMNS):
+        self.plants = plant_locations.reset_index(drop=True)
+        self.categories = dict(categories)
+        self.xyz = to_unit_xyz(self.plants['Latitude'], self.plants['Longitude'])
+        self._trees = {}
+
+    def _tree(self, category, min_mw):
+        """(tree, plant row numbers) for plants with capacity >= min_mw in `category`."""
+        from scipy.spatial import cKDTree
+
+        key = (category, float(min_mw))
+        if key not in self._trees:
+            cap = self.plants[self.categories[category]].to_numpy()
+            rows = np.flatnonzero((cap > 0) & (cap >= min_mw))
+            tree = cKDTree(self.xyz[rows]) if len(rows) else None
+            self._trees[key] = (tree, rows)
+        return self._trees[key]
+
+    def nearest(self, lat, lon, category, k=1, min_mw=0.0):
+        """
+        k nearest plants of `category` with capacity >= min_mw for each query point.
+
+        Returns (dist_km, rows), both shaped (n_points, k). Missing neighbours
+        (fewer than k eligible plants) have dist inf and row -1.
+        """
+        tree, rows = self._tree(category, min_mw)
+        q = to_unit_xyz(lat, lon)
+        if tree is None:
+            return np.full((len(q), k), np.inf), np.full((len(q), k), -1)
+        chord, idx = tree.query(q, k=k)
+        chord = chord.reshape(len(q), k)
+        idx = idx.reshape(len(q), k)
+        found = idx < len(rows)
+        out_rows = np.where(found, rows[np.minimum(idx, len(rows) - 1)], -1)
+        return np.where(found, chord_to_km(chord), np.inf), out_rows
+
+    def within(self, lat, lon, category, radius_km, min_mw=0.0):
+        """All plants within radius_km of each query point: list of plant-row arrays."""
+        tree, rows = self._tree(category, min_mw)
+        q = to_unit_xyz(lat, lon)
+        if tree is None:
+            return [np.empty(0, dtype=np.int64) for _ in range(len(q))]
+        hits = tree.query_ball_point(q, r=float(km_to_chord(radius_km)))
+        return [rows[np.asarray(h, dtype=np.int64)] for h in hits]
+
+    def proximity_table(self, data_centers, k=3, min_mw=0.0, radius_km=None, categories=None):
+        """
+        Long DC -> plant table: one row per (data center, category, rank).
+
+        With `radius_km` every plant inside the radius is listed (ranked by
+        distance); otherwise the k nearest per category.
+        """
+        import pandas as pd
+
+        dcs = data_centers.dropna(subset=['Latitude', 'Longitude'])
+        lat = dcs['Latitude'].to_numpy()
+        lon = dcs['Longitude'].to_numpy()
+        frames = []
+        for category in categories or self.categories:
+            cap_col = self.categories[category]
+            if radius_km is None:
+                dist, rows = self.nearest(lat, lon, category, k=k, min_mw=min_mw)
+                dc_pos = np.repeat(np.arange(len(dcs)), k)
+                rank = np.tile(np.arange(1, k + 1), len(dcs))
+                dist, rows = dist.ravel(), rows.ravel()
+                keep = rows >= 0
+                dc_pos, rank, dist, rows = dc_pos[keep], rank[keep], dist[keep], rows[keep]
+            else:
+                hits = self.within(lat, lon, category, radius_km, min_mw=min_mw)
+                counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+                dc_pos = np.repeat(np.arange(len(dcs)), counts)
+                rows = np.concatenate(hits) if len(hits) else np.empty(0, dtype=np.int64)
+                p = self.plants.iloc[rows]
+                dist = haversine_km(lat[dc_pos], lon[dc_pos], p['Latitude'].to_numpy(), p['Longitude'].to_numpy())
+                order = np.lexsort((dist, dc_pos))
+                dc_pos, rows, dist = dc_pos[order], rows[order], dist[order]
+                starts = np.r_[0, np.cumsum(counts)[:-1]]
+                rank = np.arange(len(rows)) - np.repeat(starts, counts) + 1
+            p = self.plants.iloc[rows]
+            frames.append(pd.DataFrame({
+                'Data Center Name': dcs['Data Center Name'].to_numpy()[dc_pos],
+                'Provider': dcs['Provider'].to_numpy()[dc_pos],
+                'DC Latitude': lat[dc_pos],
+                'DC Longitude': lon[dc_pos],
+                'category': category,
+                'rank': rank,
+                'Plant Code': p['Plant Code'].to_numpy(),
+                'Plant Name': p['Plant Name'].to_numpy(),
+                'Plant State': p['State'].to_numpy(),
+                'capacity_mw': p[cap_col].to_numpy(),
+                'distance_km': np.round(dist, 2),
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from plant_data import load_data_centers, load_plant_locations
+
+    parser = argparse.ArgumentParser(description="Build the data-center -> power-plant proximity table.")
+    parser.add_argument('--k', type=int, default=3, help="nearest plants per category")
+    parser.add_argument('--min-mw', type=float, default=0.0, help="minimum plant capacity (MW)")
+    parser.add_argument('--radius-km', type=float, default=None,
+                        help="list every plant within this radius instead of the k nearest")
+    parser.add_argument('--out', default='dc_plant_proximity.csv')
+    args = parser.parse_args()
+
+    dcs = load_data_centers()
+    plant_locations = load_plant_locations(verbose=False)
+
+    start = time.perf_counter()
+    index = PlantIndex(plant_locations)
+    table = index.proximity_table(dcs, k=args.k, min_mw=args.min_mw, radius_km=args.radius_km)
+    elapsed = time.perf_counter() - start
+
+    table.to_csv(args.out, index=False)
+    print(f"{len(dcs)} data centers x {len(plant_locations)} plants -> {len(table)} rows in {elapsed:.2f}s")
+    print(f"Saved to {args.out}")
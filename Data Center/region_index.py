@@ -0,0 +1,169 @@
+"""
+Point-in-polygon region labels (state, county, balancing authority) from coordinates.
+
+Boundary polygons are read from local GeoJSON files and indexed with a shapely
+STRtree. A whole column of points is labeled at once: one bulk tree query for
+bounding-box candidates, then one vectorized `intersects_xy` test per polygon
+against the prepared geometry, so half a million points take about a second
+against state boundaries.
+
+plant_data.load_data_centers() takes State_Code from the state polygons when
+STATE_BOUNDARIES_FILE exists and only falls back to the address regex for rows
+without coordinates or outside every polygon (offshore, bad geocode). Without
+the file the regex is used as before.
+
+Boundary files (FeatureCollections in lon/lat, e.g. converted with
+`ogr2ogr -f GeoJSON -t_srs EPSG:4326 out.geojson in.shp`):
+    us_states.geojson               Census cartographic boundaries (cb_*_us_state_5m), STUSPS
+    us_counties.geojson             Census cb_*_us_county_5m, NAMELSAD / GEOID
+    balancing_authorities.geojson   EIA / HIFLD control areas; overlapping areas
+                                    resolve to the first feature in file order
+
+    python region_index.py --counties us_counties.geojson --ba balancing_authorities.geojson --out dc_regions.csv
+    python region_index.py --bench 500000          # time state labeling on random points
+"""
+import functools
+import json
+import os
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATE_BOUNDARIES_FILE = os.path.join(HERE, 'us_states.geojson')
+COUNTY_BOUNDARIES_FILE = os.path.join(HERE, 'us_counties.geojson')
+BA_BOUNDARIES_FILE = os.path.join(HERE, 'balancing_authorities.geojson')
+
+# Feature property used as the label, first one present wins
+STATE_KEYS = ('STUSPS', 'postal', 'STATE_ABBR', 'NAME', 'name')
+COUNTY_KEYS = ('NAMELSAD', 'NAME', 'name', 'GEOID')
+BA_KEYS = ('BA_CODE', 'ID', 'ABBRV', 'NAME', 'name')
+
+
+class RegionIndex:
+    """STRtree over labeled polygons; lookup() labels points by the polygon containing them."""
+
+    def __init__(self, geometries, labels):
+        import shapely
+        from shapely import STRtree
+
+        self.geometries = np.asarray(geometries, dtype=object)
+        self.labels = np.asarray(labels, dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = STRtree(self.geometries)
+
+    @classmethod
+    def from_geojson(cls, path, keys=STATE_KEYS):
+        """Index a GeoJSON FeatureCollection, labeling polygons with the first of `keys` they have."""
+        from shapely.geometry import shape
+
+        with open(path, encoding='utf-8') as f:
+            features = json.load(f)['features']
+        geometries, labels = [], []
+        for feature in features:
+            props = feature.get('properties') or {}
+            key = next((k for k in keys if props.get(k) not in (None, '')), None)
+            if feature.get('geometry') is None or key is None:
+                continue
+            geometries.append(shape(feature['geometry']))
+            labels.append(str(props[key]))
+        if not geometries:
+            raise ValueError(f"{path}: no features with a geometry and one of the properties {list(keys)}")
+        return cls(geometries, labels)
+
+    def lookup(self, lat, lon):
+        """Label per point (object array, None outside every polygon or without coordinates)."""
+        import pandas as pd
+        import shapely
+
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        out = np.full(len(lat), None, dtype=object)
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        if len(valid) == 0:
+            return out
+        # Bounding-box candidates from the tree, then one exact prepared test per polygon
+        point_idx, poly_idx = self.tree.query(shapely.points(lon[valid], lat[valid]))
+        order = np.argsort(poly_idx, kind='stable')
+        point_idx, poly_idx = valid[point_idx[order]], poly_idx[order]
+        starts = np.flatnonzero(np.r_[True, poly_idx[1:] != poly_idx[:-1]])
+        for candidates, poly in zip(np.split(point_idx, starts[1:]), poly_idx[starts]):
+            # Points on a shared border keep the first polygon in file order
+            candidates = candidates[pd.isna(out[candidates])]
+            inside = shapely.intersects_xy(self.geometries[poly], lon[candidates], lat[candidates])
+            out[candidates[inside]] = self.labels[poly]
+        return out
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_index(path, keys, mtime_ns):
+    return RegionIndex.from_geojson(path, keys)
+
+
+def load_region_index(path, keys=STATE_KEYS):
+    """RegionIndex for a boundary file, built once per process (rebuilt if the file changes)."""
+    return _cached_index(os.path.abspath(path), tuple(keys), os.stat(path).st_mtime_ns)
+
+
+def assign_regions(df, layers, lat_col='Latitude', lon_col='Longitude'):
+    """Add one categorical column per {column: RegionIndex} in `layers`; returns `df`."""
+    import pandas as pd
+
+    for col, index in layers.items():
+        df[col] = pd.Categorical(index.lookup(df[lat_col], df[lon_col]))
+    return df
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Label data centers with state / county / balancing authority.")
+    parser.add_argument('--states', default=STATE_BOUNDARIES_FILE)
+    parser.add_argument('--counties', default=None, help=f"e.g. {os.path.basename(COUNTY_BOUNDARIES_FILE)}")
+    parser.add_argument('--ba', default=None, help=f"e.g. {os.path.basename(BA_BOUNDARIES_FILE)}")
+    parser.add_argument('--data-centers', default=None, help="geocoded data-center CSV")
+    parser.add_argument('--out', default=None, help="write the labeled data centers to CSV")
+    parser.add_argument('--bench', type=int, default=0, metavar='N',
+                        help="instead, time state labeling of N random points inside the state boundaries")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.states):
+        parser.error(f"state boundary file not found: {args.states} (see the module docstring)")
+
+    start = time.perf_counter()
+    states = load_region_index(args.states, STATE_KEYS)
+    print(f"Indexed {len(states.labels)} state polygons in {time.perf_counter() - start:.2f}s")
+
+    if args.bench:
+        import shapely
+
+        rng = np.random.default_rng(0)
+        xmin, ymin, xmax, ymax = shapely.total_bounds(states.geometries)
+        lon = rng.uniform(xmin, xmax, args.bench)
+        lat = rng.uniform(ymin, ymax, args.bench)
+        start = time.perf_counter()
+        labels = states.lookup(lat, lon)
+        elapsed = time.perf_counter() - start
+        hit = np.count_nonzero(pd.notna(labels))
+        print(f"{args.bench:,} points in {elapsed:.3f}s ({args.bench / elapsed:,.0f}/s), {hit:,} inside a polygon")
+    else:
+        from plant_data import DATA_CENTERS_FILE, load_data_centers
+
+        dcs = load_data_centers(args.data_centers or DATA_CENTERS_FILE, state_boundaries=args.states)
+        layers = {}
+        if args.counties:
+            layers['County'] = load_region_index(args.counties, COUNTY_KEYS)
+        if args.ba:
+            layers['Balancing_Authority'] = load_region_index(args.ba, BA_KEYS)
+        assign_regions(dcs, layers)
+        print(f"{dcs['State_Code'].notna().sum()} of {len(dcs)} data centers have a state")
+        for col in layers:
+            print(f"{dcs[col].notna().sum()} of {len(dcs)} data centers have a {col.replace('_', ' ').lower()}")
+        if args.out:
+            dcs.to_csv(args.out, index=False)
+            print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,59 @@
-import pandas as pd
+"""
+Cooling / PUE model for the data-center design study.
 
-def simulate_full_system_balance():
-    print("=== FINAL DESIGN SIMULATION: LNG-OCR-SERVER SYSTEM ===\n")
-    
-    # --- 1. INPUTS ---
-    lng_flow_m3_day = 3310.0   # From previous 500MW Co-location scenario
-    
-    # Efficiencies
-    hx_efficiency = 0.95
-    turbine_efficiency_isentropic = 0.85
-    generator_efficiency = 0.95
-    orc_cycle_thermal_eff = 0.15 # Realistic thermal efficiency for this temp range
-    
-    # Fluid Properties for reference
-    cp_lng = 3.5 # kJ/kg.K (Liquid Methane approx)
-    cp_ocr = 2.4 # kJ/kg.K (Liquid Propane approx)
-    lng_density = 450.0 # kg/m3
-    
-    # Specific Enthalpy Changes (Delta H)
-    # LNG: -162C to -140C (Liquid+Gas phase change absorption)
-    # Allows approx 600 kJ/kg absorption in the condenser (Latent 510 + Sensible)
-    dh_lng_absorb = 600.0 # kJ/kg
-    
-    # OCR (Propane): Cycle Latent Heat
-    # Propane latent heat is ~425 kJ/kg. 
-    dh_ocr_cycle = 350.0 # kJ/kg (Effective working range in cycle)
-
-    # Server Fluid (Water/Glycol)
-    cp_water = 3.00 # kJ/kg.K
-    t_server_in = 45.0
-    t_server_out = 25.0
-    dt_server = t_server_in - t_server_out # 20K delta T
-    
-    # --- MODIFIED: FW + FAN COOLING SIMULATION ---
-    # The previous LNG-OCR loop is commented out to focus on FW (Fresh Water) + Fan cooling.
-    
-    # 1. Define Target Load directly
-    target_it_load_mw = 360.0
+Each cooling architecture is a pure function of its design inputs (keyword
+arguments with defaults) that works element-wise on NumPy arrays and returns
+a dict with at least COMMON_OUTPUTS:
+
+    fw_fan_cooling()   FW (fresh water) loop + fans, free cooling (the design case)
+    chiller_cooling()  the same air/FW side on a mechanical chiller + cooling tower
+    lng_orc_cooling()  server heat drives an ORC whose condenser is cooled by LNG
+                       regasification; generates power, FW + fan handles the rest
+
+`evaluate()` runs one model over a table of scenarios (DataFrame or
+{name: array}); `sweep()` evaluates full Cartesian grids in chunks and can
+stream the result to Parquet/CSV; `compare_architectures()` evaluates every
+model in ARCHITECTURES on the same scenarios. pandas is only imported by the
+table-building functions, so the single-design report starts quickly.
+
+    python simulation.py                                    # single-design report
+    python simulation.py --sweep target_it_load_mw=50:1000:96 dt_air=10:20:21 \
+        dp_air=400,600,800 fan_efficiency=0.6:0.8:21 --out sweep.parquet
+    python simulation.py --compare --sweep target_it_load_mw=100,360 lng_flow_m3_day=1000:20000:5
+"""
+import inspect
+import time
+
+import numpy as np
+
+from instrumentation import count
+
+SWEEP_CHUNK_SIZE = 1_000_000
+
+# Outputs every architecture returns (MW unless noted)
+COMMON_OUTPUTS = ['target_it_load_mw', 'total_cooling_power_mw', 'generated_power_mw',
+                  'net_power_mw', 'pue', 'net_pue']
+
+
+def _net(target_it_load_mw, total_cooling_power_mw, generated_power_mw):
+    """Facility power net of on-site generation, and the PUE on that basis."""
+    net_power_mw = target_it_load_mw + total_cooling_power_mw - generated_power_mw
+    return {
+        'generated_power_mw': generated_power_mw,
+        'net_power_mw': net_power_mw,
+        'net_pue': net_power_mw / target_it_load_mw,
+    }
+
+
+def fw_fan_cooling(target_it_load_mw=360.0, dt_air=15.0, dp_air=600.0, fan_efficiency=0.70,
+                   dt_water=10.0, dp_water=350.0, pump_efficiency=0.75, dp_source=200.0):
+    """FW (Fresh Water) + fan cooling model for one design point; returns flows, powers and PUE."""
     heat_load_kw = target_it_load_mw * 1000.0
 
-    print(f"[1] SYSTEM PARAMETERS (FW + FAN COOLING)")
-    print(f"  Target IT Load         : {target_it_load_mw:.2f} MW")
-    
     # 2. Fan System (Airflow across servers/CRAH)
     # Assumption: Delta T of Air = 15°C (Typical efficient containment)
     cp_air = 1.006 # kJ/kg.K
     rho_air = 1.2 # kg/m3
-    dt_air = 15.0 # K
     
     # Mass flow of air required to remove heat: Q = m * Cp * dt
     m_dot_air = heat_load_kw / (cp_air * dt_air) # kg/s
@@ -55,27 +62,20 @@ def simulate_full_system_balance():
     # Fan Power Calculation
     # Rule of thumb or specific fan laws. Modern EC fans ~ 0.2 kW/(m3/s) roughly
     # Or typically 5-10% of IT load for efficient systems. Let's calculate via pressure.
-    # dP_air_total = 500 Pa (approx 2 inches WG, filters + coils + servers)
-    # Fan Eff = 0.70
-    dp_air = 600.0 # Pa
-    fan_efficiency = 0.70
-    fan_power_kw = (vol_flow_air * dp_air) / fan_efficiency / 1000.0 * 1000 # Correct to Watts then kW... wait formula is (m3/s * Pa) = Watts
+    # dP_air_total = 600 Pa (approx 2.4 inches WG, filters + coils + servers), Fan Eff = 0.70
+    # (m3/s * Pa) = Watts
     fan_power_kw = (vol_flow_air * dp_air) / fan_efficiency / 1000.0 # kW
     
     # 3. FW (Fresh Water) System
     # Heat is transferred from Air to Water via CRAH/CRAU coils
     # Assumption: Delta T of Water = 8°C (Typical Chilled Water) -> Higher dT like 12°C for modern
     cp_water = 4.18 # kJ/kg.K
-    dt_water = 10.0 # K
     
     m_dot_fw = heat_load_kw / (cp_water * dt_water) # kg/s
     vol_flow_fw = m_dot_fw / 1000.0 # m3/s (approx density)
     
     # Pump Power (FW Loop)
-    # dP_water = 300 kPa (Piping + HEX + Valves)
-    # Pump Eff = 0.75
-    dp_water = 350.0 # kPa
-    pump_efficiency = 0.75
+    # dP_water = 350 kPa (Piping + HEX + Valves), Pump Eff = 0.75
     pump_power_kw = (vol_flow_fw * dp_water) / pump_efficiency
     
     # 4. Heat Rejection (Chiller / Cooling Tower)
@@ -85,7 +85,6 @@ def simulate_full_system_balance():
     # Let's assume a Source Pump is needed to bring FW in/out.
     # Source Pump: Low head if river, high flow.
     vol_flow_source = vol_flow_fw # Assume 1:1 via Heat Exchanger to keep internal loop clean
-    dp_source = 200.0 # kPa
     source_pump_power_kw = (vol_flow_source * dp_source) / pump_efficiency
     
     # Total Cooling Power
@@ -94,7 +93,282 @@ def simulate_full_system_balance():
     
     # PUE Calculation
     pue = (target_it_load_mw + total_cooling_power_mw) / target_it_load_mw
-    
+
+    return {
+        'target_it_load_mw': target_it_load_mw,
+        'vol_flow_air': vol_flow_air,
+        'fan_power_kw': fan_power_kw,
+        'vol_flow_fw': vol_flow_fw,
+        'pump_power_kw': pump_power_kw,
+        'source_pump_power_kw': source_pump_power_kw,
+        'total_cooling_power_mw': total_cooling_power_mw,
+        'pue': pue,
+        **_net(target_it_load_mw, total_cooling_power_mw, 0.0 * total_cooling_power_mw),
+    }
+
+
+def chiller_cooling(target_it_load_mw=360.0, dt_air=15.0, dp_air=600.0, fan_efficiency=0.70,
+                    dt_water=10.0, dp_water=350.0, pump_efficiency=0.75, chiller_cop=6.0,
+                    dt_condenser=5.5, dp_condenser=250.0, tower_fan_kw_per_mw=8.0):
+    """Chilled-water design: the FW + fan air/water side, a chiller and a cooling tower."""
+    fw = fw_fan_cooling(target_it_load_mw, dt_air=dt_air, dp_air=dp_air, fan_efficiency=fan_efficiency,
+                        dt_water=dt_water, dp_water=dp_water, pump_efficiency=pump_efficiency)
+    heat_load_kw = target_it_load_mw * 1000.0
+
+    # Compressor and heat rejected to the tower (IT heat + compressor work)
+    compressor_power_kw = heat_load_kw / chiller_cop
+    q_rejected_kw = heat_load_kw + compressor_power_kw
+
+    # Condenser water loop (tower side)
+    cp_water = 4.18 # kJ/kg.K
+    vol_flow_condenser = q_rejected_kw / (cp_water * dt_condenser) / 1000.0 # m3/s
+    condenser_pump_power_kw = (vol_flow_condenser * dp_condenser) / pump_efficiency
+    tower_fan_power_kw = tower_fan_kw_per_mw * q_rejected_kw / 1000.0
+
+    total_cooling_power_kw = (fw['fan_power_kw'] + fw['pump_power_kw'] + compressor_power_kw
+                              + condenser_pump_power_kw + tower_fan_power_kw)
+    total_cooling_power_mw = total_cooling_power_kw / 1000.0
+    pue = (target_it_load_mw + total_cooling_power_mw) / target_it_load_mw
+
+    return {
+        'target_it_load_mw': target_it_load_mw,
+        'vol_flow_air': fw['vol_flow_air'],
+        'fan_power_kw': fw['fan_power_kw'],
+        'vol_flow_fw': fw['vol_flow_fw'],
+        'pump_power_kw': fw['pump_power_kw'],
+        'compressor_power_kw': compressor_power_kw,
+        'vol_flow_condenser': vol_flow_condenser,
+        'condenser_pump_power_kw': condenser_pump_power_kw,
+        'tower_fan_power_kw': tower_fan_power_kw,
+        'total_cooling_power_mw': total_cooling_power_mw,
+        'pue': pue,
+        **_net(target_it_load_mw, total_cooling_power_mw, 0.0 * total_cooling_power_mw),
+    }
+
+
+def lng_orc_cooling(target_it_load_mw=360.0, lng_flow_m3_day=3310.0, lng_density=450.0,
+                    dh_lng_absorb=600.0, hx_efficiency=0.95, orc_cycle_thermal_eff=0.15,
+                    generator_efficiency=0.95, dh_ocr_cycle=350.0, cp_server=3.00, dt_server=20.0,
+                    dt_air=15.0, dp_air=600.0, fan_efficiency=0.70, dt_water=10.0, dp_water=350.0,
+                    pump_efficiency=0.75, dp_source=200.0):
+    """
+    LNG cold-energy / ORC co-generation (the three-loop mass balance of the old design).
+
+    Loop 1: LNG regasification absorbs heat in the ORC condenser.
+    Loop 2: the ORC (propane) evaporator takes server heat and drives a turbine.
+    Loop 3: server fluid (water/glycol, 45 -> 25 C) carries IT heat to the evaporator.
+    Server heat beyond what the LNG can absorb goes to a FW source loop as in
+    fw_fan_cooling(); the air side (fans) is the same.
+    """
+    # lng_flow_m3_day: 3310 m3/day is the earlier 500 MW co-location scenario
+    # dh_lng_absorb: LNG -162C to -140C, ~600 kJ/kg in the condenser (latent 510 + sensible)
+    # dh_ocr_cycle: propane latent heat is ~425 kJ/kg, ~350 kJ/kg effective in the cycle
+    # orc_cycle_thermal_eff: realistic thermal efficiency for this temperature range
+    heat_load_kw = target_it_load_mw * 1000.0
+
+    # Mass Balance
+    # Loop 1: LNG Flow
+    m_dot_lng = (lng_flow_m3_day * lng_density) / (24 * 3600) # kg/s
+
+    # Loop 2: OCR Flow (at full LNG cold capacity)
+    q_condenser_kw = m_dot_lng * dh_lng_absorb * hx_efficiency
+    q_evaporator_max_kw = q_condenser_kw / (1.0 - orc_cycle_thermal_eff)
+
+    # Server heat actually taken by the ORC; the rest is rejected to the FW source
+    q_evaporator_kw = np.minimum(q_evaporator_max_kw, heat_load_kw)
+    w_turbine_kw = q_evaporator_kw * orc_cycle_thermal_eff
+    m_dot_ocr = q_evaporator_kw / dh_ocr_cycle
+    lng_heat_fraction = q_evaporator_kw / heat_load_kw
+
+    # Loop 3: Server Fluid Flow
+    m_dot_server = q_evaporator_kw / (cp_server * dt_server)
+    server_pump_power_kw = (m_dot_server / 1000.0 * dp_water) / pump_efficiency
+
+    # Air side and the FW loop for the remaining heat
+    fw = fw_fan_cooling(target_it_load_mw, dt_air=dt_air, dp_air=dp_air, fan_efficiency=fan_efficiency,
+                        dt_water=dt_water, dp_water=dp_water, pump_efficiency=pump_efficiency,
+                        dp_source=dp_source)
+    fw_pump_power_kw = (fw['pump_power_kw'] + fw['source_pump_power_kw']) * (1.0 - lng_heat_fraction)
+
+    # Power Generation
+    w_gen_final_kw = w_turbine_kw * generator_efficiency
+    w_gen_final_mw = w_gen_final_kw / 1000.0
+
+    total_cooling_power_kw = fw['fan_power_kw'] + server_pump_power_kw + fw_pump_power_kw
+    total_cooling_power_mw = total_cooling_power_kw / 1000.0
+    pue = (target_it_load_mw + total_cooling_power_mw) / target_it_load_mw
+
+    return {
+        'target_it_load_mw': target_it_load_mw,
+        'm_dot_lng': m_dot_lng,
+        'm_dot_ocr': m_dot_ocr,
+        'm_dot_server': m_dot_server,
+        'q_evaporator_kw': q_evaporator_kw,
+        'lng_heat_fraction': lng_heat_fraction,
+        'fan_power_kw': fw['fan_power_kw'],
+        'server_pump_power_kw': server_pump_power_kw,
+        'fw_pump_power_kw': fw_pump_power_kw,
+        'total_cooling_power_mw': total_cooling_power_mw,
+        'pue': pue,
+        **_net(target_it_load_mw, total_cooling_power_mw, w_gen_final_mw),
+    }
+
+
+ARCHITECTURES = {
+    'fw_fan': fw_fan_cooling,
+    'chiller': chiller_cooling,
+    'lng_orc': lng_orc_cooling,
+}
+
+
+def model_params(model=fw_fan_cooling):
+    """{input name: default} of a cooling model."""
+    return {name: p.default for name, p in inspect.signature(model).parameters.items()}
+
+
+def evaluate(params=None, model=fw_fan_cooling, strict=True):
+    """
+    Evaluate `model` for a table of scenarios in one vectorized call.
+
+    `params` is a DataFrame or a mapping of input name -> scalar/array; inputs
+    that are not given take the model defaults and everything is broadcast to a
+    common length. Inputs the model doesn't take raise ValueError, or are
+    ignored with strict=False. Returns one row per scenario: the inputs, then
+    the outputs.
+    """
+    import pandas as pd
+
+    defaults = model_params(model)
+    if params is None:
+        params = {}
+    given = {k: params[k].to_numpy() for k in params} if isinstance(params, pd.DataFrame) else dict(params)
+    unknown = set(given) - set(defaults)
+    if unknown and strict:
+        raise ValueError(f"unknown inputs for {model.__name__}: {sorted(unknown)}")
+    given = {k: v for k, v in given.items() if k in defaults}
+
+    merged = {**defaults, **given}
+    arrays = np.broadcast_arrays(*(np.atleast_1d(np.asarray(merged[k], dtype=np.float64)) for k in defaults))
+    inputs = dict(zip(defaults, arrays))
+    outputs = model(**inputs)
+
+    table = pd.DataFrame({k: np.ravel(v) for k, v in inputs.items()})
+    for k, v in outputs.items():
+        if k not in table:
+            table[k] = np.broadcast_to(v, arrays[0].shape).ravel()
+    return table
+
+
+def compare_architectures(params=None, architectures=None):
+    """
+    Evaluate every architecture on the same scenarios.
+
+    Each model takes the inputs it knows from `params` (the rest keep their
+    defaults; names no architecture takes raise ValueError). Returns a long
+    table: scenario, architecture, the swept inputs and COMMON_OUTPUTS, sorted
+    by scenario then net PUE.
+    """
+    import pandas as pd
+
+    architectures = ARCHITECTURES if architectures is None else architectures
+    params = {} if params is None else params
+    names = list(params.columns if isinstance(params, pd.DataFrame) else params)
+    # Each model ignores the inputs it doesn't take, but a name no model takes is a typo
+    known = set().union(*(model_params(model) for model in architectures.values()))
+    unknown = set(names) - known
+    if unknown:
+        raise ValueError(f"unknown inputs for every architecture: {sorted(unknown)}")
+    # Broadcast up front so models that ignore some inputs still see every scenario
+    arrays = np.broadcast_arrays(*(np.atleast_1d(np.asarray(params[k], dtype=np.float64)) for k in names)) \
+        if names else [np.zeros(1)]
+    params = dict(zip(names, (a.ravel() for a in arrays)))
+    n = arrays[0].size
+
+    frames = []
+    for name, model in architectures.items():
+        result = evaluate(params, model=model, strict=False)
+        table = pd.DataFrame({'scenario': np.arange(n), 'architecture': name, **params})
+        for col in COMMON_OUTPUTS:
+            if col not in table:
+                table[col] = np.broadcast_to(result[col].to_numpy(), n)
+        frames.append(table)
+    out = pd.concat(frames, ignore_index=True)
+    return out.sort_values(['scenario', 'net_pue'], kind='stable').reset_index(drop=True)
+
+
+def parameter_grid(**axes):
+    """Cartesian product of the given axes as {name: flat array} (first axis varies slowest)."""
+    mesh = np.meshgrid(*(np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in axes.values()), indexing='ij')
+    return {name: m.ravel() for name, m in zip(axes, mesh)}
+
+
+def iter_sweep(axes, fixed=None, model=fw_fan_cooling, chunk_size=SWEEP_CHUNK_SIZE):
+    """
+    Evaluate the Cartesian grid over `axes` ({name: values}) chunk by chunk.
+
+    The grid is never materialized: each chunk decodes its flat scenario
+    indices with np.unravel_index. `fixed` overrides model defaults for inputs
+    that are not swept. Yields result DataFrames of at most `chunk_size` rows.
+    """
+    names = list(axes)
+    values = [np.atleast_1d(np.asarray(axes[n], dtype=np.float64)) for n in names]
+    shape = tuple(len(v) for v in values)
+    total = int(np.prod(shape))
+    for start in range(0, total, chunk_size):
+        idx = np.unravel_index(np.arange(start, min(start + chunk_size, total)), shape)
+        params = dict(fixed or {})
+        params.update({n: v[i] for n, v, i in zip(names, values, idx)})
+        count('sweep_scenarios', len(idx[0]))
+        yield evaluate(params, model=model)
+
+
+def sweep(axes, fixed=None, model=fw_fan_cooling, chunk_size=SWEEP_CHUNK_SIZE, out=None):
+    """
+    Full Cartesian sweep. Returns the tidy result table, or with `out`
+    (.parquet or .csv) writes it chunk by chunk and returns the row count.
+    """
+    chunks = iter_sweep(axes, fixed=fixed, model=model, chunk_size=chunk_size)
+    if out is None:
+        import pandas as pd
+        return pd.concat(chunks, ignore_index=True)
+
+    rows = 0
+    if out.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                batch = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(out, batch.schema)
+                writer.write_table(batch)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(out, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(chunk)
+    return rows
+
+
+def print_report(r):
+    """The FW + fan design report for one scenario (a result row or dict)."""
+    target_it_load_mw = r['target_it_load_mw']
+    vol_flow_air = r['vol_flow_air']
+    fan_power_kw = r['fan_power_kw']
+    vol_flow_fw = r['vol_flow_fw']
+    pump_power_kw = r['pump_power_kw']
+    source_pump_power_kw = r['source_pump_power_kw']
+    total_cooling_power_mw = r['total_cooling_power_mw']
+    pue = r['pue']
+
+    print(f"[1] SYSTEM PARAMETERS (FW + FAN COOLING)")
+    print(f"  Target IT Load         : {target_it_load_mw:.2f} MW")
+
     # --- OUTPUT ---
     print(f"\n[2] COMPONENT ANALYSIS")
     print(f"  A. Air Handling (Fans)")
@@ -105,42 +379,111 @@ def simulate_full_system_balance():
     print(f"     Power Consumption   : {pump_power_kw/1000:.2f} MW")
     print(f"  C. Heat Rejection (Source Pumps - River/Lake)")
     print(f"     Power Consumption   : {source_pump_power_kw/1000:.2f} MW")
-    
+
     print(f"\n[3] PERFORMANCE RESULTS")
     print(f"  IT Load                : {target_it_load_mw:.2f} MW")
     print(f"  Total Cooling Power    : {total_cooling_power_mw:.2f} MW")
     print(f"  ✅ ESTIMATED PUE       : {pue:.4f}")
-    
+
     print("-" * 60)
     print("NOTE: This simulation assumes a highly efficient water-cooled design (River/Lake Source).")
     print("      Does not include mechanical chiller compressor power (Free Cooling presumed).")
     print("      If chillers are required, PUE would typically increase to 1.3 - 1.4.")
     print("-" * 60)
 
-    # --- COMMENTED OUT: OLD LNG-OCR LOGIC ---
-    """
-    # Mass Balance
-    # Loop 1: LNG Flow
-    m_dot_lng = (lng_flow_m3_day * lng_density) / (24 * 3600) # kg/s
 
-    # Loop 2: OCR Flow
-    q_condenser_kw = m_dot_lng * dh_lng_absorb * hx_efficiency
-    
-    q_evaporator_kw = q_condenser_kw / (1.0 - orc_cycle_thermal_eff)
-    w_turbine_kw = q_evaporator_kw - q_condenser_kw 
-    
-    m_dot_ocr = q_evaporator_kw / dh_ocr_cycle
-    
-    # Loop 3: Server Fluid Flow
-    m_dot_server = q_evaporator_kw / (cp_water * dt_server)
+def simulate_full_system_balance():
+    print("=== FINAL DESIGN SIMULATION: LNG-OCR-SERVER SYSTEM ===\n")
 
-    # Power Generation
-    w_gen_final_kw = w_turbine_kw * generator_efficiency
-    w_gen_final_mw = w_gen_final_kw / 1000.0
-    
-    # ... (Rest of the old logic) ...
+    # --- FW + FAN COOLING SIMULATION ---
+    # The LNG-OCR loop lives in lng_orc_cooling(); see `--compare` for all architectures.
+
+    # 1. Define Target Load directly
+    target_it_load_mw = 360.0
+
+    # Single design: call the model directly (no result table, so no pandas import)
+    print_report({'target_it_load_mw': target_it_load_mw, **fw_fan_cooling(target_it_load_mw)})
+
+
+def print_comparison(table, inputs=None):
+    """
+    Net PUE / net power per scenario and architecture (compare_architectures()
+    output). `inputs` are the columns that identify a scenario, by default
+    every column up to the outputs (target_it_load_mw included when it varies).
     """
+    if inputs is None:
+        inputs = [c for c in table.columns if c not in COMMON_OUTPUTS and c not in ('scenario', 'architecture')]
+        if table['target_it_load_mw'].nunique() > 1:
+            inputs.insert(0, 'target_it_load_mw')
+    wide = table.pivot(index='scenario', columns='architecture', values=['net_pue', 'net_power_mw'])
+    wide.columns = [f"{arch} {metric}" for metric, arch in wide.columns]
+    scenarios = table.drop_duplicates('scenario').set_index('scenario')[inputs]
+    best = table.groupby('scenario', sort=True)['architecture'].first().rename('best')
+    print(scenarios.join(wide).join(best).to_string(float_format=lambda v: f"{v:,.4f}"))
+
+
+def _parse_axis(spec):
+    """'name=start:stop:num' (linspace) or 'name=v1,v2,...' -> (name, values)."""
+    name, _, values = spec.partition('=')
+    if ':' in values:
+        start, stop, num = values.split(':')
+        return name, np.linspace(float(start), float(stop), int(num))
+    return name, np.array([float(v) for v in values.split(',')])
+
+
+def main(argv=None, prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Data-center cooling / PUE models.")
+    parser.add_argument('--sweep', nargs='+', metavar='NAME=SPEC',
+                        help="axes to sweep, 'name=start:stop:num' or 'name=v1,v2,...' "
+                             f"(inputs: {', '.join(model_params())})")
+    parser.add_argument('--set', nargs='+', default=[], metavar='NAME=VALUE', help="fixed non-default inputs")
+    parser.add_argument('--compare', action='store_true',
+                        help=f"evaluate every architecture ({', '.join(ARCHITECTURES)}) on the sweep grid")
+    parser.add_argument('--out', help="write the sweep to this .parquet or .csv file")
+    parser.add_argument('--chunk-size', type=int, default=SWEEP_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        axes = dict(_parse_axis(s) for s in args.sweep or [])
+        fixed = {k: float(v) for k, v in (s.split('=') for s in args.set)}
+    except ValueError as e:
+        parser.error(f"bad NAME=SPEC / NAME=VALUE: {e}")
+    if args.compare:
+        start = time.perf_counter()
+        try:
+            table = compare_architectures({**fixed, **parameter_grid(**axes)})
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = time.perf_counter() - start
+        print(f"Evaluated {table['scenario'].nunique():,} scenarios x {len(ARCHITECTURES)} architectures "
+              f"in {elapsed:.2f}s")
+        if args.out:
+            table.to_parquet(args.out, index=False) if args.out.endswith('.parquet') else table.to_csv(args.out, index=False)
+            print(f"Saved to {args.out}")
+        else:
+            print_comparison(table, inputs=list(axes) or None)
+    elif not args.sweep:
+        simulate_full_system_balance()
+    else:
+        n = int(np.prod([len(v) for v in axes.values()]))
+        start = time.perf_counter()
+        try:
+            # An unknown name fails on the first chunk, before --out is created
+            result = sweep(axes, fixed=fixed, chunk_size=args.chunk_size, out=args.out)
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = time.perf_counter() - start
+        if args.out:
+            print(f"Evaluated {n:,} scenarios in {elapsed:.2f}s -> {args.out}")
+        else:
+            print(f"Evaluated {n:,} scenarios in {elapsed:.2f}s")
+            print(result['pue'].describe().to_string())
+            best = result.loc[result['pue'].idxmin()]
+            print("\nLowest PUE scenario:")
+            print(best.to_string())
 
 
 if __name__ == "__main__":
-    simulate_full_system_balance()
+    main()
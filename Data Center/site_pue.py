@@ -0,0 +1,167 @@
+"""
+Per-site PUE for every geocoded data center.
+
+Each data center in datacenters_with_coords.csv is matched to the nearest
+cell of a local gridded climate file (KD-tree on unit-sphere coordinates, as
+in plant_proximity.py). The cell's climate profile is run through
+hourly_simulation.simulate_hourly(), so every site gets an energy-weighted
+annual PUE, peak PUE, free-cooling hours and cooling MW at its IT load.
+
+Many sites share a cell, so only the cells actually used are simulated; they
+are split into chunks and evaluated in a process pool.
+
+Climate file (CSV or Parquet), one row per cell and time step (hour, month,
+... - rows of a cell are equally weighted):
+    lat, lon, dry_bulb_c, wet_bulb_c, water_temp_c
+
+The map (map_visualization_interactive.py) colors the data-center layer by
+`annual_pue` when site_pue.csv exists, matching sites on name + address.
+
+    python site_pue.py climate_grid.parquet --it-load 360 --out site_pue.csv
+    python site_pue.py --synthetic-grid 1.0     # demo with a generated 1-degree grid
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from hourly_simulation import annual_summary, simulate_hourly
+from plant_proximity import chord_to_km, to_unit_xyz
+
+SITE_PUE_FILE = 'site_pue.csv'
+CELLS_PER_CHUNK = 200
+# Per-cell columns of hourly_simulation.annual_summary() used below
+SUMMARY_COLUMNS = ['annual_pue', 'peak_pue', 'free_hours', 'mechanical_hours', 'hours']
+
+
+def load_climate_grid(path):
+    """Read a gridded climate file and give every (lat, lon) cell an id."""
+    grid = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    grid = grid.rename(columns={'latitude': 'lat', 'longitude': 'lon'})
+    grid['cell'] = grid.groupby(['lat', 'lon'], sort=False).ngroup()
+    return grid
+
+
+def synthetic_climate_grid(step_deg=1.0, periods=12, seed=0):
+    """Monthly climate over the lower 48 on a regular grid (demo/benchmark data only)."""
+    rng = np.random.default_rng(seed)
+    lat, lon = np.meshgrid(np.arange(24.5, 49.5, step_deg), np.arange(-124.5, -66.5, step_deg), indexing='ij')
+    lat, lon = lat.ravel(), lon.ravel()
+    n = len(lat)
+    mean = 27.0 - 0.75 * (lat - 25.0) + rng.normal(0, 1.0, n)   # colder to the north
+    swing = 6.0 + 0.3 * (lat - 25.0)
+    month = np.arange(periods)
+    season = -np.cos(2 * np.pi * (month - 0.5) / periods)        # coldest in January
+    dry = mean[:, None] + swing[:, None] * season[None, :]
+    water = mean[:, None] - 2.0 + 0.6 * swing[:, None] * np.roll(season, 1)[None, :]
+    return pd.DataFrame({
+        'lat': np.repeat(lat, periods), 'lon': np.repeat(lon, periods),
+        'month': np.tile(month + 1, n),
+        'dry_bulb_c': dry.ravel(), 'wet_bulb_c': (dry - 5.0).ravel(), 'water_temp_c': water.ravel(),
+        'cell': np.repeat(np.arange(n), periods),
+    })
+
+
+def nearest_cells(grid, lat, lon):
+    """(cell id, distance km) of the nearest grid cell for each point."""
+    cells = grid.drop_duplicates('cell')[['cell', 'lat', 'lon']]
+    tree = cKDTree(to_unit_xyz(cells['lat'], cells['lon']))
+    chord, idx = tree.query(to_unit_xyz(lat, lon), k=1)
+    return cells['cell'].to_numpy()[idx], chord_to_km(chord), cells
+
+
+def _simulate_cells(weather, condenser, design):
+    weather = weather.rename(columns={'cell': 'site'})
+    weather['hour'] = weather.groupby('site', sort=False).cumcount()
+    return annual_summary(simulate_hourly(weather, it_load_mw=1.0, condenser=condenser, **design))
+
+
+def simulate_sites(data_centers, grid, it_load_mw=360.0, condenser='water', max_km=None,
+                   workers=None, cells_per_chunk=CELLS_PER_CHUNK, **design):
+    """
+    Annual PUE per data center from its nearest climate cell.
+
+    `it_load_mw` is a scalar or a per-row array aligned with `data_centers`
+    (PUE itself does not depend on it; cooling MW does). Sites farther than
+    `max_km` from any cell get NaN. Returns one row per geocoded data center,
+    keyed by plant_data.DATA_CENTER_KEY (name + address; `dc_index` is the
+    input row, for reference only since it changes when the CSV is rebuilt).
+    """
+    dcs = data_centers.dropna(subset=['Latitude', 'Longitude'])
+    cell, dist_km, _ = nearest_cells(grid, dcs['Latitude'], dcs['Longitude'])
+    if max_km is not None:
+        cell = np.where(dist_km <= max_km, cell, -1)
+
+    used = np.unique(cell[cell >= 0])
+    profiles = grid[grid['cell'].isin(used)]
+    chunks = [profiles[profiles['cell'].isin(part)] for part in np.array_split(used, max(1, -(-len(used) // cells_per_chunk)))]
+    chunks = [c for c in chunks if len(c)]
+    if workers == 1 or len(chunks) <= 1:
+        results = [_simulate_cells(c, condenser, design) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results = list(pool.map(_simulate_cells, chunks, [condenser] * len(chunks), [design] * len(chunks)))
+    if results:
+        per_cell = pd.concat(results, ignore_index=True).set_index('site')
+    else:
+        # No site within max_km of a cell: every site gets NaN
+        per_cell = pd.DataFrame(columns=SUMMARY_COLUMNS, dtype=np.float64)
+
+    load = np.broadcast_to(np.asarray(it_load_mw, dtype=np.float64), len(data_centers))
+    load = pd.Series(load, index=data_centers.index).loc[dcs.index].to_numpy()
+    out = pd.DataFrame({
+        'dc_index': dcs.index,
+        'Data Center Name': dcs['Data Center Name'].to_numpy(),
+        'Address': dcs['Address'].to_numpy(),
+        'Provider': dcs['Provider'].to_numpy(),
+        'Latitude': dcs['Latitude'].to_numpy(),
+        'Longitude': dcs['Longitude'].to_numpy(),
+        'cell': cell,
+        'cell_km': np.round(dist_km, 1),
+        'it_load_mw': load,
+    })
+    stats = per_cell.reindex(cell)
+    out['annual_pue'] = stats['annual_pue'].to_numpy()
+    out['peak_pue'] = stats['peak_pue'].to_numpy()
+    out['free_cooling_share'] = (stats['free_hours'] / stats['hours']).to_numpy()
+    out['mechanical_share'] = (stats['mechanical_hours'] / stats['hours']).to_numpy()
+    out['cooling_mw'] = (out['annual_pue'] - 1.0) * load
+    out['peak_cooling_mw'] = (out['peak_pue'] - 1.0) * load
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from plant_data import load_data_centers
+
+    parser = argparse.ArgumentParser(description="Annual PUE for every geocoded data center from a climate grid.")
+    parser.add_argument('grid', nargs='?', help="gridded climate file (.csv or .parquet)")
+    parser.add_argument('--synthetic-grid', type=float, metavar='STEP_DEG', help="use a generated grid instead")
+    parser.add_argument('--it-load', type=float, default=360.0, help="IT load per site (MW)")
+    parser.add_argument('--condenser', choices=['water', 'tower', 'air'], default='water')
+    parser.add_argument('--max-km', type=float, default=None, help="ignore cells farther than this")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=SITE_PUE_FILE)
+    args = parser.parse_args()
+
+    if args.synthetic_grid:
+        grid = synthetic_climate_grid(args.synthetic_grid)
+    elif args.grid:
+        grid = load_climate_grid(args.grid)
+    else:
+        parser.error("give a climate grid file or --synthetic-grid STEP")
+
+    dcs = load_data_centers()
+    start = time.perf_counter()
+    sites = simulate_sites(dcs, grid, it_load_mw=args.it_load, condenser=args.condenser,
+                           max_km=args.max_km, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    sites.to_csv(args.out, index=False)
+    print(f"{len(sites)} sites, {sites['cell'].nunique()} climate cells simulated in {elapsed:.2f}s")
+    print(sites['annual_pue'].describe().to_string())
+    print(f"Saved to {args.out}")
@@ -0,0 +1,170 @@
+"""
+Co-location siting screen: which EIA-860 plants can host a target IT load?
+
+For each target IT load the cooling model in simulation.py gives the PUE, so
+the grid power a site needs is `IT load x PUE`. Every (plant, fuel category)
+pair with at least that much nameplate capacity is a candidate, scored on:
+
+  proximity  - distance to the nearest existing data center (exp decay)
+  cluster    - number of data centers within `cluster_km` (fiber, labor, permits)
+  density    - state data-center count from data_centers.csv
+  headroom   - capacity / required power, capped at 3x
+
+All load levels are evaluated at once as a (loads x candidates) matrix, so a
+sweep over dozens of loads and every plant is a handful of NumPy operations.
+
+    python siting_screen.py --loads 100 200 360 500 --top 25
+    python siting_screen.py --sweep 50 1000 50 --top 10
+"""
+import numpy as np
+
+from plant_data import CAPACITY_COLUMNS
+from plant_proximity import chord_to_km, km_to_chord, to_unit_xyz
+from simulation import fw_fan_cooling
+
+DEFAULT_WEIGHTS = {'proximity': 0.35, 'cluster': 0.25, 'density': 0.25, 'headroom': 0.15}
+PROXIMITY_SCALE_KM = 50.0
+CLUSTER_KM = 50.0
+MAX_HEADROOM = 3.0
+
+# Columns of the screen_sites() result (also when no candidate is eligible)
+RESULT_COLUMNS = ['it_load_mw', 'pue', 'required_mw', 'rank', 'category', 'Plant Code', 'Plant Name', 'State',
+                  'Latitude', 'Longitude', 'capacity_mw', 'headroom', 'nearest_dc_km', 'dcs_within_km',
+                  'state_dc_count', 'score', 'eligible_candidates']
+
+
+def site_features(plant_locations, data_centers, state_counts, cluster_km=CLUSTER_KM):
+    """Per-plant features that don't depend on the load level."""
+    import pandas as pd
+    from scipy.spatial import cKDTree
+
+    dcs = data_centers.dropna(subset=['Latitude', 'Longitude'])
+    dc_tree = cKDTree(to_unit_xyz(dcs['Latitude'], dcs['Longitude']))
+    plant_xyz = to_unit_xyz(plant_locations['Latitude'], plant_locations['Longitude'])
+
+    chord, _ = dc_tree.query(plant_xyz, k=1)
+    n_near = dc_tree.query_ball_point(plant_xyz, r=float(km_to_chord(cluster_km)), return_length=True)
+    state_dc = plant_locations['State'].astype(object).map(state_counts).fillna(0).to_numpy(dtype=np.float64)
+
+    return pd.DataFrame({
+        'nearest_dc_km': chord_to_km(chord),
+        'dcs_within_km': n_near,
+        'state_dc_count': state_dc,
+    }, index=plant_locations.index)
+
+
+def screen_sites(plant_locations, data_centers, state_counts, it_loads_mw, pue=None,
+                 weights=DEFAULT_WEIGHTS, top=None, categories=CAPACITY_COLUMNS, cluster_km=CLUSTER_KM):
+    """
+    Rank every (plant, category) candidate for each IT load level.
+
+    `pue` defaults to the FW + fan cooling model evaluated at each load.
+    Returns a long DataFrame (RESULT_COLUMNS) sorted by load and rank; `top` keeps
+    the best N per load. Loads no plant can supply have no rows.
+    """
+    import pandas as pd
+
+    loads = np.atleast_1d(np.asarray(it_loads_mw, dtype=np.float64))
+    if pue is None:
+        pue = fw_fan_cooling(loads)['pue']
+    pue = np.broadcast_to(np.asarray(pue, dtype=np.float64), loads.shape)
+    required = loads * pue
+
+    plants = plant_locations.reset_index(drop=True)
+    feats = site_features(plants, data_centers, state_counts, cluster_km=cluster_km)
+
+    # Candidate list: one entry per (plant, category) with capacity > 0
+    cat_names = list(categories)
+    cap_matrix = plants[[categories[c] for c in cat_names]].to_numpy(dtype=np.float64)
+    plant_pos, cat_pos = np.nonzero(cap_matrix > 0)
+    capacity = cap_matrix[plant_pos, cat_pos]
+
+    # Load-independent part of the score
+    f = feats.iloc[plant_pos]
+    proximity = np.exp(-f['nearest_dc_km'].to_numpy() / PROXIMITY_SCALE_KM)
+    cluster = np.log1p(f['dcs_within_km'].to_numpy())
+    cluster = cluster / cluster.max() if cluster.max() > 0 else cluster
+    density = f['state_dc_count'].to_numpy()
+    density = density / density.max() if density.max() > 0 else density
+    base = weights['proximity'] * proximity + weights['cluster'] * cluster + weights['density'] * density
+
+    # (loads x candidates)
+    ratio = capacity[None, :] / required[:, None]
+    eligible = ratio >= 1.0
+    headroom = (np.minimum(ratio, MAX_HEADROOM) - 1.0) / (MAX_HEADROOM - 1.0)
+    score = np.where(eligible, base[None, :] + weights['headroom'] * headroom, -np.inf)
+
+    frames = []
+    for li in range(len(loads)):
+        n_ok = int(eligible[li].sum())
+        n_keep = n_ok if top is None else min(top, n_ok)
+        if n_keep == 0:
+            continue
+        row = score[li]
+        best = np.argpartition(-row, n_keep - 1)[:n_keep] if n_keep < len(row) else np.arange(len(row))
+        best = best[np.argsort(-row[best], kind='stable')][:n_keep]
+        frames.append(pd.DataFrame({
+            'it_load_mw': loads[li],
+            'pue': pue[li],
+            'required_mw': required[li],
+            'rank': np.arange(1, n_keep + 1),
+            'category': np.asarray(cat_names)[cat_pos[best]],
+            'Plant Code': plants['Plant Code'].to_numpy()[plant_pos[best]],
+            'Plant Name': plants['Plant Name'].to_numpy()[plant_pos[best]],
+            'State': plants['State'].to_numpy()[plant_pos[best]],
+            'Latitude': plants['Latitude'].to_numpy()[plant_pos[best]],
+            'Longitude': plants['Longitude'].to_numpy()[plant_pos[best]],
+            'capacity_mw': capacity[best],
+            'headroom': ratio[li, best],
+            'nearest_dc_km': f['nearest_dc_km'].to_numpy()[best],
+            'dcs_within_km': f['dcs_within_km'].to_numpy()[best],
+            'state_dc_count': f['state_dc_count'].to_numpy()[best],
+            'score': row[best],
+            'eligible_candidates': n_ok,
+        }))
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None, prog=None):
+    import argparse
+    import time
+
+    from plant_data import (DATA_CENTERS_FILE, EIA_DIR, STATE_COUNTS_FILE, load_data_centers,
+                            load_plant_locations, load_state_dc_counts)
+
+    parser = argparse.ArgumentParser(prog=prog, description="Rank EIA-860 plants as co-location sites for a target IT load.")
+    parser.add_argument('--loads', type=float, nargs='+', default=[360.0], help="target IT loads (MW)")
+    parser.add_argument('--sweep', type=float, nargs=3, metavar=('START', 'STOP', 'STEP'),
+                        help="sweep IT loads from START to STOP (inclusive) by STEP instead of --loads")
+    parser.add_argument('--top', type=int, default=50, help="candidates kept per load level")
+    parser.add_argument('--eia-dir', default=EIA_DIR, help="EIA-860 year directory")
+    parser.add_argument('--data-centers', default=DATA_CENTERS_FILE, help="geocoded data-center CSV")
+    parser.add_argument('--state-counts', default=STATE_COUNTS_FILE, help="state data-center counts CSV")
+    parser.add_argument('--out', default='siting_candidates.csv')
+    args = parser.parse_args(argv)
+
+    loads = np.arange(args.sweep[0], args.sweep[1] + args.sweep[2] / 2, args.sweep[2]) if args.sweep else args.loads
+
+    plant_locations = load_plant_locations(args.eia_dir, verbose=False)
+    dcs = load_data_centers(args.data_centers)
+    state_counts = load_state_dc_counts(args.state_counts)
+
+    start = time.perf_counter()
+    ranked = screen_sites(plant_locations, dcs, state_counts, loads, top=args.top)
+    elapsed = time.perf_counter() - start
+
+    ranked.to_csv(args.out, index=False)
+    print(f"Screened {len(plant_locations)} plants at {len(loads)} load levels in {elapsed:.2f}s")
+    if ranked.empty:
+        print(f"No plant has enough capacity for any of the load levels; wrote an empty {args.out}")
+        return
+    summary = ranked.groupby('it_load_mw').agg(required_mw=('required_mw', 'first'),
+                                                eligible=('eligible_candidates', 'first'))
+    print(summary.to_string())
+    print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import pytest
+
+from address_dedup import block_key, canonicalize, dedupe_addresses
+
+
+@pytest.mark.parametrize('addr, canon', [
+    ("100 Main St, Miami, FL 33101, USA", "100 MAIN ST, MIAMI, FL 33101"),
+    ("100 Main St, Miami, Florida 33101", "100 MAIN ST, MIAMI, FL 33101"),
+    ("100 Main St, Miami, FL, USA", "100 MAIN ST, MIAMI, FL"),
+    ("100 Main St Ste 200 Miami FL 33101", "100 MAIN ST MIAMI FL 33101"),
+])
+def test_florida_state_and_zip_are_kept(addr, canon):
+    assert canonicalize(addr) == canon
+
+
+@pytest.mark.parametrize('addr, canon', [
+    ("9310 Florida Palm Drive, Tampa, FL", "9310 FLORIDA PALM DR, TAMPA, FL"),
+    ("12 Floral Way, Ocala, Florida 34470", "12 FLORAL WAY, OCALA, FL 34470"),
+    ("1 Apt Rd, Austin, TX", "1 APT RD, AUSTIN, TX"),
+    ("5 Room Ave, Reno, NV", "5 ROOM AVE, RENO, NV"),
+    ("8 Unity Blvd, Reno, NV", "8 UNITY BLVD, RENO, NV"),
+])
+def test_street_names_starting_with_unit_words_survive(addr, canon):
+    assert canonicalize(addr) == canon
+
+
+@pytest.mark.parametrize('addr', [
+    "123 Main Road, Ste 200, Ashburn, VA 20147, USA",
+    "123 Main Road Suite #B-2, Ashburn, VA 20147",
+    "123 Main Road Fl 3, Ashburn, VA 20147",
+    "123 Main Road, Rm 101, Ashburn, VA 20147",
+    "123 Main Road Apt. 4B, Ashburn, VA 20147",
+    "123 Main Road #400, Ashburn, VA 20147",
+])
+def test_units_are_stripped(addr):
+    assert canonicalize(addr) == "123 MAIN RD, ASHBURN, VA 20147"
+
+
+def test_florida_block_key_is_zip_or_state_city():
+    assert block_key(canonicalize("100 Main St, Miami, FL 33101, USA")) == '33101'
+    assert block_key(canonicalize("100 Main St, Miami, FL, USA")) == 'FL|MIAMI'
+
+
+def test_different_zips_are_not_merged():
+    addrs = ["36 Northeast 2nd Street, Miami, FL 33132, USA",
+             "36 Northeast 2nd Street, Miami, FL 33137, USA",
+             "36 NE 2nd St #400, Miami, FL 33132, USA"]
+    groups, stats = dedupe_addresses(addrs)
+    assert stats['lookups'] == 2
+    assert sorted(map(len, groups.values())) == [1, 2]
+
+
+def test_variants_collapse():
+    addrs = ["50 Northeast 9th Street, Miami, FL 33132, USA",
+             "50 Northeast 9th Street, Miami, FL 33132, United States",
+             "50 NE 9th St, Miami, Florida 33132, USA"]
+    groups, stats = dedupe_addresses(addrs)
+    assert stats['lookups'] == 1
+    assert groups[addrs[0]] == addrs
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from build_graph import BuildGraph
+
+CALLS = []
+
+
+def parse(path):
+    CALLS.append('parse')
+    with open(path) as f:
+        return [int(line) for line in f if line.strip()]
+
+
+def total(values, scale):
+    CALLS.append('total')
+    return {'total': sum(values) * scale}
+
+
+def frame(values):
+    CALLS.append('frame')
+    return pd.DataFrame({'v': values})
+
+
+def _graph(tmp_path, src, scale=1):
+    graph = BuildGraph(build_dir=str(tmp_path / '.build'), verbose=False)
+    graph.source('src', str(src))
+    graph.node('values', parse, deps=['src'])
+    graph.node('total', total, deps=['values'], params={'scale': scale})
+    graph.node('frame', frame, deps=['values'])
+    return graph
+
+
+def test_early_cutoff(tmp_path):
+    src = tmp_path / 'values.txt'
+    src.write_text('1\n2\n')
+    CALLS.clear()
+    assert _graph(tmp_path, src).run() == {'src': 'source', 'values': 'run', 'total': 'run', 'frame': 'run'}
+
+    # Nothing changed: nothing runs, nothing is loaded
+    CALLS.clear()
+    graph = _graph(tmp_path, src)
+    assert set(graph.run().values()) == {'source', 'cached'} and CALLS == []
+    assert graph.value('total') == {'total': 3}
+    pd.testing.assert_frame_equal(graph.value('frame'), pd.DataFrame({'v': [1, 2]}))
+
+    # A blank line changes the file but not the parsed values: only the parser re-runs
+    src.write_text('1\n\n2\n')
+    CALLS.clear()
+    status = _graph(tmp_path, src).run()
+    assert status['values'] == 'run' and status['total'] == status['frame'] == 'cached'
+    assert CALLS == ['parse']
+
+    # New content propagates; a changed parameter re-runs only its node
+    src.write_text('1\n2\n3\n')
+    CALLS.clear()
+    graph = _graph(tmp_path, src)
+    graph.run()
+    assert CALLS == ['parse', 'total', 'frame'] and graph.value('total') == {'total': 6}
+    CALLS.clear()
+    graph = _graph(tmp_path, src, scale=2)
+    assert graph.run()['total'] == 'run' and CALLS == ['total']
+    assert graph.value('total') == {'total': 12}
+
+
+def test_force_reruns_everything(tmp_path):
+    src = tmp_path / 'values.txt'
+    src.write_text('5\n')
+    _graph(tmp_path, src).run()
+    CALLS.clear()
+    _graph(tmp_path, src).run(force=True)
+    assert CALLS == ['parse', 'total', 'frame']
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from capacity_cube import CapacityCube, main
+
+
+@pytest.fixture
+def plants():
+    return pd.DataFrame({
+        'Plant Code': [1, 2, 3, 4, 5],
+        'State': ['VA', 'VA', 'TX', 'TX', None],
+        'Latitude': [39.0, 38.0, 32.8, 30.0, 40.0],
+        'Longitude': [-77.5, -78.0, -96.8, -95.0, -100.0],
+        'nuclear_capacity_mw': [0.0, 0.0, 1200.0, 0.0, 0.0],
+        'gas_capacity_mw': [50.0, 49.9, 300.0, 0.0, 80.0],
+        'other_capacity_mw': [0.0, 0.0, 0.0, 0.0, 0.0],
+        'wind_capacity_mw': [0.0, 0.0, 0.0, 150.0, 0.0],
+        'solar_capacity_mw': [5.0, 0.0, 0.0, 0.0, 0.0],
+    })
+
+
+@pytest.fixture
+def data_centers():
+    return pd.DataFrame({
+        'Latitude': [39.01, 39.02, 32.81, np.nan],
+        'Longitude': [-77.51, -77.52, -96.81, np.nan],
+        'State_Code': ['VA', 'VA', 'TX', 'NV'],
+    })
+
+
+@pytest.fixture
+def cube(plants, data_centers):
+    return CapacityCube.build(plants, data_centers)
+
+
+def test_query(cube):
+    assert cube.query() == {'plants': 6, 'capacity_mw': pytest.approx(1754.9)}
+    # plant 1's 50 MW is at the edge: in ">= 50", plant 2's 49.9 MW is not
+    assert cube.query(state='VA', fuel='gas', min_mw=50) == {'plants': 1, 'capacity_mw': 50.0}
+    assert cube.query(state='VA', fuel='gas', bucket='10-50')['capacity_mw'] == pytest.approx(49.9)
+    assert cube.query(fuel=['nuclear', 'wind'], min_mw=100) == {'plants': 2, 'capacity_mw': 1350.0}
+    # plants 1 and 3 have data centers within 50 km (2 cells each); plant 2 is ~115 km out
+    assert cube.query(density='1-4')['plants'] == 4
+    assert cube.query(density='0', state='VA')['plants'] == 1
+    with pytest.raises(ValueError, match='bucket edges'):
+        cube.query(min_mw=75)
+    with pytest.raises(KeyError, match='unknown state'):
+        cube.query(state='ZZ')
+
+
+def test_rollup_order(cube):
+    out = cube.rollup(['fuel', 'state'], min_mw=10)
+    assert list(out.index.names) == ['fuel', 'state']
+    assert list(out.index.get_level_values('fuel').unique()) == ['nuclear', 'gas', 'other', 'wind', 'solar']
+    assert list(out.index.get_level_values('state').unique()) == ['NV', 'TX', 'VA']
+    assert out.loc[('gas', 'VA'), 'capacity_mw'] == pytest.approx(99.9)
+    assert out.loc[('wind', 'TX'), 'plants'] == 1
+    assert out.loc[('gas', 'TX'), 'data_centers'] == 1
+    assert out['plants'].sum() == 5
+
+    by_state = cube.rollup('state', fuel='gas')
+    assert by_state['data_centers'].tolist() == [1, 1, 2]
+    swapped = cube.rollup(['state', 'fuel'], min_mw=10).swaplevel().sort_index()
+    pd.testing.assert_frame_equal(swapped, out.sort_index())
+
+
+def test_parquet_round_trip(cube, tmp_path):
+    path = str(tmp_path / 'cube.parquet')
+    cube.to_parquet(path)
+    loaded = CapacityCube.from_parquet(path)
+    assert loaded.labels == cube.labels
+    np.testing.assert_array_equal(loaded.values, cube.values)
+    np.testing.assert_array_equal(loaded.state_data_centers, cube.state_data_centers)
+    assert loaded.query(fuel='gas', min_mw=50) == cube.query(fuel='gas', min_mw=50)
+
+
+@pytest.mark.parametrize('query', [['min_mw=75'], ['bogus=1'], ['state=ZZ']])
+def test_cli_query_errors(cube, tmp_path, capsys, query):
+    path = str(tmp_path / 'cube.parquet')
+    cube.to_parquet(path)
+    with pytest.raises(SystemExit):
+        main(['--cube', path, '--query', *query])
+    assert 'error:' in capsys.readouterr().err
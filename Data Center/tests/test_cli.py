@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cli
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_subcommand_usage_uses_prog_without_touching_argv(capsys, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['cli.py'])
+    with pytest.raises(SystemExit) as exc:
+        cli.main(['cube', '--help'])
+    assert exc.value.code == 0
+    assert capsys.readouterr().out.startswith("usage: cli.py cube ")
+    assert sys.argv == ['cli.py']
+
+
+def test_command_modules_import_without_pandas_or_scipy():
+    modules = ', '.join(module for module, _ in cli.COMMANDS.values())
+    code = (f"import sys; import {modules}; "
+            "print(sorted({'pandas', 'scipy'} & {m.split('.')[0] for m in sys.modules}))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
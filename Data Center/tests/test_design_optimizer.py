@@ -0,0 +1,25 @@
+import pytest
+
+from design_optimizer import _problem, optimize_design, temperature_budget
+from simulation import fw_fan_cooling
+
+
+def test_budget_uses_fixed_delta_t_outside_bounds():
+    # dt_air is not searched: the budget falls back to `fixed`, then to the model default
+    bounds = {'dt_water': (5.0, 20.0), 'dp_water': (250.0, 500.0)}
+    res = optimize_design(bounds=bounds, fixed={'dt_air': 20.0}, starts=2, workers=1)
+    assert res['best']['dt_water'] <= temperature_budget() - 20.0 + 1e-6
+
+    res = optimize_design(bounds=bounds, starts=2, workers=1)
+    assert res['best']['dt_water'] <= temperature_budget() - 15.0 + 1e-6
+
+
+def test_objective_scale_includes_fixed():
+    problem = _problem(360.0, 'pue', {'dt_air': (8.0, 25.0)}, {'fan_efficiency': 0.5}, 'fw_fan', None, None, ['pue'])
+    assert problem['objective_scale'] == pytest.approx(fw_fan_cooling(fan_efficiency=0.5)['pue'])
+
+
+def test_output_caps_share_evaluations():
+    res = optimize_design(max_outputs={'vol_flow_fw': 8.0}, starts=2, workers=1)
+    assert res['best']['vol_flow_fw'] <= 8.0 + 1e-6
+    assert res['starts']['cache_hits'].sum() > 0
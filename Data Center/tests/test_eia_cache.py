@@ -0,0 +1,43 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from eia_cache import _cache_paths, read_eia_sheet
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / '2___Plant_Y2024.xlsx')
+    pd.DataFrame([['title', None], ['Plant Code', 'State'], [1, 'VA'], [2, 'TX']]).to_excel(
+        path, index=False, header=False)
+    return path
+
+
+def test_touched_source_refreshes_meta_atomically(workbook, monkeypatch):
+    first = read_eia_sheet(workbook)
+    _, parquet_path, meta_path = _cache_paths(workbook, 0, 1)
+
+    st = os.stat(workbook)
+    os.utime(workbook, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    monkeypatch.setattr(pd, 'read_excel', lambda *a, **k: pytest.fail("content unchanged, must hit the cache"))
+    replaced = []
+    real_replace = os.replace
+    monkeypatch.setattr(os, 'replace', lambda src, dst: (replaced.append(dst), real_replace(src, dst)))
+
+    pd.testing.assert_frame_equal(read_eia_sheet(workbook), first)
+    assert replaced == [meta_path]
+    with open(meta_path) as f:
+        assert json.load(f)['mtime_ns'] == st.st_mtime_ns + 10**9
+    assert not os.path.exists(meta_path + '.tmp')
+
+
+def test_truncated_meta_rebuilds_entry(workbook):
+    first = read_eia_sheet(workbook, columns=['State'])
+    _, _, meta_path = _cache_paths(workbook, 0, 1)
+    with open(meta_path, 'w') as f:
+        f.write('{"version": 1, "si')
+    pd.testing.assert_frame_equal(read_eia_sheet(workbook, columns=['State']), first)
+    with open(meta_path) as f:
+        assert json.load(f)['sha256']
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from geocode_cache import GeocodeCache, normalize_address
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with GeocodeCache(str(tmp_path / 'cache.sqlite'), miss_ttl=100.0, retry_base=30.0, retry_max=100.0) as c:
+        yield c
+
+
+def test_normalized_keys_share_entries(cache):
+    assert normalize_address(' 1  Main st, Reno, NV 89501, USA ') == '1 MAIN ST, RENO, NV 89501'
+    cache.put_hit('1 Main st, Reno, NV 89501, USA', 39.5, -119.8, 'arcgis')
+    hits, skip, todo = cache.lookup_many(['1 MAIN ST, Reno, NV 89501', '2 Oak Rd, Reno, NV'])
+    assert hits == {'1 MAIN ST, Reno, NV 89501': (39.5, -119.8, 'arcgis')}
+    assert skip == [] and todo == ['2 Oak Rd, Reno, NV']
+
+
+def test_miss_ttl(cache):
+    cache.put_miss('nowhere', 'arcgis')
+    now = time.time()
+    assert cache.lookup_many(['nowhere'], now=now)[1] == ['nowhere']
+    assert cache.lookup_many(['nowhere'], now=now + 101.0)[2] == ['nowhere']
+
+
+def test_retry_backoff_doubles_and_caps(cache):
+    delays = [cache.put_failure('flaky', 'arcgis', TimeoutError('t')) for _ in range(4)]
+    assert delays == [30.0, 60.0, 100.0, 100.0]
+    assert cache.stats() == {'retry': 1}
+
+    now = time.time()
+    assert cache.lookup_many(['flaky'], now=now)[1] == ['flaky']
+    assert cache.due_retries(now=now) == []
+    assert cache.due_retries(now=now + 101.0) == ['flaky']
+    assert cache.lookup_many(['flaky'], now=now + 101.0)[2] == ['flaky']
+
+
+def test_hit_clears_retry_state(cache):
+    cache.put_failure('flaky', 'arcgis', ConnectionError('x'))
+    cache.put_hit('flaky', 40.0, -90.0, 'arcgis')
+    assert cache.next_retry_time() is None
+    # attempts restart from the first backoff step
+    assert cache.put_failure('flaky', 'arcgis', ConnectionError('x')) == 30.0
+
+
+def test_entries_persist(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    with GeocodeCache(path) as cache:
+        cache.put_hits([('a', 1.0, 2.0), ('b', 3.0, 4.0)], 'zip')
+    with GeocodeCache(path) as cache:
+        assert cache.lookup_many(['a', 'b'])[0] == {'a': (1.0, 2.0, 'zip'), 'b': (3.0, 4.0, 'zip')}
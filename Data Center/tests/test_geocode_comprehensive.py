@@ -0,0 +1,17 @@
+import pandas as pd
+
+from geocode_comprehensive import geocode_data_centers
+from geocode_engine import SimulatedGeocoder
+
+
+def test_missing_zip_index_falls_through_to_phase2(tmp_path, capsys):
+    src = tmp_path / 'in.csv'
+    pd.DataFrame({'Data Center Name': ['One', 'Two'],
+                  'Address': ['1 Main St, Reno, NV 89501', '2 Oak Rd, Dallas, TX']}).to_csv(src, index=False)
+    geocoder = SimulatedGeocoder(latency=(0.0, 0.0))
+
+    out = geocode_data_centers(str(src), str(tmp_path / 'out.csv'), str(tmp_path / 'cache.sqlite'),
+                               zip_index_path=str(tmp_path / 'missing.csv'), geocode=geocoder, rate=1000.0)
+    assert 'not found' in capsys.readouterr().out
+    assert geocoder.calls == 2
+    assert out['Latitude'].notna().all()
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from geocode_engine import Location, SimulatedGeocoder, TokenBucket, build_query, geocode_addresses
+
+ADDRESSES = [f"{i} Main St, Springfield, IL 627{i:02d}" for i in range(12)]
+
+
+def test_results_match_serial_lookup():
+    addr_map, failures = geocode_addresses(ADDRESSES, SimulatedGeocoder(latency=(0.0, 0.002)),
+                                           max_in_flight=6, rate=1000.0)
+    expected = SimulatedGeocoder(latency=(0.0, 0.0))
+    assert not failures
+    assert addr_map == {a: tuple(expected(build_query(a))) for a in ADDRESSES}
+
+
+def test_rate_limit_bounds_throughput():
+    # burst of 1 at 20 req/s: 12 requests need at least 11 intervals of 50 ms
+    start = time.monotonic()
+    addr_map, _ = geocode_addresses(ADDRESSES, SimulatedGeocoder(latency=(0.0, 0.0)),
+                                    max_in_flight=8, rate=20.0, burst=1)
+    assert time.monotonic() - start >= 11 / 20.0 - 0.02
+    assert len(addr_map) == len(ADDRESSES)
+
+
+def test_in_flight_limit():
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def geocode(query, timeout=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return Location(40.0, -90.0)
+
+    geocode_addresses(ADDRESSES, geocode, max_in_flight=3, rate=1000.0)
+    assert peak[0] == 3
+
+
+def test_timeouts_and_errors_become_failures():
+    seen = []
+    addr_map, failures = geocode_addresses(ADDRESSES[:4], SimulatedGeocoder(latency=(0.05, 0.06)),
+                                           max_in_flight=4, rate=1000.0, timeout=0.01,
+                                           on_result=lambda i, addr, latlon: seen.append((addr, latlon)))
+    assert addr_map == {}
+    assert all(isinstance(e, TimeoutError) for e in failures.values()) and len(failures) == 4
+    assert sorted(seen) == sorted((a, None) for a in ADDRESSES[:4])
+
+    _, failures = geocode_addresses(ADDRESSES[:4], SimulatedGeocoder(latency=(0.0, 0.0), error_rate=1.0),
+                                    max_in_flight=2, rate=1000.0)
+    assert all(isinstance(e, ConnectionError) for e in failures.values())
+
+
+def test_no_match_is_a_failure_without_exception():
+    _, failures = geocode_addresses(ADDRESSES, SimulatedGeocoder(latency=(0.0, 0.0), miss_rate=1.0), rate=1000.0)
+    assert failures == {a: None for a in ADDRESSES}
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket(rate=10.0, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
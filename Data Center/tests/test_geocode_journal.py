@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+
+from geocode_journal import CheckpointJournal
+
+
+def test_replay_ignores_torn_last_line(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / 'out.csv'))
+    journal.record('1 Main St', 39.0, -77.5)
+    journal.record_many([('2 Oak Rd', 32.8, -96.8)])
+    assert journal.checkpoint() == 2
+    assert journal.checkpoint() == 0
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"address": "3 Elm Ave", "lat": 39.')  # killed mid-append
+
+    resolved = CheckpointJournal(str(tmp_path / 'out.csv')).replay()
+    assert resolved == {'1 Main St': (39.0, -77.5), '2 Oak Rd': (32.8, -96.8)}
+
+
+def test_resume_after_torn_tail(tmp_path):
+    out = str(tmp_path / 'out.csv')
+    journal = CheckpointJournal(out)
+    journal.record_many([('a', 1.0, 1.0), ('b', 2.0, 2.0)])
+    journal.checkpoint()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"address": "x", "lat"')
+
+    # Resumed run: replay, then keep appending
+    resumed = CheckpointJournal(out)
+    assert set(resumed.replay()) == {'a', 'b'}
+    resumed.record_many([('c', 3.0, 3.0), ('d', 4.0, 4.0)])
+    resumed.checkpoint()
+    assert set(CheckpointJournal(out).replay()) == {'a', 'b', 'c', 'd'}
+
+    # Appending without a replay first is repaired the same way
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"addr')
+    appender = CheckpointJournal(out)
+    appender.record('e', 5.0, 5.0)
+    appender.checkpoint()
+    assert set(CheckpointJournal(out).replay()) == {'a', 'b', 'c', 'd', 'e'}
+
+
+def test_compact_writes_output_and_drops_journal(tmp_path):
+    out = str(tmp_path / 'out.csv')
+    journal = CheckpointJournal(out)
+    journal.record('1 Main St', 39.0, -77.5)
+    df = pd.DataFrame({'Address': ['1 Main St', '2 Oak Rd'], 'Latitude': [39.0, None], 'Longitude': [-77.5, None]})
+
+    final = journal.compact(df)
+    assert list(final['Address']) == ['1 Main St']
+    assert pd.read_csv(out)['Address'].tolist() == ['1 Main St']
+    assert not os.path.exists(journal.path) and not os.path.exists(out + '.tmp')
+    assert CheckpointJournal(out).replay() == {}
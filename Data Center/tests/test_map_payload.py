@@ -0,0 +1,70 @@
+import base64
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+
+from map_payload import build_payload, encode_dc_layer, encode_plant_layer
+
+
+def _floats(s):
+    return np.frombuffer(base64.b64decode(s), dtype='<f4')
+
+
+def _decoded(column):
+    codes = np.frombuffer(base64.b64decode(column['codes']), dtype=f"<u{column['width']}")
+    return [column['dict'][c] for c in codes]
+
+
+def decode_payload(payload, compressed):
+    """Python mirror of DECODER_JS."""
+    raw = gzip.decompress(base64.b64decode(payload)) if compressed else payload
+    return json.loads(raw)
+
+
+def test_round_trip():
+    plants = pd.DataFrame({
+        'Plant Name': ['Small', 'Big', 'Mid'],
+        'City': ['Reno', None, 'Reno'],
+        'State': ['NV', 'TX', 'NV'],
+        'Latitude': [39.5, 32.8, 39.6],
+        'Longitude': [-119.8, -96.8, -119.7],
+        'gas_capacity_mw': [10.0, 1200.5, 300.25],
+    })
+    dcs = pd.DataFrame({
+        'Data Center Name': ['One', 'Two'],
+        'Provider': ['A', None],
+        'Address': ['1 Main St', None],
+        'Latitude': [39.0, 40.1],
+        'Longitude': [-77.5, -74.2],
+        'annual_pue': [1.15, np.nan],
+    })
+    layers = {'gas': encode_plant_layer(plants, 'gas_capacity_mw'), 'dc': encode_dc_layer(dcs, pue_col='annual_pue')}
+
+    for compress in (True, False):
+        payload, compressed = build_payload(layers, compress=compress)
+        assert compressed is compress
+        out = decode_payload(payload, compressed)
+
+        gas = out['gas']
+        assert gas['n'] == 3 and gas['name'] == ['Big', 'Mid', 'Small']  # largest capacity first
+        np.testing.assert_allclose(_floats(gas['cap']), [1200.5, 300.25, 10.0])
+        np.testing.assert_allclose(_floats(gas['lat']), [32.8, 39.6, 39.5], rtol=1e-6)
+        assert _decoded(gas['city']) == ['', 'Reno', 'Reno']
+        assert _decoded(gas['state']) == ['TX', 'NV', 'NV']
+        assert [level['deg'] for level in gas['lod']] == [2.0, 1.0, 0.5]
+
+        dc = out['dc']
+        assert dc['name'] == ['One', 'Two'] and dc['address'] == ['1 Main St', '']
+        assert _decoded(dc['provider']) == ['A', '']
+        np.testing.assert_allclose(_floats(dc['lon']), [-77.5, -74.2], rtol=1e-6)
+        np.testing.assert_allclose(_floats(dc['pue']), [1.15, np.nan], rtol=1e-6)
+
+
+def test_compressed_payload_is_deterministic():
+    dcs = pd.DataFrame({'Data Center Name': ['One'], 'Provider': ['A'], 'Address': ['x'],
+                        'Latitude': [39.0], 'Longitude': [-77.5]})
+    layers = {'dc': encode_dc_layer(dcs)}
+    assert build_payload(layers)[0] == build_payload(layers)[0]
+    assert 'pue' not in layers['dc']
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from map_visualization_interactive import dc_frame
+
+
+@pytest.fixture
+def data_centers():
+    return pd.DataFrame({
+        'Provider': ['A', 'B', 'C'],
+        'Data Center Name': ['One', 'Two', 'Three'],
+        'Address': ['1 Main St, Ashburn, VA 20147', '2 Oak Rd, Dallas, TX 75201', '3 Elm Ave, Reno, NV 89501'],
+        'Latitude': [39.0, 32.8, 39.5],
+        'Longitude': [-77.5, -96.8, -119.8],
+    })
+
+
+def test_pue_joined_on_name_and_address(data_centers, tmp_path, capsys):
+    # Reordered, one site missing, one stale row: values follow the key, not the row number
+    path = tmp_path / 'site_pue.csv'
+    pd.DataFrame({
+        'dc_index': [0, 1, 2],
+        'Data Center Name': ['Three', 'One', 'Gone'],
+        'Address': ['3 Elm Ave, Reno, NV 89501', '1 Main St, Ashburn, VA 20147', 'nowhere'],
+        'annual_pue': [1.3, 1.1, 9.9],
+    }).to_csv(path, index=False)
+
+    out = dc_frame(data_centers, str(path))
+    np.testing.assert_array_equal(out['annual_pue'].to_numpy(), [1.1, np.nan, 1.3])
+    assert list(out.index) == [0, 1, 2]
+    assert '1 sites have no PUE, 1 PUE rows match no site' in capsys.readouterr().out
+
+
+def test_positional_site_pue_rejected(data_centers, tmp_path):
+    path = tmp_path / 'site_pue.csv'
+    pd.DataFrame({'dc_index': [0, 1, 2], 'annual_pue': [1.1, 1.2, 1.3]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match='regenerate'):
+        dc_frame(data_centers, str(path))
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from monte_carlo import run_monte_carlo
+
+
+@pytest.fixture(scope='module')
+def serial():
+    return run_monte_carlo(n=23_000, chunk_size=5_000, workers=1, seed=7)
+
+
+def test_results_independent_of_worker_count(serial):
+    parallel = run_monte_carlo(n=23_000, chunk_size=5_000, workers=2, seed=7)
+    assert serial['n'] == parallel['n'] == 23_000
+    pd.testing.assert_frame_equal(serial['stats'], parallel['stats'])
+    pd.testing.assert_frame_equal(serial['sensitivity'], parallel['sensitivity'])
+
+    other = run_monte_carlo(n=23_000, chunk_size=5_000, workers=1, seed=8)
+    assert other['stats'].loc['pue', 'mean'] != serial['stats'].loc['pue', 'mean']
+
+
+def test_stats_and_sensitivity_are_sane(serial):
+    stats = serial['stats'].loc['pue']
+    assert stats['min'] <= stats['p5'] <= stats['p50'] <= stats['p95'] <= stats['max']
+    assert 1.0 < stats['mean'] < 1.2
+
+    sens = serial['sensitivity'].set_index(['metric', 'input'])
+    pue = sens.loc['pue']
+    assert pue['first_order'].between(0.0, 1.0).all()
+    assert pue['first_order'].sum() == pytest.approx(1.0, abs=0.1)   # near-additive model
+    assert np.all(np.abs(pue['src']) <= 1.0 + 1e-9)
+    # More pressure drop costs power, better fans save it
+    assert pue.loc['dp_air', 'src'] > 0 and pue.loc['fan_efficiency', 'src'] < 0
+    assert pue['first_order'].idxmax() == pue['src'].abs().idxmax()
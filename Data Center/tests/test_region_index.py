@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plant_data import assign_states
+from region_index import RegionIndex, assign_regions, load_region_index
+
+
+def _box(x0, y0, x1, y1, **props):
+    ring = [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+    return {'type': 'Feature', 'properties': props, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+
+
+@pytest.fixture
+def boundaries(tmp_path):
+    # VA and "Texas" share the lon = -75 edge; VA comes first in the file
+    path = tmp_path / 'states.geojson'
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        _box(-80.0, 36.0, -75.0, 40.0, STUSPS='VA'),
+        _box(-75.0, 36.0, -70.0, 40.0, NAME='Texas'),
+        _box(-120.0, 35.0, -115.0, 40.0, STUSPS='NV'),
+        {'type': 'Feature', 'properties': {}, 'geometry': None},
+    ]}))
+    return str(path)
+
+
+def test_lookup(boundaries):
+    index = RegionIndex.from_geojson(boundaries)
+    lat = [38.0, 38.0, 37.0, 38.0, np.nan, 10.0]
+    lon = [-77.0, -72.0, -117.0, -75.0, -77.0, -77.0]
+    assert list(index.lookup(lat, lon)) == ['VA', 'Texas', 'NV', 'VA', None, None]
+    assert load_region_index(boundaries) is load_region_index(boundaries)
+
+
+def test_assign_regions_adds_categorical(boundaries):
+    df = pd.DataFrame({'Latitude': [38.0, 0.0], 'Longitude': [-77.0, 0.0]})
+    assign_regions(df, {'State': load_region_index(boundaries)})
+    assert isinstance(df['State'].dtype, pd.CategoricalDtype)
+    assert df['State'].tolist()[0] == 'VA' and pd.isna(df['State'].tolist()[1])
+
+
+def test_assign_states_polygon_then_regex(boundaries, tmp_path):
+    df = pd.DataFrame({
+        'Address': ['1 A St, Reston, VA 20190', '2 B St, Foo, NJ 07001', '3 C St, Bar, OR 97001',
+                    '4 D St, Baz, CA 90001', 'no state here'],
+        'Latitude': [38.0, 38.0, 10.0, np.nan, 10.0],
+        'Longitude': [-77.0, -72.0, -77.0, np.nan, -77.0],
+    }, dtype=object)
+    df[['Latitude', 'Longitude']] = df[['Latitude', 'Longitude']].astype(np.float32)
+    # polygon wins and full names map to codes; outside / no coordinates fall back to the address
+    assert assign_states(df, boundaries).tolist()[:4] == ['VA', 'TX', 'OR', 'CA']
+    assert pd.isna(assign_states(df, boundaries).iloc[4])
+    # no boundary file: regex only
+    assert assign_states(df, str(tmp_path / 'missing.geojson')).tolist()[:4] == ['VA', 'NJ', 'OR', 'CA']
+
+
+def test_no_usable_features(tmp_path):
+    path = tmp_path / 'empty.geojson'
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [_box(0, 0, 1, 1, other='x')]}))
+    with pytest.raises(ValueError, match='no features'):
+        RegionIndex.from_geojson(str(path))
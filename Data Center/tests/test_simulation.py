@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation import compare_architectures, fw_fan_cooling, main, print_comparison, sweep
+
+
+def test_compare_rejects_unknown_inputs():
+    with pytest.raises(ValueError, match='target_it_load'):
+        compare_architectures({'target_it_load': [100.0, 360.0]})
+
+
+def test_comparison_keeps_swept_it_load(capsys):
+    table = compare_architectures({'target_it_load_mw': [100.0, 360.0], 'lng_flow_m3_day': [1000.0, 20000.0]})
+    print_comparison(table, inputs=['target_it_load_mw', 'lng_flow_m3_day'])
+    header = capsys.readouterr().out.splitlines()[0]
+    assert 'target_it_load_mw' in header and 'lng_flow_m3_day' in header
+
+    print_comparison(table)
+    assert 'target_it_load_mw' in capsys.readouterr().out.splitlines()[0]
+
+
+def test_sweep_grid_shape_and_order():
+    table = sweep({'target_it_load_mw': [100.0, 200.0], 'dt_air': [10.0, 15.0, 20.0]}, fixed={'dp_air': 500.0})
+    assert len(table) == 6
+    # first axis varies slowest
+    assert table['target_it_load_mw'].tolist() == [100.0] * 3 + [200.0] * 3
+    assert table['dt_air'].tolist() == [10.0, 15.0, 20.0] * 2
+    assert (table['dp_air'] == 500.0).all()
+    row = table.iloc[4]
+    assert row['pue'] == pytest.approx(fw_fan_cooling(target_it_load_mw=200.0, dt_air=15.0, dp_air=500.0)['pue'])
+
+
+def test_chunked_sweep_matches_single_chunk(tmp_path):
+    axes = {'target_it_load_mw': np.linspace(50.0, 500.0, 7), 'dt_water': [5.0, 10.0, 15.0]}
+    whole = sweep(axes, chunk_size=1000)
+    pd.testing.assert_frame_equal(sweep(axes, chunk_size=4), whole)
+    out = str(tmp_path / 'sweep.csv')
+    assert sweep(axes, chunk_size=5, out=out) == 21
+    pd.testing.assert_frame_equal(pd.read_csv(out), whole)
+
+
+def test_sweep_cli_rejects_unknown_inputs(tmp_path, capsys):
+    out = tmp_path / 'sweep.csv'
+    with pytest.raises(SystemExit):
+        main(['--sweep', 'target_it_load_mw=100,200', '--set', 'bogus=1', '--out', str(out)])
+    assert "unknown inputs for fw_fan_cooling: ['bogus']" in capsys.readouterr().err
+    assert not out.exists()
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from site_pue import simulate_sites, synthetic_climate_grid
+
+
+@pytest.fixture(scope='module')
+def grid():
+    return synthetic_climate_grid(2.0)
+
+
+@pytest.fixture
+def data_centers():
+    return pd.DataFrame({
+        'Provider': ['A', 'B', 'C'],
+        'Data Center Name': ['Ashburn', 'Phoenix', 'No coords'],
+        'Address': ['1 Main St, Ashburn, VA', '2 Oak Rd, Phoenix, AZ', '3 Elm Ave'],
+        'Latitude': [39.04, 33.45, np.nan],
+        'Longitude': [-77.49, -112.07, np.nan],
+    })
+
+
+def test_sites_get_climate_pue(grid, data_centers):
+    sites = simulate_sites(data_centers, grid, it_load_mw=[100.0, 200.0, 300.0], workers=1)
+    assert sites['Data Center Name'].tolist() == ['Ashburn', 'Phoenix']
+    assert sites['annual_pue'].between(1.0, 2.0).all()
+    # warmer site, more cooling
+    assert sites.loc[1, 'annual_pue'] > sites.loc[0, 'annual_pue']
+    np.testing.assert_allclose(sites['cooling_mw'], (sites['annual_pue'] - 1.0) * [100.0, 200.0])
+
+
+def test_no_cell_within_max_km_gives_nan(grid, data_centers):
+    sites = simulate_sites(data_centers, grid, max_km=1.0, workers=1)
+    assert len(sites) == 2
+    assert (sites['cell'] == -1).all()
+    for col in ['annual_pue', 'peak_pue', 'free_cooling_share', 'mechanical_share', 'cooling_mw']:
+        assert sites[col].isna().all()
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from siting_screen import RESULT_COLUMNS, screen_sites
+
+
+def _inputs():
+    plants = pd.DataFrame({
+        'Plant Code': [1, 2],
+        'Plant Name': ['Small Gas', 'Small Solar'],
+        'State': ['VA', 'TX'],
+        'Latitude': [39.0, 32.8],
+        'Longitude': [-77.5, -96.8],
+        'nuclear_capacity_mw': [0.0, 0.0],
+        'gas_capacity_mw': [500.0, 0.0],
+        'other_capacity_mw': [0.0, 0.0],
+        'wind_capacity_mw': [0.0, 0.0],
+        'solar_capacity_mw': [0.0, 80.0],
+    })
+    dcs = pd.DataFrame({'Latitude': [39.1], 'Longitude': [-77.4]})
+    return plants, dcs, {'VA': 10, 'TX': 5}
+
+
+def test_ranks_eligible_candidates():
+    plants, dcs, counts = _inputs()
+    ranked = screen_sites(plants, dcs, counts, [100.0, 5000.0], pue=1.2)
+    assert list(ranked.columns) == RESULT_COLUMNS
+    assert ranked['it_load_mw'].tolist() == [100.0]
+    assert ranked['Plant Name'].tolist() == ['Small Gas']
+
+
+def test_no_eligible_candidates_keeps_columns():
+    plants, dcs, counts = _inputs()
+    ranked = screen_sites(plants, dcs, counts, [5000.0, 10000.0], pue=1.2)
+    assert ranked.empty
+    assert list(ranked.columns) == RESULT_COLUMNS
+    # what main() does with the result
+    summary = ranked.groupby('it_load_mw').agg(required_mw=('required_mw', 'first'),
+                                                eligible=('eligible_candidates', 'first'))
+    assert summary.empty
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from zip_index import extract_zips, load_zip_index, lookup_zips
+
+
+def test_lookup_from_bundled_csv(tmp_path):
+    path = tmp_path / 'zips.csv'
+    path.write_text("# provenance line\nzip,latitude,longitude\n00501,40.8154,-73.0451\n20147,39.0438,-77.4874\n")
+    index = load_zip_index(str(path))
+    assert index.shape == (100000, 2)
+
+    zips = extract_zips(pd.Series(['1 Main St, Ashburn, VA 20147, USA', 'Holtsville, NY 00501', 'no zip', '99999']))
+    lat, lon = lookup_zips(zips, index)
+    np.testing.assert_allclose(lat, [39.0438, 40.8154, np.nan, np.nan])
+    np.testing.assert_allclose(lon, [-77.4874, -73.0451, np.nan, np.nan])
+
+
+def test_missing_index_fails_without_network(tmp_path, monkeypatch):
+    monkeypatch.setattr('zip_index.build_zip_index', lambda *a, **k: pytest.fail("must not download"))
+    with pytest.raises(FileNotFoundError, match='--rebuild'):
+        load_zip_index(str(tmp_path / 'missing.csv'))
@@ -0,0 +1,132 @@
+"""
+Offline ZIP -> centroid index for Phase 1 of geocode_comprehensive.py.
+
+The index is a dense (100000, 2) float64 array of (latitude, longitude) where
+row i is ZIP code i (NaN for unused codes), so a lookup is a single
+fancy-index `index[zip_ints]` instead of a pgeocode query + iterrows loop.
+
+It is built from `zip_centroids_us.csv` (zip, latitude, longitude; one row per
+ZIP that has a centroid), which is read once per process. Geocoding never
+touches the network for it: the file is created once with `--rebuild`, and
+when it is absent geocode_comprehensive.py skips Phase 1 with a warning and
+sends those rows to the address geocoder instead.
+
+Provenance: GeoNames US postal codes (https://download.geonames.org/export/zip/US.zip,
+CC BY 4.0) as served by pgeocode.Nominatim('us').query_postal_code, i.e. the
+centroid pgeocode returns for each ZIP, rounded to 4 decimals (~11 m). The
+first line of the CSV records the pgeocode version and date it was built.
+Create or refresh it explicitly, with network access:
+
+    python zip_index.py --rebuild
+    python zip_index.py --bench 100000     # time Phase 1 on synthetic addresses
+"""
+import datetime
+import functools
+import os
+import time
+
+import numpy as np
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zip_centroids_us.csv')
+N_ZIPS = 100000
+DECIMALS = 4
+
+# Last 5-digit group in the address (greedy prefix), same rule as the old extract_zip()
+ZIP_PATTERN = r'.*\b(\d{5})\b'
+
+
+def build_zip_index(path=INDEX_FILE):
+    """Query pgeocode (network) for every possible ZIP and write the centroid CSV; returns the dense index."""
+    import pandas as pd
+    import pgeocode
+
+    nomi = pgeocode.Nominatim('us')
+    codes = [f"{z:05d}" for z in range(N_ZIPS)]
+    res = nomi.query_postal_code(codes)
+    coords = res[['latitude', 'longitude']].to_numpy(dtype=np.float64).round(DECIMALS)
+    known = np.flatnonzero(np.isfinite(coords).all(axis=1))
+    table = pd.DataFrame({'zip': [codes[i] for i in known],
+                          'latitude': coords[known, 0], 'longitude': coords[known, 1]})
+    with open(path, 'w', newline='') as f:
+        f.write(f"# GeoNames US postal codes via pgeocode {getattr(pgeocode, '__version__', '?')}, "
+                f"built {datetime.date.today().isoformat()} by `python zip_index.py --rebuild`\n")
+        table.to_csv(f, index=False)
+    _load_csv.cache_clear()
+    return _dense(table)
+
+
+def _dense(table):
+    import pandas as pd
+
+    index = np.full((N_ZIPS, 2), np.nan)
+    codes = pd.to_numeric(table['zip'], errors='coerce').to_numpy()
+    ok = (codes >= 0) & (codes < N_ZIPS)
+    index[codes[ok].astype(np.int64)] = table.loc[ok, ['latitude', 'longitude']].to_numpy(dtype=np.float64)
+    index.flags.writeable = False
+    return index
+
+
+@functools.lru_cache(maxsize=4)
+def _load_csv(path, mtime_ns):
+    import pandas as pd
+
+    return _dense(pd.read_csv(path, comment='#', dtype={'zip': str}))
+
+
+def load_zip_index(path=INDEX_FILE):
+    """Dense ZIP centroid array from the centroid CSV (read once per process; no network)."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"ZIP centroid index not found: {path} "
+                                f"(create it with network access: `python zip_index.py --rebuild`)")
+    return _load_csv(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+def extract_zips(addresses):
+    """Vectorized ZIP extraction: Series of addresses -> Series of 5-digit strings (NaN if none)."""
+    return addresses.astype('string').str.extract(ZIP_PATTERN, expand=False)
+
+
+def lookup_zips(zips, index):
+    """Series of ZIP strings -> (lat, lon) float64 arrays, NaN where unknown."""
+    import pandas as pd
+
+    codes = pd.to_numeric(zips, errors='coerce').to_numpy(dtype=np.float64)
+    valid = ~np.isnan(codes)
+    lat = np.full(len(codes), np.nan)
+    lon = np.full(len(codes), np.nan)
+    idx = codes[valid].astype(np.int64)
+    coords = index[idx]
+    lat[valid] = coords[:, 0]
+    lon[valid] = coords[:, 1]
+    return lat, lon
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Inspect, benchmark or rebuild the offline ZIP centroid index.")
+    parser.add_argument('--index', default=INDEX_FILE)
+    parser.add_argument('--rebuild', action='store_true',
+                        help="re-download the centroids with pgeocode (network) and overwrite the CSV")
+    parser.add_argument('--bench', type=int, default=0, metavar='N',
+                        help="time Phase 1 on N synthetic addresses")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        start = time.perf_counter()
+        index = build_zip_index(args.index)
+        print(f"Saved {np.isfinite(index[:, 0]).sum()} ZIP centroids to {args.index} "
+              f"({time.perf_counter() - start:.1f}s)")
+    index = load_zip_index(args.index)
+    if args.bench:
+        rng = np.random.default_rng(0)
+        zips = rng.integers(500, N_ZIPS, args.bench)
+        addrs = pd.Series([f"{i} Main St, Springfield, IL {z:05d}, USA" for i, z in enumerate(zips)])
+        start = time.perf_counter()
+        lat, lon = lookup_zips(extract_zips(addrs), index)
+        elapsed = time.perf_counter() - start
+        print(f"Resolved {np.isfinite(lat).sum()}/{len(addrs)} addresses in {elapsed:.3f}s")
+    elif not args.rebuild:
+        print(f"{np.isfinite(index[:, 0]).sum()} ZIP centroids in {args.index}")